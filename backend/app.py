@@ -1,5 +1,7 @@
 # app.py
-from flask import Flask
+import logging
+import time
+from flask import Flask, g, request
 from flask_cors import CORS
 from routes.fixtures import fixtures_bp
 from routes.quick_picks import quick_picks_bp
@@ -8,29 +10,101 @@ from routes.top_performers import top_performers_bp
 from routes.health import health_bp
 from routes.admin import admin_bp
 from routes.player_trends import player_trends_bp
-from config.config import Config
+from routes.planner import planner_bp
+from routes.projections import projections_bp
+from routes.metrics import metrics_bp
+from routes.bulk import bulk_bp
+from routes.changes import changes_bp
+from config.config import Config, get_config
+from utils.data_loader import current_manifest
+from utils.encodings import OrjsonProvider, orjson
+from utils.log import configure_logging, get_logger
+from utils.metrics import observe_request
+from utils.preload import preload_data
 import os
-app = Flask(__name__)
-# Enable CORS for both production (Vercel) and local development
-CORS(app, resources={r"/api/*": {"origins": ["https://fpelly.vercel.app", "http://localhost:3000"]}})
-app.config.from_object(Config)
-# CORS(app)
-# Register blueprints
-app.register_blueprint(fixtures_bp, url_prefix='/api')
-app.register_blueprint(quick_picks_bp, url_prefix='/api')
-app.register_blueprint(rankings_bp, url_prefix='/api')
-app.register_blueprint(top_performers_bp, url_prefix='/api')
-app.register_blueprint(health_bp, url_prefix='/api')
-app.register_blueprint(admin_bp, url_prefix='/api')
-app.register_blueprint(player_trends_bp, url_prefix='/api')
+
+logger = get_logger('app')
+
+
+def _install_metrics(app):
+    """
+    Request instrumentation: latency and response size per route (the URL
+    rule, not the raw path, so query strings and ids don't add series)
+    """
+    @app.before_request
+    def start_request_timer():
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def record_request_metrics(response):
+        start = g.pop('request_start', None)
+        if start is None:
+            return response
+        elapsed = time.perf_counter() - start
+        route = request.url_rule.rule if request.url_rule is not None else None
+        size = None if response.is_streamed else response.content_length
+        observe_request(route, request.method, response.status_code, elapsed, size)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("request", extra={'method': request.method, 'path': request.path,
+                                           'status': response.status_code, 'ms': round(elapsed * 1000, 3),
+                                           'bytes': size})
+        return response
+
+
+def create_app(config=None):
+    """
+    Build the Flask app. `config` is a config class or name ('development',
+    'production'); by default APP_ENV picks it. With PRELOAD_DATA (production)
+    the data snapshot is loaded and frozen here, so servers that import the
+    app before forking (gunicorn --preload) share it across workers.
+    """
+    if config is None or isinstance(config, str):
+        config = get_config(config)
+    configure_logging()
+
+    app = Flask(__name__)
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
+    # Enable CORS for both production (Vercel) and local development
+    CORS(app, resources={r"/api/*": {"origins": ["https://fpelly.vercel.app", "http://localhost:3000"],
+                                      # Match count of paginated list queries
+                                      "expose_headers": ["X-Total-Count"]}})
+    app.config.from_object(config)
+    # CORS(app)
+    # Register blueprints
+    app.register_blueprint(fixtures_bp, url_prefix='/api')
+    app.register_blueprint(quick_picks_bp, url_prefix='/api')
+    app.register_blueprint(rankings_bp, url_prefix='/api')
+    app.register_blueprint(top_performers_bp, url_prefix='/api')
+    app.register_blueprint(health_bp, url_prefix='/api')
+    app.register_blueprint(admin_bp, url_prefix='/api')
+    app.register_blueprint(player_trends_bp, url_prefix='/api')
+    app.register_blueprint(planner_bp, url_prefix='/api')
+    app.register_blueprint(projections_bp, url_prefix='/api')
+    app.register_blueprint(metrics_bp, url_prefix='/api')
+    app.register_blueprint(bulk_bp, url_prefix='/api')
+    app.register_blueprint(changes_bp, url_prefix='/api')
+
+    if config.METRICS_ENABLED:
+        _install_metrics(app)
+
+    with app.app_context():
+        # Health and readiness checks are answered from the manifest in memory
+        current_manifest()
+        if app.config.get('PRELOAD_DATA'):
+            preload_data()
+    return app
+
+
+app = create_app()
 
 if __name__ == '__main__':
-    print("🚀 Starting FPL Analyst API...")
-    print(f"📁 Data directory: {Config.DATA_DIR}")
-    print(f"📁 Data directory exists: {os.path.exists(Config.DATA_DIR)}")
+    logger.info("🚀 Starting FPL Analyst API...")
+    logger.info("📁 Data directory", extra={'path': Config.DATA_DIR, 'exists': os.path.exists(Config.DATA_DIR)})
     if os.path.exists(Config.DATA_DIR):
-        print(f"📁 Contents: {os.listdir(Config.DATA_DIR)}")
-    print("🌐 API will be available at: http://localhost:5000")
-    print("🔧 Test endpoint: http://localhost:5000/api/test")
-    print("🔧 Health check: http://localhost:5000/api/health")
-    app.run(debug=True, host='127.0.0.1', port=5000)
\ No newline at end of file
+        logger.info("📁 Contents", extra={'files': os.listdir(Config.DATA_DIR)})
+    logger.info("🌐 API will be available at: http://localhost:5000")
+    logger.info("🔧 Test endpoint: http://localhost:5000/api/test")
+    logger.info("🔧 Health check: http://localhost:5000/api/health")
+    logger.info("📊 Metrics: http://localhost:5000/api/metrics")
+    app.run(debug=True, host='127.0.0.1', port=5000)
@@ -0,0 +1,2 @@
+# benchmarks/__init__.py
+# Benchmark suite for the API and the analytics pipeline: python -m benchmarks
@@ -0,0 +1,192 @@
+# benchmarks/__main__.py
+# Command line entry point:
+#   python -m benchmarks [--api] [--pipeline] [--output results.json]
+#   python -m benchmarks --compare baseline.json results.json
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+from config.config import Config
+
+# Stage timings below this are too noisy to flag as regressions
+MIN_COMPARED_SECONDS = 0.01
+
+
+def _log(line):
+    # Progress goes to stderr so stdout stays machine-readable
+    print(line, file=sys.stderr)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=Config.PROJECT_ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _metadata(args):
+    return {
+        'commit': _git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'data_dir': Config.DATA_DIR,
+        'settings': {
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'scales': args.scales,
+            'axis': args.axis
+        }
+    }
+
+
+def run_api(args):
+    from app import app
+    from benchmarks.api import benchmark_api
+    _log(f"🌐 API benchmark: {args.requests} requests × {args.concurrency} threads per endpoint")
+    headers = {'Accept-Encoding': args.accept_encoding} if args.accept_encoding else None
+    return benchmark_api(app, requests=args.requests, concurrency=args.concurrency,
+                         allocation_requests=args.allocation_requests, headers=headers, log=_log)
+
+
+def run_pipeline_stages(args):
+    from pipeline.benchmark import stage_benchmark
+    from pipeline.storage import read_gameweek_data, plain_strings
+
+    results = []
+    _log("⚙️  Pipeline stages on the season CSV")
+    result = stage_benchmark(csv_path=args.csv)
+    result['scale'] = 1
+    results.append(result)
+    _log(f"   {result['rows']:>9} rows  {result['total_seconds']:8.3f}s")
+
+    raw_df = plain_strings(read_gameweek_data(args.csv or Config.FPL_DATA_CSV))
+    for scale in args.scales:
+        factors = {'gameweek_factor': scale} if args.axis == 'gameweeks' else {'player_factor': scale}
+        _log(f"⚙️  Pipeline stages at {scale}× ({args.axis})")
+        result = stage_benchmark(raw_df, **factors)
+        result['scale'] = scale
+        results.append(result)
+        _log(f"   {result['rows']:>9} rows  {result['total_seconds']:8.3f}s")
+    return results
+
+
+def _ratio(old, new):
+    if not old or new is None:
+        return None
+    return new / old
+
+
+def compare(baseline, current, threshold):
+    """
+    Print per-endpoint and per-stage changes between two result files.
+    Returns the number of regressions (slower by more than `threshold`×).
+    """
+    regressions = 0
+
+    old_api = {result['url']: result for result in baseline.get('api', [])}
+    for result in current.get('api', []):
+        old = old_api.get(result['url'])
+        if old is None:
+            continue
+        for metric in ('p50', 'p99'):
+            ratio = _ratio(old['latency_ms'][metric], result['latency_ms'][metric])
+            flag = ''
+            if ratio is not None and ratio > threshold:
+                flag = '  ⚠️ regression'
+                regressions += 1
+            if ratio is not None:
+                print(f"{result['url']:<70} {metric:<4} {old['latency_ms'][metric]:9.3f} -> "
+                      f"{result['latency_ms'][metric]:9.3f} ms ({ratio:5.2f}×){flag}")
+
+    old_runs = {run['scale']: run for run in baseline.get('pipeline', [])}
+    for run in current.get('pipeline', []):
+        old = old_runs.get(run['scale'])
+        if old is None:
+            continue
+        for stage, seconds in run['stages'].items():
+            old_seconds = old['stages'].get(stage)
+            if old_seconds is None or max(old_seconds, seconds) < MIN_COMPARED_SECONDS:
+                continue
+            ratio = _ratio(old_seconds, seconds)
+            flag = ''
+            if ratio is not None and ratio > threshold:
+                flag = '  ⚠️ regression'
+                regressions += 1
+            if ratio is not None:
+                print(f"{'pipeline ' + str(run['scale']) + '× ' + stage:<70} {old_seconds:9.3f} -> "
+                      f"{seconds:9.3f} s  ({ratio:5.2f}×){flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Benchmark the API endpoints and the analytics pipeline (JSON results on stdout or --output)'
+    )
+    parser.add_argument('--api', action='store_true', help='only benchmark the API endpoints')
+    parser.add_argument('--pipeline', action='store_true', help='only benchmark the pipeline stages')
+    parser.add_argument('--requests', type=int, default=200, help='requests per endpoint (default: 200)')
+    parser.add_argument('--concurrency', type=int, default=8, help='client threads (default: 8)')
+    parser.add_argument('--allocation-requests', type=int, default=20,
+                        help='sequential requests per endpoint traced for allocations (0 to skip)')
+    parser.add_argument('--accept-encoding', help='Accept-Encoding header sent with API requests (e.g. gzip)')
+    parser.add_argument('--data-dir', help='data directory served by the API (default: backend/data)')
+    parser.add_argument('--csv', help='season CSV for the pipeline (default: fpl-data-stats.csv at the project root)')
+    parser.add_argument('--scales', type=int, nargs='*', default=[10, 50],
+                        help='synthetic scale-up factors for the pipeline (default: 10 50)')
+    parser.add_argument('--axis', choices=['gameweeks', 'players'], default='gameweeks',
+                        help='scale up by stacking seasons (gameweeks) or cloning players (default: gameweeks)')
+    parser.add_argument('--output', help='write the JSON results to this file instead of stdout')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'),
+                        help='compare two result files instead of running the benchmarks')
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help='slowdown ratio reported as a regression by --compare (default: 1.2)')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        results = []
+        for path in args.compare:
+            with open(path, 'r', encoding='utf-8') as f:
+                results.append(json.load(f))
+        regressions = compare(results[0], results[1], args.threshold)
+        print(f"{regressions} regression(s) above {args.threshold}×")
+        return 1 if regressions else 0
+
+    if args.data_dir:
+        if not os.path.isdir(args.data_dir):
+            parser.error(f"data directory not found: {args.data_dir}")
+        Config.DATA_DIR = os.path.abspath(args.data_dir)
+    run_all = not args.api and not args.pipeline
+    results = {'meta': _metadata(args)}
+    # Route and pipeline prints must not end up in the JSON on stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        if args.api or run_all:
+            results['api'] = run_api(args)
+        if args.pipeline or run_all:
+            results['pipeline'] = run_pipeline_stages(args)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+        _log(f"💾 Results written to {args.output}")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
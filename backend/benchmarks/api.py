@@ -0,0 +1,129 @@
+# benchmarks/api.py
+# Request latency, throughput and allocations of every GET endpoint,
+# driven through Flask's test client from a pool of threads
+import statistics
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+# Extra query strings benchmarked alongside each plain endpoint
+QUERY_VARIANTS = {
+    '/api/fixtures': ['gameweek=30', 'team=ARS&next=5'],
+    '/api/attack_rankings': ['sort=-attack_strength&limit=5&fields=team,attack_strength'],
+    '/api/top-attacking_qp': ['position=MID&max_cost=8&fields=web_name,now_cost,form'],
+    '/api/player-search': ['q=sal', 'q=haalnd'],
+    '/api/player-trends': ['players=M.Salah,Haaland&limit_gws=5'],
+    '/api/bulk': ['resources=layout,overall_rankings,top-attacking_qp,top-defensive_qp,hidden-gems,value-players'
+                  '&top-attacking_qp.limit=5&top-defensive_qp.limit=5']
+}
+
+# Endpoints that are not worth timing (static files)
+SKIPPED_ENDPOINTS = {'static'}
+
+
+def discover_urls(app):
+    """Every argument-free GET route of the app, plus the query variants above"""
+    urls = []
+    for rule in sorted(app.url_map.iter_rules(), key=lambda rule: rule.rule):
+        if rule.endpoint in SKIPPED_ENDPOINTS or rule.arguments or 'GET' not in rule.methods:
+            continue
+        urls.append(rule.rule)
+        urls.extend(f'{rule.rule}?{query}' for query in QUERY_VARIANTS.get(rule.rule, []))
+    return urls
+
+
+def _percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
+
+
+def _measure_load(app, url, requests, concurrency, headers):
+    """Latencies (seconds), statuses and body sizes for `requests` concurrent GETs"""
+    local = threading.local()
+
+    def send(_):
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = app.test_client()
+        start = time.perf_counter()
+        response = client.get(url, headers=headers)
+        body = response.get_data()
+        return time.perf_counter() - start, response.status_code, len(body)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(send, range(requests)))
+    wall = time.perf_counter() - start
+    return results, wall
+
+
+def _measure_allocations(app, url, requests, headers):
+    """Mean peak traced allocation per request and memory retained after the run (bytes)"""
+    client = app.test_client()
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        peaks = []
+        for _ in range(requests):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            client.get(url, headers=headers).get_data()
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+        retained, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return statistics.mean(peaks), retained - baseline
+
+
+def benchmark_url(app, url, requests=200, concurrency=8, warmup=5, allocation_requests=20, headers=None):
+    """Latency percentiles, requests/sec, response sizes and allocations for one URL"""
+    client = app.test_client()
+    for _ in range(warmup):
+        client.get(url, headers=headers).get_data()
+
+    results, wall = _measure_load(app, url, requests, concurrency, headers)
+    latencies = sorted(latency for latency, _, _ in results)
+    statuses = {}
+    for _, status, _ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    result = {
+        'url': url,
+        'requests': requests,
+        'concurrency': concurrency,
+        'statuses': statuses,
+        'bytes': results[0][2] if results else 0,
+        'requests_per_second': round(requests / wall, 1) if wall else None,
+        'latency_ms': {
+            'mean': round(statistics.mean(latencies) * 1000, 3),
+            'p50': round(_percentile(latencies, 0.50) * 1000, 3),
+            'p90': round(_percentile(latencies, 0.90) * 1000, 3),
+            'p99': round(_percentile(latencies, 0.99) * 1000, 3),
+            'max': round(latencies[-1] * 1000, 3)
+        }
+    }
+    if allocation_requests:
+        peak, retained = _measure_allocations(app, url, allocation_requests, headers)
+        result['allocations'] = {
+            'peak_bytes_per_request': int(peak),
+            'retained_bytes': int(retained)
+        }
+    return result
+
+
+def benchmark_api(app, urls=None, requests=200, concurrency=8, allocation_requests=20, headers=None, log=print):
+    """benchmark_url for every discovered endpoint (or `urls`)"""
+    results = []
+    for url in urls or discover_urls(app):
+        result = benchmark_url(app, url, requests=requests, concurrency=concurrency,
+                               allocation_requests=allocation_requests, headers=headers)
+        latency = result['latency_ms']
+        log(f"🌐 {url:<70} p50 {latency['p50']:8.3f}ms  p99 {latency['p99']:8.3f}ms  "
+            f"{result['requests_per_second']:8.1f} req/s  {result['bytes']:>8} B")
+        results.append(result)
+    return results
@@ -2,12 +2,81 @@
 import os
 
 class Config:
+    # Parse every data file when the app is created instead of on first request
+    PRELOAD_DATA = False
+
     # Data directories
-    DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
+    DATA_DIR = os.environ.get('DATA_DIR', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data'))
     
     # Project root directory (where CSV files are located)
     PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
     
     # CSV file paths
     FPL_DATA_CSV = os.path.join(PROJECT_ROOT, 'fpl-data-stats.csv')
-    FIXTURE_TEMPLATE_CSV = os.path.join(PROJECT_ROOT, 'fixture_template.csv')
\ No newline at end of file
+    FIXTURE_TEMPLATE_CSV = os.path.join(PROJECT_ROOT, 'fixture_template.csv')
+
+    # Seconds between mtime/size checks of cached data files (0 = check on every request)
+    DATA_CACHE_CHECK_INTERVAL = float(os.environ.get('DATA_CACHE_CHECK_INTERVAL', 1.0))
+
+    # Maximum number of derived (filtered) response variants cached per data file
+    DATA_CACHE_MAX_VARIANTS = 256
+
+    # HTTP caching of data responses: clients keep a copy but revalidate with the ETag
+    DATA_CACHE_CONTROL = 'no-cache'
+
+    # Response compression (computed once per data version)
+    COMPRESSION_MIN_SIZE = 1024
+    GZIP_LEVEL = 6
+    BROTLI_QUALITY = 9
+
+    # Background jobs (admin "Process Data"): pipeline worker processes and
+    # how many finished jobs are kept for the status endpoints
+    PIPELINE_WORKERS = int(os.environ.get('PIPELINE_WORKERS', 1))
+    JOB_HISTORY = 20
+
+    # Seconds between keep-alive comments on idle job progress streams
+    JOB_STREAM_HEARTBEAT = 15
+
+    # Published data snapshots kept for rollback (data/snapshots/<version>/)
+    SNAPSHOT_HISTORY = 5
+
+    # Change feed (/api/changes): deltas are composed over at most this many
+    # versions, and a resource is sent in full once more than this share of
+    # its records was added or changed
+    DELTA_MAX_VERSIONS = 4
+    DELTA_FULL_RATIO = 0.5
+
+    # CSV uploads are validated this many rows at a time; at most
+    # UPLOAD_MAX_ERRORS bad cells are listed in the error response
+    UPLOAD_CHUNK_ROWS = 50_000
+    UPLOAD_MAX_ERRORS = 50
+
+    # On-disk cache of pipeline stage results (data/pipeline_state/stage_cache);
+    # least recently used entries are evicted beyond this size
+    STAGE_CACHE_MAX_BYTES = int(os.environ.get('STAGE_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+
+    # Logging: level (DEBUG adds one line per request) and format ('text' or 'json')
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'text')
+
+    # Request/data/pipeline metrics served at /api/metrics
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') not in ('0', 'false', 'False')
+
+
+class ProductionConfig(Config):
+    """Settings for gunicorn/uvicorn (APP_ENV=production): no debug, data preloaded before fork"""
+    DEBUG = False
+
+    # Load and index the whole data snapshot when the app is created (see utils/preload.py)
+    PRELOAD_DATA = True
+
+
+CONFIGS = {'development': Config, 'production': ProductionConfig}
+
+
+def get_config(name=None):
+    """Config class for `name` (default: the APP_ENV environment variable, else development)"""
+    name = name or os.environ.get('APP_ENV', 'development')
+    if name not in CONFIGS:
+        raise ValueError(f"Unknown APP_ENV '{name}' (choices: {', '.join(CONFIGS)})")
+    return CONFIGS[name]
@@ -0,0 +1,20 @@
+# gunicorn.conf.py
+# Production serving: cd backend && gunicorn -c gunicorn.conf.py
+# The app is imported once in the master process (preload_app) with the
+# production config, which loads and freezes the data snapshot; forked
+# workers share it copy-on-write. Threaded workers keep long requests
+# (job progress streams, ?wait=true rebuilds) from tying up a whole process.
+import multiprocessing
+import os
+
+os.environ.setdefault('APP_ENV', 'production')
+
+wsgi_app = 'app:app'
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+preload_app = True
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+# Uploads and blocking rebuilds can take a while
+timeout = 120
+keepalive = 5
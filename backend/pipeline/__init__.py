@@ -0,0 +1,12 @@
+# pipeline/__init__.py
+# Importable analytics pipeline (replaces executing fpl.ipynb)
+# The runner (pandas and every stage) is imported on first use, so the API
+# can import light modules such as pipeline.projections without loading it
+__all__ = ['run_pipeline', 'ingest_gameweeks', 'TARGETS', 'INCREMENTAL_TARGETS']
+
+
+def __getattr__(name):
+    if name in __all__:
+        from pipeline import runner
+        return getattr(runner, name)
+    raise AttributeError(f"module 'pipeline' has no attribute {name!r}")
@@ -0,0 +1,68 @@
+# pipeline/__main__.py
+# Command line entry point: python -m pipeline [--targets ...]
+import argparse
+import json
+from pipeline.aggregates import discard_state
+from pipeline.storage import parse_gameweek_csv
+from config.config import Config
+from pipeline.runner import run_pipeline, ingest_gameweeks, TARGETS
+from utils.log import configure_logging
+from utils.snapshots import rollback, list_snapshots
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m pipeline',
+        description='Rebuild the FPL Analyst JSON data from the gameweek and fixture CSVs'
+    )
+    parser.add_argument('--csv', help='gameweek data CSV (default: fpl-data-stats.csv at the project root)')
+    parser.add_argument('--fixtures', help='fixture template CSV (default: fixture_template.csv at the project root)')
+    parser.add_argument('--output-dir', help='directory the JSON files are written to (default: backend/data)')
+    parser.add_argument('--targets', nargs='+', choices=TARGETS, metavar='TARGET',
+                        help=f"output groups to rebuild (default: all). Choices: {', '.join(TARGETS)}")
+    parser.add_argument('--ingest', metavar='GAMEWEEK_CSV',
+                        help='fold only this CSV of new gameweek rows into the saved aggregates (appends it to --csv)')
+    parser.add_argument('--no-snapshot', action='store_true',
+                        help='write the files straight into --output-dir instead of publishing a new snapshot')
+    parser.add_argument('--rollback', nargs='?', const='', metavar='VERSION',
+                        help='point the data at an earlier snapshot (default: the previous one) and exit')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='recompute every stage instead of reusing cached results of unchanged inputs')
+    parser.add_argument('--json', action='store_true', help='print the timing report as JSON')
+    args = parser.parse_args(argv)
+    configure_logging()
+
+    if args.rollback is not None:
+        data_dir = args.output_dir or Config.DATA_DIR
+        try:
+            version = rollback(data_dir, args.rollback or None)
+        except ValueError as e:
+            parser.error(str(e))
+        # The aggregates describe the newer data: the next ingest rebuilds them
+        discard_state(data_dir)
+        print(f"↩️  Serving snapshot {version} (available: {', '.join(list_snapshots(data_dir))})")
+        return
+
+    if args.ingest and args.targets:
+        parser.error('--targets cannot be combined with --ingest (an ingest refreshes every output)')
+
+    options = dict(
+        csv_path=args.csv,
+        fixtures_path=args.fixtures,
+        output_dir=args.output_dir,
+        log=(lambda message: None) if args.json else print,
+        snapshot=not args.no_snapshot
+    )
+    if not args.ingest:
+        options['targets'] = args.targets
+        options['cache'] = not args.no_cache
+    if args.ingest:
+        report = ingest_gameweeks(parse_gameweek_csv(args.ingest), **options)
+    else:
+        report = run_pipeline(**options)
+    if args.json:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
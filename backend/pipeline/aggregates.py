@@ -0,0 +1,162 @@
+# pipeline/aggregates.py
+# Running season aggregates, so a new gameweek can be folded in without
+# re-aggregating the whole season
+import os
+import pandas as pd
+from pipeline.constants import FORM_GAMEWEEKS
+from pipeline.loading import annotate_gameweek_rows
+from pipeline.season_stats import aggregate_gameweeks, combine_season_totals, finalize_season_stats, add_player_form, recent_gameweeks
+from pipeline.rankings import TEAM_GAMEWEEK_KEYS, TEAM_ATTACK_COLUMNS, build_team_gameweek_totals, combine_team_gameweek_totals
+
+STATE_FORMAT_VERSION = 2
+
+FORM_WINDOW_COLUMNS = ['player_team_key', 'web_name', 'team_name', 'element_type', 'gameweek', 'total_points']
+
+# Columns kept for rows of player-team combinations that have no minutes yet
+PENDING_COLUMNS = list(dict.fromkeys(
+    ['player_team_key', 'element_type'] + TEAM_GAMEWEEK_KEYS + TEAM_ATTACK_COLUMNS +
+    ['clean_sheet', 'goals_conceded', 'tackles', 'recoveries', 'expected_clean_sheet']
+))
+
+
+class GameweekAlreadyIngested(ValueError):
+    """New rows belong to a gameweek that is already in the aggregates"""
+
+
+def state_path(output_dir):
+    """Where the running aggregates for an output directory are persisted"""
+    return os.path.join(output_dir, 'pipeline_state', 'season_state.pkl')
+
+
+def discard_state(output_dir):
+    """
+    Remove the persisted aggregates once they no longer describe the data
+    (CSV replaced, snapshot rolled back); the next ingest rebuilds them
+    from the CSV
+    """
+    filepath = state_path(output_dir)
+    if os.path.exists(filepath):
+        os.remove(filepath)
+
+
+class SeasonAggregates:
+    """
+    Per player_team_key running aggregates of the gameweek data.
+
+    - totals: season sums / last values / max gameweek / games played per
+      player-team group (see SEASON_AGGREGATIONS)
+    - form_window: each group's last form_gameweeks (default FORM_GAMEWEEKS)
+      gameweek rows
+    - team_gameweeks: per team, venue and gameweek totals used for home/away
+      strength
+    - pending: rows of player-team combinations with 0 minutes so far. The
+      season analysis ignores those combinations; their rows are folded into
+      team_gameweeks only once the player actually plays for that team.
+    """
+
+    def __init__(self, totals=None, form_window=None, team_gameweeks=None, pending=None, gameweeks=None,
+                 form_gameweeks=FORM_GAMEWEEKS):
+        self.totals = totals
+        self.form_window = form_window
+        self.team_gameweeks = team_gameweeks
+        self.pending = pending
+        self.gameweeks = sorted(gameweeks or [])
+        self.form_gameweeks = form_gameweeks
+
+    @property
+    def last_gameweek(self):
+        return self.gameweeks[-1] if self.gameweeks else 0
+
+    @classmethod
+    def from_gameweeks(cls, raw_df, form_gameweeks=FORM_GAMEWEEKS):
+        """Build the aggregates from a full season of raw gameweek rows"""
+        state = cls(form_gameweeks=form_gameweeks)
+        state.update(raw_df)
+        return state
+
+    def update(self, raw_df):
+        """
+        Fold raw gameweek rows into the aggregates.
+
+        Rows must belong to gameweeks that were not ingested yet; sums would
+        otherwise be counted twice.
+        Raises:
+            GameweekAlreadyIngested: if they don't
+        """
+        new_gameweeks = sorted(int(gw) for gw in raw_df['gameweek'].unique())
+        already_ingested = sorted(set(new_gameweeks) & set(self.gameweeks))
+        if already_ingested:
+            raise GameweekAlreadyIngested(f"Gameweek(s) already ingested: {', '.join(map(str, already_ingested))}")
+
+        rows = annotate_gameweek_rows(raw_df)
+        self.totals = combine_season_totals(self.totals, aggregate_gameweeks(rows))
+        self.form_window = self._update_form_window(rows)
+
+        # Rows of combinations that now have minutes go into the team totals
+        candidates = rows[PENDING_COLUMNS]
+        if self.pending is not None and not self.pending.empty:
+            candidates = pd.concat([self.pending, candidates], ignore_index=True)
+        is_active = candidates['player_team_key'].isin(self._active_keys())
+        self.pending = candidates[~is_active].reset_index(drop=True)
+        self.team_gameweeks = combine_team_gameweek_totals(
+            self.team_gameweeks, build_team_gameweek_totals(candidates[is_active])
+        )
+
+        self.gameweeks = sorted(set(self.gameweeks) | set(new_gameweeks))
+        return new_gameweeks
+
+    def _update_form_window(self, rows):
+        """Keep each group's form_gameweeks most recent rows"""
+        window = rows[FORM_WINDOW_COLUMNS]
+        if self.form_window is not None:
+            window = pd.concat([self.form_window, window], ignore_index=True)
+        else:
+            window = window.reset_index(drop=True)
+        return recent_gameweeks(window, 'player_team_key', self.form_gameweeks).reset_index(drop=True)
+
+    def _active_keys(self):
+        """player_team_keys with more than 0 season minutes"""
+        minutes = self.totals.groupby('player_team_key')['season_minutes'].sum()
+        return minutes.index[minutes > 0]
+
+    def season_stats(self):
+        """The season_stats table (including form) for everything ingested so far"""
+        active_keys = self._active_keys()
+        totals = self.totals[self.totals['player_team_key'].isin(active_keys)].reset_index(drop=True)
+        form_rows = self.form_window[self.form_window['player_team_key'].isin(active_keys)]
+        return add_player_form(finalize_season_stats(totals), form_rows, self.form_gameweeks)
+
+    def save(self, filepath):
+        """Persist atomically (write a temporary file, then rename over the old one)"""
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        temp_path = f'{filepath}.tmp'
+        pd.to_pickle({
+            'format_version': STATE_FORMAT_VERSION,
+            'totals': self.totals,
+            'form_window': self.form_window,
+            'team_gameweeks': self.team_gameweeks,
+            'pending': self.pending,
+            'gameweeks': self.gameweeks,
+            'form_gameweeks': self.form_gameweeks
+        }, temp_path)
+        os.replace(temp_path, filepath)
+
+    @classmethod
+    def load(cls, filepath, form_gameweeks=FORM_GAMEWEEKS):
+        """
+        Load persisted aggregates, or return None if there are none, they are
+        outdated, or their form window is not form_gameweeks
+        """
+        if not os.path.exists(filepath):
+            return None
+        saved = pd.read_pickle(filepath)
+        if saved.get('format_version') != STATE_FORMAT_VERSION or saved.get('form_gameweeks') != form_gameweeks:
+            return None
+        return cls(
+            totals=saved['totals'],
+            form_window=saved['form_window'],
+            team_gameweeks=saved['team_gameweeks'],
+            pending=saved['pending'],
+            gameweeks=saved['gameweeks'],
+            form_gameweeks=saved['form_gameweeks']
+        )
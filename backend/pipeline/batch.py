@@ -0,0 +1,225 @@
+# pipeline/batch.py
+# Batch mode: the pipeline for several seasons and what-if parameter variants
+# side by side, fanned out over a process pool:
+#   python -m pipeline.batch --season 2024-25=old.csv --season 2025-26=fpl-data-stats.csv \
+#       --vary form_gameweeks=3,5,8 --vary attack_weights.goals=0.3,0.4 --output-dir /tmp/what-if
+# Every season CSV is parsed once, in this process; workers share the parsed
+# frames read-only instead of re-reading them.
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+from config.config import Config
+from pipeline.storage import read_gameweek_data
+from pipeline.runner import DEFAULT_PARAMS, TARGETS, resolve_params, run_pipeline
+from utils.log import configure_logging
+
+# The rankings/fixture outputs: what the model parameters change
+BATCH_TARGETS = ['rankings', 'quick_picks', 'fixtures']
+
+BASELINE = 'baseline'
+
+# Input frames of the worker processes (set once per worker by _init_worker)
+_shared = None
+
+
+def parse_variation(text):
+    """
+    'form_gameweeks=3,5,8' or 'attack_weights.goals=0.3,0.4' -> (name, [values])
+    Raises:
+        ValueError: for unknown parameters or values that are not numbers
+    """
+    name, _, values = text.partition('=')
+    if not values:
+        raise ValueError(f"Expected PARAMETER=VALUE[,VALUE...], got '{text}'")
+    parameter, _, weight = name.partition('.')
+    if parameter not in DEFAULT_PARAMS or bool(weight) != (parameter == 'attack_weights'):
+        raise ValueError(f"Unknown parameter '{name}' (choices: {', '.join(name for name in DEFAULT_PARAMS if name != 'attack_weights')}, attack_weights.<stat>)")
+    convert = float if weight else int
+    try:
+        return name, [convert(value) for value in values.split(',')]
+    except ValueError:
+        raise ValueError(f"Invalid value in '{text}'")
+
+
+def variant_params(assignment):
+    """{'form_gameweeks': 3, 'attack_weights.goals': 0.4} -> run_pipeline params"""
+    params = {}
+    for name, value in assignment.items():
+        parameter, _, weight = name.partition('.')
+        if weight:
+            params.setdefault(parameter, {})[weight] = value
+        else:
+            params[parameter] = value
+    # Validate now rather than in every worker
+    resolve_params(params)
+    return params
+
+
+def variant_name(assignment):
+    """Directory name of a variant: form_gameweeks-3__attack_weights.goals-0.4"""
+    return '__'.join(f'{name}-{value}' for name, value in assignment.items()) or BASELINE
+
+
+def build_variants(variations):
+    """
+    [(name, params)]: the baseline (default parameters) followed by every
+    combination of the varied values
+    """
+    variants = {BASELINE: {}}
+    names = [name for name, _ in variations]
+    for values in itertools.product(*[values for _, values in variations]):
+        assignment = dict(zip(names, values))
+        variants.setdefault(variant_name(assignment), variant_params(assignment))
+    return list(variants.items())
+
+
+def _init_worker(shared):
+    global _shared
+    _shared = shared
+
+
+def _run_variant(season, name, params, output_dir, targets):
+    """Worker-process entry point: one season/variant run into output_dir"""
+    start = time.perf_counter()
+    try:
+        report = run_pipeline(
+            output_dir=output_dir,
+            targets=targets,
+            log=lambda message: None,
+            snapshot=False,
+            params=params,
+            raw_data=_shared['seasons'][season],
+            fixture_template=_shared['fixtures']
+        )
+    except Exception as e:
+        return {'season': season, 'variant': name, 'error': f'{type(e).__name__}: {e}',
+                'seconds': round(time.perf_counter() - start, 4)}
+    return {
+        'season': season,
+        'variant': name,
+        'params': report['params'],
+        'stages': report['stages'],
+        'files_written': len(report['outputs']),
+        'seconds': report['total_seconds']
+    }
+
+
+def _pool_context():
+    # Forked workers inherit the parsed frames copy-on-write; spawn (where
+    # fork is unavailable) pickles them once per worker
+    method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(method)
+
+
+def run_batch(seasons, variants, output_dir, targets=None, fixtures_path=None, workers=None, log=print):
+    """
+    Run every (season, variant) combination and write the outputs to
+    output_dir/<season>/<variant>/ (same file layout as backend/data, so runs
+    can be diffed file by file), plus output_dir/batch.json describing the runs.
+
+    Args:
+        seasons: {season name: gameweek CSV path}
+        variants: [(variant name, params)] as returned by build_variants
+        targets: output groups per run (defaults to BATCH_TARGETS)
+        fixtures_path: fixture template CSV shared by all runs
+        workers: worker processes (defaults to the number of CPUs)
+    Returns:
+        The batch.json contents
+    """
+    targets = list(targets) if targets else list(BATCH_TARGETS)
+    unknown = [target for target in targets if target not in TARGETS]
+    if unknown:
+        raise ValueError(f"Unknown pipeline target(s): {', '.join(unknown)}")
+    workers = workers or os.cpu_count() or 1
+
+    start = time.perf_counter()
+    shared = {
+        'seasons': {season: read_gameweek_data(csv_path) for season, csv_path in seasons.items()},
+        'fixtures': pd.read_csv(fixtures_path or Config.FIXTURE_TEMPLATE_CSV)
+    }
+    load_seconds = time.perf_counter() - start
+    log(f"📦 Loaded {len(seasons)} season(s) in {load_seconds:.3f}s; "
+        f"{len(seasons) * len(variants)} runs on {workers} worker(s)")
+
+    runs = []
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context(),
+                             initializer=_init_worker, initargs=(shared,)) as pool:
+        futures = [
+            pool.submit(_run_variant, season, name, params, os.path.join(output_dir, season, name), targets)
+            for season in seasons for name, params in variants
+        ]
+        for future in as_completed(futures):
+            run = future.result()
+            run['path'] = os.path.join(run['season'], run['variant'])
+            runs.append(run)
+            if 'error' in run:
+                log(f"❌ {run['path']}: {run['error']}")
+            else:
+                log(f"✅ {run['path']:<60} {run['seconds']:8.3f}s")
+
+    order = {(season, name): i for i, (season, (name, _)) in enumerate(itertools.product(seasons, variants))}
+    runs.sort(key=lambda run: order[(run['season'], run['variant'])])
+    total = time.perf_counter() - start
+    summary = {
+        'seasons': seasons,
+        'targets': targets,
+        'workers': workers,
+        'load_seconds': round(load_seconds, 4),
+        'total_seconds': round(total, 4),
+        'run_seconds': round(sum(run['seconds'] for run in runs), 4),
+        'runs': runs
+    }
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, 'batch.json'), 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2)
+    failed = sum('error' in run for run in runs)
+    log(f"🏁 {len(runs) - failed}/{len(runs)} runs finished in {total:.3f}s "
+        f"({summary['run_seconds']:.3f}s of pipeline work)")
+    return summary
+
+
+def _season(text):
+    name, separator, csv_path = text.partition('=')
+    if not separator:
+        csv_path, name = text, os.path.splitext(os.path.basename(text))[0]
+    return name, csv_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m pipeline.batch',
+        description='Run the pipeline for several seasons and parameter variants in parallel'
+    )
+    parser.add_argument('--season', action='append', type=_season, metavar='NAME=CSV',
+                        help='season name and gameweek CSV (repeatable; default: current=fpl-data-stats.csv)')
+    parser.add_argument('--vary', action='append', default=[], metavar='PARAMETER=V1,V2',
+                        help='parameter values to try: form_gameweeks, min_minutes or attack_weights.<stat> '
+                             '(repeatable; every combination is run, plus the baseline)')
+    parser.add_argument('--fixtures', help='fixture template CSV (default: fixture_template.csv at the project root)')
+    parser.add_argument('--output-dir', required=True, help='directory the runs are written to')
+    parser.add_argument('--targets', nargs='+', choices=TARGETS, metavar='TARGET',
+                        help=f"output groups per run (default: {' '.join(BATCH_TARGETS)})")
+    parser.add_argument('--workers', type=int, help='worker processes (default: number of CPUs)')
+    parser.add_argument('--json', action='store_true', help='print batch.json to stdout')
+    args = parser.parse_args(argv)
+    configure_logging()
+
+    try:
+        variants = build_variants([parse_variation(text) for text in args.vary])
+    except ValueError as e:
+        parser.error(str(e))
+    seasons = dict(args.season or [('current', Config.FPL_DATA_CSV)])
+
+    summary = run_batch(seasons, variants, args.output_dir, targets=args.targets, fixtures_path=args.fixtures,
+                        workers=args.workers, log=(lambda message: None) if args.json else print)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+# pipeline/benchmark.py
+# Scaling benchmark for the grouped per-player/per-team computations:
+#   python -m pipeline.benchmark [--players 1 2 4] [--gameweeks 1 2] [--json]
+# stage_benchmark() times every pipeline stage (used by python -m benchmarks)
+import argparse
+import json
+import tempfile
+import time
+import pandas as pd
+from config.config import Config
+from pipeline.constants import FORM_GAMEWEEKS
+from pipeline.loading import annotate_gameweek_rows
+from pipeline.storage import read_gameweek_data, plain_strings
+from pipeline.season_stats import aggregate_gameweeks, finalize_season_stats, calculate_player_form
+from pipeline.rankings import (
+    create_comprehensive_team_strength_rankings, team_export_stats,
+    build_team_gameweek_totals, calculate_home_away_advantage, DEFENSIVE_POSITIONS
+)
+from pipeline.player_trends import prepare_trend_data, build_player_data
+from pipeline.runner import PipelineRun, TARGETS
+
+
+def scale_season(raw_df, player_factor=1, gameweek_factor=1):
+    """
+    Synthetic season data: every player is cloned player_factor times (new
+    ids and names, same teams) and the gameweeks are repeated gameweek_factor
+    times (later copies get later gameweek numbers).
+    """
+    id_offset = int(raw_df['id'].max()) + 1
+    gameweek_offset = int(raw_df['gameweek'].max())
+
+    players = []
+    for copy in range(player_factor):
+        clone = raw_df.copy()
+        if copy:
+            clone['id'] = clone['id'] + copy * id_offset
+            clone['web_name'] = clone['web_name'] + f' ({copy})'
+        players.append(clone)
+    players = pd.concat(players, ignore_index=True)
+
+    gameweeks = []
+    for copy in range(gameweek_factor):
+        clone = players.copy()
+        clone['gameweek'] = clone['gameweek'] + copy * gameweek_offset
+        gameweeks.append(clone)
+    return pd.concat(gameweeks, ignore_index=True)
+
+
+# --- Per-player / per-team scans the grouped versions replaced (baselines) ---
+
+def _scan_player_form(df, season_stats):
+    def player_form(player_name, team_name):
+        player_games = df[(df['web_name'] == player_name) & (df['team_name'] == team_name)]
+        if len(player_games) == 0:
+            return None
+        avg_points = player_games.nlargest(FORM_GAMEWEEKS, 'gameweek')['total_points'].mean()
+        multiplier = {1: 1.2, 2: 1.1}.get(player_games['element_type'].iloc[0], 0.9)
+        return round(min(10.0, max(0.0, avg_points * multiplier)), 1)
+    return season_stats.apply(lambda row: player_form(row['web_name'], row['team_name']), axis=1)
+
+
+def _scan_team_export_stats(season_stats, teams):
+    stats = {}
+    for team in teams:
+        team_data = season_stats[season_stats['team_name'] == team]
+        def_players = team_data[team_data['position_name'].isin(DEFENSIVE_POSITIONS)]
+        stats[team] = (
+            team_data['season_goals'].sum() / team_data['games_played'].max(),
+            def_players['season_GC'].max(),
+            def_players['season_CS'].mean() / def_players['games_played'].max()
+        )
+    return stats
+
+
+def _scan_home_away(df, teams):
+    strengths = {}
+    for team in teams:
+        for was_home in (True, False):
+            team_games = df[(df['team_name'] == team) & (df['was_home'] == was_home)]
+            fixtures = team_games['gameweek'].nunique()
+            defenders = team_games[team_games['element_type'].isin([1, 2])].groupby('gameweek')
+            strengths[team, was_home] = (
+                team_games['expected_goals'].sum() / fixtures,
+                defenders['clean_sheet'].max().sum() / fixtures,
+                defenders['tackles'].sum().mean()
+            )
+    return strengths
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def benchmark(raw_df, player_factor, gameweek_factor, include_scans=True):
+    """Time the grouped computations (and their scan baselines) on scaled data"""
+    raw = scale_season(raw_df, player_factor, gameweek_factor)
+    rows = annotate_gameweek_rows(raw)
+    minutes = rows.groupby('player_team_key')['minutes'].transform('sum')
+    rows = rows[minutes > 0]
+    season_stats = finalize_season_stats(aggregate_gameweeks(rows).reset_index(drop=True))
+    teams = create_comprehensive_team_strength_rankings(season_stats).index
+    trend_data = prepare_trend_data(raw)
+
+    result = {
+        'player_factor': player_factor,
+        'gameweek_factor': gameweek_factor,
+        'rows': len(raw),
+        'players': int(season_stats['id'].nunique()),
+        'gameweeks': int(raw['gameweek'].nunique()),
+        'grouped': {
+            'player_form': _timed(calculate_player_form, rows),
+            'team_export_stats': _timed(team_export_stats, season_stats, teams),
+            'home_away': _timed(lambda: calculate_home_away_advantage(
+                build_team_gameweek_totals(rows), create_comprehensive_team_strength_rankings(season_stats))),
+            'player_data': _timed(build_player_data, trend_data)
+        }
+    }
+    if include_scans:
+        result['scan'] = {
+            'player_form': _timed(_scan_player_form, rows, season_stats),
+            'team_export_stats': _timed(_scan_team_export_stats, season_stats, teams),
+            'home_away': _timed(_scan_home_away, rows, teams)
+        }
+    for timings in (result['grouped'], result.get('scan', {})):
+        for name, seconds in timings.items():
+            timings[name] = round(seconds, 4)
+    return result
+
+
+def stage_benchmark(raw_df=None, player_factor=1, gameweek_factor=1, csv_path=None, targets=None):
+    """
+    Wall-clock time of each pipeline stage for one full run, written to a
+    temporary directory. Without raw_df the season CSV is read as in
+    production; with raw_df the scaled rows are handed to the run directly
+    (so raw_data is not timed).
+    """
+    targets = list(targets) if targets else list(TARGETS)
+    with tempfile.TemporaryDirectory() as output_dir:
+        run = PipelineRun(csv_path or Config.FPL_DATA_CSV, Config.FIXTURE_TEMPLATE_CSV, output_dir, log=lambda line: None)
+        if raw_df is not None:
+            run.results['raw_data'] = scale_season(raw_df, player_factor, gameweek_factor)
+        start = time.perf_counter()
+        for target in targets:
+            run.get(target)
+        total = time.perf_counter() - start
+
+    raw = run.results['raw_data']
+    return {
+        'player_factor': player_factor,
+        'gameweek_factor': gameweek_factor,
+        'rows': len(raw),
+        'gameweeks': int(raw['gameweek'].nunique()),
+        'stages': {timing['stage']: timing['seconds'] for timing in run.timings},
+        'total_seconds': round(total, 4),
+        'files_written': len(run.outputs)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m pipeline.benchmark',
+        description='Runtime of the grouped pipeline computations vs number of players and gameweeks'
+    )
+    parser.add_argument('--csv', help='season CSV to scale (default: fpl-data-stats.csv at the project root)')
+    parser.add_argument('--players', type=int, nargs='+', default=[1, 2], help='player multipliers')
+    parser.add_argument('--gameweeks', type=int, nargs='+', default=[1, 2], help='gameweek multipliers')
+    parser.add_argument('--no-scan', action='store_true', help='skip the per-player scan baselines (slow at large sizes)')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args(argv)
+
+    raw_df = plain_strings(read_gameweek_data(args.csv or Config.FPL_DATA_CSV))
+    results = []
+    for gameweek_factor in args.gameweeks:
+        for player_factor in args.players:
+            result = benchmark(raw_df, player_factor, gameweek_factor, include_scans=not args.no_scan)
+            results.append(result)
+            if not args.json:
+                scan = result.get('scan', {})
+                print(f"📊 {result['players']:>6} players × {result['gameweeks']:>3} gameweeks ({result['rows']} rows)")
+                for name, seconds in result['grouped'].items():
+                    baseline = f"   scan {scan[name]:8.3f}s  ({scan[name] / max(seconds, 1e-9):6.1f}×)" if name in scan else ''
+                    print(f"   {name:<18} grouped {seconds:8.3f}s{baseline}")
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
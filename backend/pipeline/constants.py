@@ -0,0 +1,36 @@
+# pipeline/constants.py
+# Shared lookup tables and parameters for the analytics pipeline
+
+TEAM_SHORT_NAMES = {
+    'Liverpool': 'LIV',
+    'Man City': 'MCI',
+    'Man Utd': 'MUN',
+    'Chelsea': 'CHE',
+    'Crystal Palace': 'CRY',
+    'Bournemouth': 'BOU',
+    'Spurs': 'TOT',
+    'Everton': 'EVE',
+    "Nott'm Forest": 'NFO',
+    'Brighton': 'BHA',
+    'Newcastle': 'NEW',
+    'West Ham': 'WHU',
+    'Sunderland': 'SUN',
+    'Fulham': 'FUL',
+    'Leeds': 'LEE',
+    'Aston Villa': 'AVL',
+    'Brentford': 'BRE',
+    'Wolves': 'WOL',
+    'Burnley': 'BUR'
+}
+
+POSITION_MAP = {1: 'Goalkeeper', 2: 'Defender', 3: 'Midfielder', 4: 'Forward'}
+
+# Columns with too many missing values to be useful in the season analysis
+DROPPED_COLUMNS = ['touches', 'touches_opp_box']
+
+# Number of recent gameweeks used for player form (matches team rankings)
+FORM_GAMEWEEKS = 5
+
+# Players below this many season minutes are ignored by the quick picks
+# (prevents inflated per-90 stats for rarely-used substitutes)
+MIN_MINUTES_THRESHOLD = 180
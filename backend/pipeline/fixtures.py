@@ -0,0 +1,370 @@
+# pipeline/fixtures.py
+import numpy as np
+import pandas as pd
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+# Fixture template names that differ from the season data team names
+MANUAL_TEAM_MAPPINGS = {
+    'Tottenham': 'Spurs',
+    'Tottenham Hotspur': 'Spurs',
+    'Nottm Forest': "Nott'm Forest",
+    'Nottingham Forest': "Nott'm Forest",
+    'Man Utd': 'Man Utd',
+    'Manchester United': 'Man Utd',
+    'Man City': 'Man City',
+    'Manchester City': 'Man City',
+    'Newcastle': 'Newcastle',
+    'Newcastle United': 'Newcastle'
+}
+
+
+def score_to_probability(difficulty_score):
+    """
+    Convert a 0-10 difficulty score to a 10-90% fixture rating
+    (10 = very favorable 90%, 5 = neutral 50%, 0 = very unfavorable 10%).
+    Attack and defense use the same scale for a fair comparison.
+    """
+    probability = 10 + (difficulty_score * 8.0)
+    return round(max(10, min(90, probability)), 1)
+
+
+def percentage_to_fdr(percentage):
+    """
+    Convert a percentage rating to FDR (1-10 scale, lower = easier)
+    - High percentage (85%) = Easy fixture = Low FDR (1-2)
+    - Low percentage (15%) = Hard fixture = High FDR (8-9)
+    """
+    fdr = 10.5 - (percentage / 10)
+    return max(1, min(10, round(fdr, 1)))
+
+
+class EnhancedFixtureAnalyzer:
+    """Fixture difficulty analysis for FPL planning"""
+
+    def __init__(self, season_stats, team_rankings, fixtures_df, home_away_df=None):
+        self.season_stats = season_stats
+        self.team_rankings = team_rankings
+        self.home_away_df = home_away_df
+        self.fixtures_df = fixtures_df
+        self.current_gw = season_stats['last_gameweek'].max()
+        self.start_gw = self.current_gw + 1
+        self._map_team_names()
+
+    def _map_team_names(self):
+        """Map fixture team names to season_stats team names"""
+        fixture_teams = set(self.fixtures_df['home_team'].unique()) | set(self.fixtures_df['away_team'].unique())
+        season_teams = set(self.season_stats['team_name'].unique())
+
+        self.team_mapping = {}
+        for fixture_team in fixture_teams:
+            if fixture_team in MANUAL_TEAM_MAPPINGS:
+                mapped_name = MANUAL_TEAM_MAPPINGS[fixture_team]
+                if mapped_name in season_teams:
+                    self.team_mapping[fixture_team] = mapped_name
+                    continue
+
+            if fixture_team in season_teams:
+                self.team_mapping[fixture_team] = fixture_team
+                continue
+
+            best_match = None
+            for season_team in season_teams:
+                if (fixture_team.lower().replace(' ', '') in season_team.lower().replace(' ', '') or
+                        season_team.lower().replace(' ', '') in fixture_team.lower().replace(' ', '')):
+                    best_match = season_team
+                    break
+            if best_match:
+                self.team_mapping[fixture_team] = best_match
+            else:
+                self.team_mapping[fixture_team] = fixture_team
+                logger.warning("⚠️ Could not match fixture team - using default mapping", extra={'team': fixture_team})
+
+    def _strength_scale(self):
+        """Z-score parameters and ranges used to standardize attack and defense strengths"""
+        attack = self.team_rankings['attack_strength']
+        defense = self.team_rankings['defense_strength']
+        attack_std = attack.std()
+        defense_std = defense.std()
+        return {
+            'attack_mean': attack.mean(),
+            'attack_std': attack_std if attack_std != 0 else 1,
+            'defense_mean': defense.mean(),
+            'defense_std': defense_std if defense_std != 0 else 1,
+            'attack_range': attack.max() - attack.min() if attack.max() != attack.min() else 1,
+            'defense_range': defense.max() - defense.min() if defense.max() != defense.min() else 1
+        }
+
+    def _venue_strengths(self, venue, scale):
+        """
+        Attack/defense strength of every team (team_rankings order) adjusted
+        by its home or away advantage, as two arrays
+        """
+        attack = self.team_rankings['attack_strength'].to_numpy(dtype=float)
+        defense = self.team_rankings['defense_strength'].to_numpy(dtype=float)
+        if self.home_away_df is None:
+            return attack, defense
+        prefix = '' if venue == 'home' else 'away_'
+        boosts = self.home_away_df.reindex(self.team_rankings.index)
+        has_boost = self.team_rankings.index.isin(self.home_away_df.index)
+        # Boost proportional to the strength range
+        attack_boost = boosts[f'{prefix}attack_rank_boost'].to_numpy(dtype=float) * (scale['attack_range'] / len(self.team_rankings))
+        defense_boost = boosts[f'{prefix}defense_rank_boost'].to_numpy(dtype=float) * (scale['defense_range'] / len(self.team_rankings))
+        return np.where(has_boost, attack + attack_boost, attack), np.where(has_boost, defense + defense_boost, defense)
+
+    def get_fixture_difficulty_matrix(self, start_gw=None, end_gw=None):
+        """
+        Fixture difficulty for both sides of each fixture, using z-scored strengths.
+
+        Attack and defense are built from different components (goals vs CS/GC) so
+        their raw values are not comparable; z-scores put both on the same scale
+        ("elite attack (+2 SD) vs weak defense (-1.5 SD)").
+        attack/defense_difficulty are the home side's scores (0-10, higher =
+        easier), away_attack/away_defense_difficulty the away side's.
+        Computed for all fixtures at once from per-team strength vectors.
+        """
+        if start_gw is None:
+            start_gw = self.fixtures_df['gameweek'].min()
+        if end_gw is None:
+            end_gw = self.fixtures_df['gameweek'].max()
+
+        fixtures_period = self.fixtures_df[
+            (self.fixtures_df['gameweek'] >= start_gw) &
+            (self.fixtures_df['gameweek'] <= end_gw)
+        ]
+        mapped_home = fixtures_period['home_team'].map(lambda team: self.team_mapping.get(team, team))
+        mapped_away = fixtures_period['away_team'].map(lambda team: self.team_mapping.get(team, team))
+        home_index = self.team_rankings.index.get_indexer(mapped_home)
+        away_index = self.team_rankings.index.get_indexer(mapped_away)
+        known = (home_index >= 0) & (away_index >= 0)
+        home_index, away_index = home_index[known], away_index[known]
+
+        scale = self._strength_scale()
+        home_attack, home_defense = self._venue_strengths('home', scale)
+        away_attack, away_defense = self._venue_strengths('away', scale)
+        home_attack_zscore = (home_attack[home_index] - scale['attack_mean']) / scale['attack_std']
+        home_defense_zscore = (home_defense[home_index] - scale['defense_mean']) / scale['defense_std']
+        away_attack_zscore = (away_attack[away_index] - scale['attack_mean']) / scale['attack_std']
+        away_defense_zscore = (away_defense[away_index] - scale['defense_mean']) / scale['defense_std']
+
+        # Positive = home attack stronger than away defense (favorable)
+        attack_threat = home_attack_zscore - away_defense_zscore
+        # Positive = home defense stronger than away attack (favorable)
+        defense_stability = home_defense_zscore - away_attack_zscore
+
+        # Map z-score differences (+4 = 10 very easy, 0 = 5 neutral, -4 = 0 very hard)
+        def difficulty(difference):
+            return np.clip(((difference + 4) / 8) * 10, 0, 10)
+
+        attack_rank = self.team_rankings['attack_rank'].to_numpy()
+        defense_rank = self.team_rankings['defense_rank'].to_numpy()
+        attack_difficulty = difficulty(attack_threat)
+        defense_difficulty = difficulty(defense_stability)
+        return pd.DataFrame({
+            'gameweek': fixtures_period['gameweek'].to_numpy()[known],
+            'home_team': fixtures_period['home_team'].to_numpy()[known],
+            'away_team': fixtures_period['away_team'].to_numpy()[known],
+            'mapped_home': mapped_home.to_numpy()[known],
+            'mapped_away': mapped_away.to_numpy()[known],
+            'attack_difficulty': attack_difficulty,
+            'defense_difficulty': defense_difficulty,
+            'overall_difficulty': (attack_difficulty + defense_difficulty) / 2,
+            'away_attack_difficulty': difficulty(away_attack_zscore - home_defense_zscore),
+            'away_defense_difficulty': difficulty(away_defense_zscore - home_attack_zscore),
+            'home_attack_rank': attack_rank[home_index].astype(int),
+            'away_defense_rank': defense_rank[away_index].astype(int),
+            'home_defense_rank': defense_rank[home_index].astype(int),
+            'away_attack_rank': attack_rank[away_index].astype(int),
+            'attack_strength_diff': attack_threat,
+            'defense_strength_diff': defense_stability
+        })
+
+    def _get_team_info(self, team):
+        mapped_team = self.team_mapping.get(team, team)
+        team_data = self.season_stats[self.season_stats['team_name'] == mapped_team]
+        team_short = team_data['team_name_short'].iloc[0] if not team_data.empty else team
+        if mapped_team in self.team_rankings.index:
+            ranks = self.team_rankings.loc[mapped_team]
+            return team_short, int(ranks['attack_rank']), int(ranks['defense_rank'])
+        return team_short, None, None
+
+    def build_fixtures(self):
+        """
+        Per-fixture ratings for both sides from the next gameweek onwards
+        (up to 10 gameweeks ahead).
+
+        FDR is derived from the attacking/defensive fixture ratings: a higher
+        percentage means an easier fixture and a lower FDR (1-10 scale). Both the
+        home team's home advantage and the away team's away advantage are applied.
+        """
+        start_gw = self.start_gw
+        max_export_gw = min(start_gw + 10, 38)
+        difficulty_matrix = self.get_fixture_difficulty_matrix(start_gw=start_gw, end_gw=max_export_gw)
+        teams = set(difficulty_matrix['home_team']) | set(difficulty_matrix['away_team'])
+        team_info = {team: self._get_team_info(team) for team in teams}
+
+        # Away scores keep numpy rounding (np.round), home scores Python's
+        # round(); the published ratings were produced that way
+        away_scores = np.round(difficulty_matrix[['away_attack_difficulty', 'away_defense_difficulty']].to_numpy(dtype=float), 1)
+
+        fixtures_data = []
+        for fixture, (away_att_score, away_def_score) in zip(difficulty_matrix.to_dict(orient='records'), away_scores):
+            home_team = fixture['home_team']
+            away_team = fixture['away_team']
+
+            home_att_score = round(fixture['attack_difficulty'], 1)
+            home_def_score = round(fixture['defense_difficulty'], 1)
+            home_short, home_att_rank, home_def_rank = team_info[home_team]
+            away_short, away_att_rank, away_def_rank = team_info[away_team]
+
+            home_attack_pct = score_to_probability(home_att_score)
+            home_defense_pct = score_to_probability(home_def_score)
+            away_attack_pct = score_to_probability(away_att_score)
+            away_defense_pct = score_to_probability(away_def_score)
+
+            home_attack_fdr = percentage_to_fdr(home_attack_pct)
+            home_defense_fdr = percentage_to_fdr(home_defense_pct)
+            away_attack_fdr = percentage_to_fdr(away_attack_pct)
+            away_defense_fdr = percentage_to_fdr(away_defense_pct)
+
+            fixtures_data.append({
+                'gameweek': int(fixture['gameweek']),
+                'fixture': f"{home_team} vs {away_team}",
+                'home_team': {
+                    'name': home_team,
+                    'short_name': home_short,
+                    'attacking_fixture_rating': home_attack_pct,
+                    'defensive_fixture_rating': home_defense_pct,
+                    'rank': {
+                        'attack': home_att_rank,
+                        'defense': home_def_rank
+                    },
+                    'fdr': {
+                        'attack': home_attack_fdr,
+                        'defense': home_defense_fdr,
+                        'overall': round((home_attack_fdr + home_defense_fdr) / 2, 1)
+                    }
+                },
+                'away_team': {
+                    'name': away_team,
+                    'short_name': away_short,
+                    'attacking_fixture_rating': away_attack_pct,
+                    'defensive_fixture_rating': away_defense_pct,
+                    'rank': {
+                        'attack': away_att_rank,
+                        'defense': away_def_rank
+                    },
+                    'fdr': {
+                        'attack': away_attack_fdr,
+                        'defense': away_defense_fdr,
+                        'overall': round((away_attack_fdr + away_defense_fdr) / 2, 1)
+                    }
+                }
+            })
+        return fixtures_data
+
+    def build_team_summary(self, num_gameweeks=6):
+        """
+        Per-team fixture run summary over the next num_gameweeks:
+        average difficulty, near-term (first 3) vs medium-term (next 3)
+        ratings and the resulting fixture swing.
+        """
+        start_gw = self.start_gw
+        end_gw = start_gw + num_gameweeks - 1
+        all_difficulties = self.get_fixture_difficulty_matrix(start_gw, end_gw)
+        if all_difficulties.empty:
+            return []
+
+        team_summary = []
+        fixture_teams = set(all_difficulties['home_team'].unique()) | set(all_difficulties['away_team'].unique())
+        for team in sorted(fixture_teams):
+            team_fixtures = all_difficulties[(all_difficulties['home_team'] == team) | (all_difficulties['away_team'] == team)]
+            team_fixtures = team_fixtures.sort_values('gameweek')
+
+            attack_scores = []
+            defense_scores = []
+            near_term_home_fixtures = 0
+            medium_term_home_fixtures = 0
+            near_term_fixtures = []
+            medium_term_fixtures = []
+            fixture_count = 0
+
+            for _, fixture in team_fixtures.iterrows():
+                if fixture['home_team'] == team:
+                    attack_diff = fixture['attack_difficulty']
+                    defense_diff = fixture['defense_difficulty']
+                    if fixture_count < 3:
+                        near_term_home_fixtures += 1
+                    elif fixture_count < 6:
+                        medium_term_home_fixtures += 1
+                else:
+                    attack_diff, defense_diff = self._away_summary_scores(fixture['mapped_home'], fixture['mapped_away'])
+
+                attack_scores.append(attack_diff)
+                defense_scores.append(defense_diff)
+
+                period_fixture = {
+                    'attack': score_to_probability(attack_diff),
+                    'defense': score_to_probability(defense_diff)
+                }
+                if fixture_count < 3:
+                    near_term_fixtures.append(period_fixture)
+                elif fixture_count < 6:
+                    medium_term_fixtures.append(period_fixture)
+                fixture_count += 1
+
+            avg_attack_diff = round(np.mean(attack_scores), 3) if attack_scores else 0
+            avg_defense_diff = round(np.mean(defense_scores), 3) if defense_scores else 0
+
+            near_term_rating = 0
+            if near_term_fixtures:
+                near_term_rating = round(np.mean([(f['attack'] + f['defense']) / 2 for f in near_term_fixtures]), 1)
+            medium_term_rating = 0
+            if medium_term_fixtures:
+                medium_term_rating = round(np.mean([(f['attack'] + f['defense']) / 2 for f in medium_term_fixtures]), 1)
+
+            # How much fixtures improve/worsen from near to medium term
+            fixture_swing = round(medium_term_rating - near_term_rating, 1)
+            if fixture_swing > 10:
+                swing_category = "Improving Fixtures"
+            elif fixture_swing < -10:
+                swing_category = "Worsening Fixtures"
+            else:
+                swing_category = "Stable Fixtures"
+
+            team_summary.append({
+                'team': team,
+                'avg_attack_difficulty': avg_attack_diff,
+                'avg_defense_difficulty': avg_defense_diff,
+                'overall_difficulty': round((avg_attack_diff + avg_defense_diff) / 2, 3),
+                'near_term_home_fixtures': near_term_home_fixtures,
+                'medium_term_home_fixtures': medium_term_home_fixtures,
+                'near_term_rating': near_term_rating,
+                'medium_term_rating': medium_term_rating,
+                'fixture_swing': fixture_swing,
+                'swing_category': swing_category,
+                'form_context': "volatile" if abs(fixture_swing) > 15 else "consistent"
+            })
+        return team_summary
+
+    def _away_summary_scores(self, mapped_home, mapped_away):
+        """Away side difficulty used by the team summary (raw strength differences)"""
+        away_stats = self.team_rankings.loc[mapped_away]
+        home_stats = self.team_rankings.loc[mapped_home]
+        away_attack_strength = float(away_stats['attack_strength'])
+        away_defense_strength = float(away_stats['defense_strength'])
+        home_attack_strength = float(home_stats['attack_strength'])
+        home_defense_strength = float(home_stats['defense_strength'])
+
+        if self.home_away_df is not None:
+            if mapped_away in self.home_away_df.index:
+                away_attack_strength += self.home_away_df.loc[mapped_away, 'away_attack_rank_boost'] * 0.015
+                away_defense_strength += self.home_away_df.loc[mapped_away, 'away_defense_rank_boost'] * 0.015
+            if mapped_home in self.home_away_df.index:
+                home_attack_strength += self.home_away_df.loc[mapped_home, 'attack_rank_boost'] * 0.015
+                home_defense_strength += self.home_away_df.loc[mapped_home, 'defense_rank_boost'] * 0.015
+
+        attack_diff = max(0, min(10, (away_attack_strength - home_defense_strength + 0.5) * 10))
+        defense_diff = max(0, min(10, (away_defense_strength - home_attack_strength + 0.5) * 10))
+        return attack_diff, defense_diff
@@ -0,0 +1,279 @@
+# pipeline/insights.py
+import pandas as pd
+
+HIDDEN_GEM_POSITIONS = {
+    'Forward': 'FWD',
+    'Midfielder': 'MID',
+    'Defender': 'DEF',
+    'Goalkeeper': 'GK'
+}
+
+# Metrics z-scored within the hidden gem candidates
+HIDDEN_GEM_METRICS = [
+    'season_xG', 'season_xA', 'season_xCS', 'season_key_passes',
+    'form', 'points_per_game', 'goals_per_game', 'assists_per_game',
+    'points_per_million', 'minutes_per_game',
+    'season_tackles', 'season_recoveries', 'defensive_contribution_sum'
+]
+
+# Position-specific potential score weights (applied to the z-scores)
+HIDDEN_GEM_WEIGHTS = {
+    'FWD': [('season_xG', 0.30), ('season_xA', 0.20), ('form', 0.35), ('points_per_game', 0.15), ('points_per_million', 0.10)],
+    'MID': [('season_xG', 0.25), ('season_xA', 0.25), ('form', 0.25), ('season_key_passes', 0.15), ('points_per_million', 0.10)],
+    'DEF': [('season_xCS', 0.30), ('season_xA', 0.15), ('form', 0.25), ('defensive_contribution_sum', 0.20), ('points_per_million', 0.10)],
+    'GK': [('season_xCS', 0.35), ('form', 0.25), ('points_per_game', 0.20), ('points_per_million', 0.20)]
+}
+
+
+def build_layout(season_stats):
+    """Headline counts shown on the dashboard"""
+    return [{
+        'number_of_players': int(season_stats['web_name'].nunique()),
+        'total_teams': int(season_stats['team_name'].nunique()),
+        'total_gameweeks': int(season_stats['last_gameweek'].max())
+    }]
+
+
+def _season_performers(season_stats):
+    top_scorers = season_stats.nlargest(15, 'season_points')
+    performers = []
+    for _, player in top_scorers.iterrows():
+        ppg = player['season_points'] / player['games_played'] if player['games_played'] > 0 else 0
+        performers.append({
+            "player": player['web_name'],
+            "team": player['team_name'],
+            "team_short": player['team_name_short'],
+            "position": player['position_name'],
+            "points": int(player['season_points']),
+            "ppg": round(ppg, 1),
+            "price": player['now_cost'],
+            "ownership": player['selected_by_percent'],
+            "form": player['form']
+        })
+    return performers, set(top_scorers['web_name'].values)
+
+
+def _value_players(season_stats, top_scorer_names):
+    """Best points per million, excluding the top performers"""
+    value_candidates = season_stats[
+        (~season_stats['web_name'].isin(top_scorer_names)) &
+        (season_stats['season_points'] >= 15)
+    ].copy()
+    value_candidates['points_per_million'] = value_candidates['season_points'] / value_candidates['now_cost']
+
+    value_players = []
+    for _, player in value_candidates.nlargest(10, 'points_per_million').iterrows():
+        value_players.append({
+            "player": player['web_name'],
+            "team": player['team_name'],
+            "team_short": player['team_name_short'],
+            "position": player['position_name'],
+            "pointsPerMillion": round(player['points_per_million'], 2),
+            "totalPoints": int(player['season_points']),
+            "price": player['now_cost'],
+            "form": player['form']
+        })
+    return value_players
+
+
+def _hidden_gems(season_stats, top_scorer_names):
+    """Low ownership players with strong underlying stats"""
+    # Dynamic thresholds based on averages
+    avg_points = season_stats['season_points'].mean()
+    avg_form = season_stats['form'].mean()
+    min_games = 4
+    min_xG = season_stats['season_xG'].mean() * 0.8
+
+    hidden_gems = season_stats[
+        (season_stats['season_points'] >= avg_points * 0.8) &
+        (season_stats['selected_by_percent'] < 8) &
+        (season_stats['selected_by_percent'] > 0) &
+        (season_stats['games_played'] >= min_games) &
+        (season_stats['season_xG'] >= min_xG) &
+        (season_stats['form'] >= avg_form * 0.8) &
+        (~season_stats['web_name'].isin(top_scorer_names))
+    ].copy()
+    if len(hidden_gems) == 0:
+        return []
+
+    hidden_gems['position_name'] = hidden_gems['position_name'].replace(HIDDEN_GEM_POSITIONS)
+
+    for metric in HIDDEN_GEM_METRICS:
+        mean = hidden_gems[metric].mean()
+        std = hidden_gems[metric].std()
+        hidden_gems[f'{metric}_z'] = (hidden_gems[metric] - mean) / std if std > 0 else 0
+
+    potential_score = pd.Series(0.0, index=hidden_gems.index)
+    for position, weights in HIDDEN_GEM_WEIGHTS.items():
+        in_position = hidden_gems['position_name'] == position
+        score = 0
+        for metric, weight in weights:
+            score = score + hidden_gems.loc[in_position, f'{metric}_z'] * weight
+        potential_score[in_position] = score
+    hidden_gems['potential_score'] = potential_score
+
+    # Normalize potential score to 0-10 scale
+    if hidden_gems['potential_score'].std() > 0:
+        min_score = hidden_gems['potential_score'].min()
+        max_score = hidden_gems['potential_score'].max()
+        hidden_gems['potential_score'] = ((hidden_gems['potential_score'] - min_score) / (max_score - min_score)) * 10
+
+    gems = []
+    for _, player in hidden_gems.nlargest(10, 'potential_score').iterrows():
+        gems.append({
+            "player": player['web_name'],
+            "team": player['team_name'],
+            "team_short": player['team_name_short'],
+            "position": player['position_name'],
+            "points": int(player['season_points']),
+            "ppg": round(player['points_per_game'], 2),
+            "xG": round(player['season_xG'], 1),
+            "xA": round(player['season_xA'], 1),
+            "ownership": player['selected_by_percent'],
+            "price": player['now_cost'],
+            "form": player['form'],
+            "potentialScore": round(player['potential_score'], 1)
+        })
+    return gems
+
+
+def _goal_scorers(season_stats):
+    scorers = []
+    for _, player in season_stats[season_stats['season_goals'] > 0].nlargest(15, 'season_goals').iterrows():
+        gpg = player['season_goals'] / player['games_played'] if player['games_played'] > 0 else 0
+        scorers.append({
+            "player": player['web_name'],
+            "team": player['team_name'],
+            "team_short": player['team_name_short'],
+            "goals": int(player['season_goals']),
+            "goalsPerGame": round(gpg, 2),
+            "xG": round(player['season_xG'], 1),
+            "points": int(player['season_points']),
+            "price": player['now_cost'],
+            "ownership": player['selected_by_percent'],
+            "form": player['form']
+        })
+    return scorers
+
+
+def _assist_providers(season_stats):
+    providers = []
+    for _, player in season_stats[season_stats['season_assists'] > 0].nlargest(12, 'season_assists').iterrows():
+        apg = player['season_assists'] / player['games_played'] if player['games_played'] > 0 else 0
+        providers.append({
+            "player": player['web_name'],
+            "team": player['team_name'],
+            "team_short": player['team_name_short'],
+            "assists": int(player['season_assists']),
+            "assistsPerGame": round(apg, 2),
+            "points": int(player['season_points']),
+            "price": player['now_cost'],
+            "ownership": player['selected_by_percent'],
+            "form": player['form']
+        })
+    return providers
+
+
+def _defensive_leaders(season_stats):
+    defensive_candidates = season_stats[
+        (season_stats['season_points'] >= 10) &
+        (season_stats['games_played'] >= 3) &
+        (season_stats['position_name'].isin(['Goalkeeper', 'Defender']))
+    ].copy()
+    if len(defensive_candidates) == 0:
+        return []
+
+    defensive_candidates['defensive_score'] = (
+        defensive_candidates['season_CS'] * 0.20 +
+        defensive_candidates['season_tackles'] * 0.15 +
+        defensive_candidates['season_recoveries'] * 0.15 +
+        defensive_candidates['season_xCS'] * 0.20 +
+        defensive_candidates['defensive_contribution_sum'] * 0.10 +
+        defensive_candidates['clearances_blocks_interceptions_sum'] * 0.10 +
+        (defensive_candidates['season_points'] / defensive_candidates['games_played']) * 0.10
+    )
+
+    leaders = []
+    for _, player in defensive_candidates.nlargest(10, 'defensive_score').iterrows():
+        cs_rate = (player['season_CS'] / player['games_played']) * 100 if player['games_played'] > 0 else 0
+        ppg = player['season_points'] / player['games_played'] if player['games_played'] > 0 else 0
+        leaders.append({
+            "player": player['web_name'],
+            "team": player['team_name'],
+            "team_short": player['team_name_short'],
+            "position": player['position_name'],
+            "points": int(player['season_points']),
+            "ppg": round(ppg, 1),
+            "cleanSheets": int(player['season_CS']),
+            "csRate": round(cs_rate, 1),
+            "tackles": int(player['season_tackles']) if player['season_tackles'] > 0 else 1,
+            "defensiveContributions": int(player['defensive_contribution_sum']) if player['defensive_contribution_sum'] > 0 else 1,
+            "price": player['now_cost'],
+            "form": player['form']
+        })
+    return leaders
+
+
+def build_top_performers(season_stats):
+    """
+    Build every top performers category, keyed by output file name
+    (season_performers, value_players, hidden_gems, goal_scorers,
+    assist_providers, defensive_leaders)
+    """
+    season_performers, top_scorer_names = _season_performers(season_stats)
+    return {
+        'season_performers': season_performers,
+        'value_players': _value_players(season_stats, top_scorer_names),
+        'hidden_gems': _hidden_gems(season_stats, top_scorer_names),
+        'goal_scorers': _goal_scorers(season_stats),
+        'assist_providers': _assist_providers(season_stats),
+        'defensive_leaders': _defensive_leaders(season_stats)
+    }
+
+
+def _performance_record(player, sustainable):
+    return {
+        "player": player['web_name'],
+        "team": player['team_name'],
+        "team_short": player['team_name_short'],
+        "goals": int(player['season_goals']),
+        "xG": round(player['season_xG'], 1),
+        "overperformance": round(player['goal_overperformance'], 1),
+        "overperformance_per_90": round(player['overperformance_per_90'], 3),
+        "sustainable": sustainable,
+        "form": player['form']
+    }
+
+
+def build_performance_analysis(season_stats):
+    """Goal over/under-performance against xG (overperformers, sustainable_scorers, underperformers)"""
+    candidates = season_stats[
+        (season_stats['season_goals'] > 0) &
+        (season_stats['season_xG'] > 0) &
+        (season_stats['games_played'] >= 3)
+    ].copy()
+
+    candidates['goal_overperformance'] = candidates['season_goals'] - candidates['season_xG']
+    # season_stats has no minutes_played column, so this is normalized per game played
+    candidates['overperformance_per_90'] = candidates['goal_overperformance'] / candidates['games_played']
+
+    # Dynamic threshold based on xG (minimum threshold of 0.5 xG)
+    candidates['threshold'] = 0.1 * candidates['season_xG'].clip(lower=0.5)
+
+    overperformers = candidates[
+        candidates['goal_overperformance'] > candidates['threshold']
+    ].nlargest(8, 'overperformance_per_90')
+
+    sustainable_scorers = candidates[
+        abs(candidates['goal_overperformance']) <= candidates['threshold']
+    ].nlargest(8, 'season_goals')
+
+    underperformers = candidates[
+        candidates['goal_overperformance'] < -candidates['threshold']
+    ].nlargest(8, 'season_xG')
+
+    return {
+        'overperformers': [_performance_record(player, False) for _, player in overperformers.iterrows()],
+        'sustainable_scorers': [_performance_record(player, True) for _, player in sustainable_scorers.iterrows()],
+        'underperformers': [_performance_record(player, False) for _, player in underperformers.iterrows()]
+    }
@@ -0,0 +1,58 @@
+# pipeline/loading.py
+import warnings
+import pandas as pd
+from pipeline.constants import TEAM_SHORT_NAMES, POSITION_MAP, DROPPED_COLUMNS
+from pipeline.storage import plain_strings
+
+
+def add_team_short_names(season_data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add team_name_short column to season_data based on team_name mapping.
+
+    Args:
+        season_data: DataFrame containing player statistics
+    Returns:
+        Updated DataFrame with team_name_short column
+    """
+    season_data = season_data.copy()
+
+    # Normalize team names for mapping (case-insensitive, strip spaces/punctuation)
+    normalized_mapping = {k.lower().replace("'", "").strip(): v for k, v in TEAM_SHORT_NAMES.items()}
+
+    def map_team_name(team_name):
+        if pd.isna(team_name):
+            return None
+        normalized_name = team_name.lower().replace("'", "").strip()
+        return normalized_mapping.get(normalized_name, team_name[:3].upper())  # Default to first 3 letters if unmapped
+
+    # Map each distinct team once instead of once per row
+    unique_teams = season_data['team_name'].dropna().unique()
+    season_data['team_name_short'] = season_data['team_name'].map({team: map_team_name(team) for team in unique_teams})
+
+    unmapped_teams = [
+        team for team in unique_teams
+        if team.lower().replace("'", "").strip() not in normalized_mapping
+    ]
+    if unmapped_teams:
+        warnings.warn(f"Unmapped team names (assigned default short names): {unmapped_teams}. Consider updating the team_short_names mapping.")
+
+    return season_data
+
+
+def annotate_gameweek_rows(raw_df):
+    """
+    Add the derived columns the season aggregation needs to raw gameweek rows.
+
+    - drops sparse columns (touches, touches_opp_box)
+    - adds team_name_short and position_name
+    - adds player_team_key (id|team_name) so transferred players are tracked per team
+
+    Player-team combinations with 0 total minutes are not removed here: a
+    combination can only be judged once all its gameweeks are known, so the
+    running aggregates apply that rule (see pipeline.aggregates).
+    """
+    df = plain_strings(raw_df.drop(columns=[col for col in DROPPED_COLUMNS if col in raw_df.columns]))
+    df = add_team_short_names(df)
+    df['player_team_key'] = df['id'].astype(str) + '|' + df['team_name']
+    df['position_name'] = df['element_type'].map(POSITION_MAP)
+    return df
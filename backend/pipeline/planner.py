@@ -0,0 +1,99 @@
+# pipeline/planner.py
+# Players × gameweeks expected points for the upcoming fixtures, precomputed
+# for the squad planner endpoint (see utils/squad_planner.py)
+import numpy as np
+from utils.fixture_matrix import METRICS
+
+# Points per game are shrunk towards PRIOR_POINTS as if every player had
+# PRIOR_GAMES extra average games (a few appearances say little)
+PRIOR_POINTS = 2.0
+PRIOR_GAMES = 5
+
+# A fixture's FDR moves a player's expected points by up to ±FIXTURE_WEIGHT
+# (FDR 1 = +25%, 5.5 = neutral, 10 = -25%)
+FIXTURE_WEIGHT = 0.25
+
+# Players who appeared in any of the last RECENT_GAMEWEEKS gameweeks are
+# projected (the latest gameweek may only be partly played)
+RECENT_GAMEWEEKS = 2
+
+# Attackers are scored by the attacking FDR, goalkeepers and defenders by the defensive one
+FDR_METRIC = {1: 'defense', 2: 'defense', 3: 'attack', 4: 'attack'}
+
+
+def fixture_multiplier(fdr):
+    """Expected points multiplier of a fixture with this FDR (scalar or array)"""
+    return 1 + FIXTURE_WEIGHT / 4.5 * (5.5 - fdr)
+
+
+def fixture_factors(matrix):
+    """
+    (teams, gameweeks, metrics) sum of fixture multipliers per gameweek: 0 in
+    a blank gameweek, two multipliers in a double one. The multiplier is
+    linear in FDR, so it is computed from the matrix's FDR sums and counts.
+    """
+    slope = FIXTURE_WEIGHT / 4.5
+    return matrix.counts[:, :, None] * (1 + slope * 5.5) - slope * matrix.totals
+
+
+def current_players(season_stats):
+    """
+    season_stats rows of the players with a row in the last RECENT_GAMEWEEKS
+    gameweeks, each once for the team of their latest row, so players who
+    moved on or left are not projected for their old team
+    """
+    current_gw = season_stats['last_gameweek'].max()
+    return (
+        season_stats[season_stats['last_gameweek'] > current_gw - RECENT_GAMEWEEKS]
+        .sort_values('last_gameweek', kind='stable')
+        .drop_duplicates('id', keep='last')
+    )
+
+
+def matrix_team_rows(matrix, team_mapping):
+    """season_stats team name -> fixture matrix row (team_mapping: fixture name -> season_stats name)"""
+    team_rows = {}
+    for fixture_team, season_team in team_mapping.items():
+        index = matrix.team_index(fixture_team)
+        if index is not None:
+            team_rows.setdefault(season_team, index)
+    return team_rows
+
+
+def build_player_scores(season_stats, matrix, team_mapping):
+    """Expected points of every current player (see current_players) in every upcoming gameweek"""
+    players = current_players(season_stats)
+
+    team_rows = matrix_team_rows(matrix, team_mapping)
+
+    expected = (
+        (players['season_points'] + PRIOR_POINTS * PRIOR_GAMES) / (players['games_played'] + PRIOR_GAMES)
+    ).to_numpy(dtype=float)
+    rows = players['team_name'].map(team_rows)
+    has_fixtures = rows.notna().to_numpy()
+    metric = players['element_type'].map(lambda element_type: METRICS.index(FDR_METRIC[element_type])).to_numpy()
+
+    factors = fixture_factors(matrix)
+    scores = np.zeros((len(players), len(matrix.gameweeks)))
+    row_index = rows.fillna(0).astype(int).to_numpy()
+    scores[has_fixtures] = (
+        expected[has_fixtures, None] * factors[row_index[has_fixtures], :, metric[has_fixtures]]
+    )
+
+    records = []
+    for player, player_expected, player_scores in zip(players.to_dict(orient='records'), expected, np.round(scores, 2)):
+        records.append({
+            'id': int(player['id']),
+            'web_name': player['web_name'],
+            'team': player['team_name'],
+            'team_short': player['team_name_short'],
+            'position': player['position_name'],
+            'element_type': int(player['element_type']),
+            'now_cost': float(player['now_cost']),
+            'expected_points_per_game': round(float(player_expected), 2),
+            'scores': player_scores.tolist()
+        })
+    return {
+        'gameweeks': matrix.gameweeks.tolist(),
+        'players': sorted(records, key=lambda record: record['id'])
+    }
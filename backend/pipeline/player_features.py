@@ -0,0 +1,67 @@
+# pipeline/player_features.py
+# Standardized per-90 feature matrix of the current players, precomputed
+# for the similar-players endpoint (see utils/player_similarity.py)
+import numpy as np
+from pipeline.planner import current_players
+
+# Feature name -> season_stats column, as a rate per 90 minutes
+PER_90_FEATURES = {
+    'xG_per90': 'season_xG',
+    'xA_per90': 'season_xA',
+    'shots_per90': 'season_shots',
+    'key_passes_per90': 'season_key_passes',
+    'defensive_contribution_per90': 'defensive_contribution_sum',
+}
+
+# Feature name -> season_stats column, as is
+VALUE_FEATURES = {
+    'now_cost': 'now_cost',
+    'form': 'form',
+}
+
+FEATURES = list(PER_90_FEATURES) + list(VALUE_FEATURES)
+
+
+def build_player_features(season_stats, min_minutes):
+    """
+    Feature values of every current player with at least min_minutes this
+    season (per-90 rates of fewer minutes are mostly noise), and the same
+    values as z-scores (mean 0, standard deviation 1 over those players) so
+    every feature weighs the same in a distance.
+    """
+    players = current_players(season_stats)
+    players = players[players['season_minutes'] >= max(min_minutes, 1)]
+
+    minutes = players['season_minutes'].to_numpy(dtype=float)
+    columns = [players[column].to_numpy(dtype=float) * 90 / minutes for column in PER_90_FEATURES.values()]
+    columns += [players[column].to_numpy(dtype=float) for column in VALUE_FEATURES.values()]
+    values = np.nan_to_num(np.column_stack(columns))
+
+    mean = values.mean(axis=0) if len(values) else np.zeros(len(FEATURES))
+    std = values.std(axis=0) if len(values) else np.ones(len(FEATURES))
+    # A constant feature cannot tell players apart
+    std[std == 0] = 1.0
+    vectors = (values - mean) / std
+
+    records = []
+    for player, player_values, vector in zip(players.to_dict(orient='records'), np.round(values, 3),
+                                             np.round(vectors, 4)):
+        records.append({
+            'id': int(player['id']),
+            'web_name': player['web_name'],
+            'team': player['team_name'],
+            'team_short': player['team_name_short'],
+            'position': player['position_name'],
+            'element_type': int(player['element_type']),
+            'now_cost': float(player['now_cost']),
+            'season_minutes': int(player['season_minutes']),
+            'features': dict(zip(FEATURES, player_values.tolist())),
+            'vector': vector.tolist()
+        })
+    return {
+        'features': FEATURES,
+        'mean': np.round(mean, 4).tolist(),
+        'std': np.round(std, 4).tolist(),
+        'min_minutes': int(min_minutes),
+        'players': sorted(records, key=lambda record: record['id'])
+    }
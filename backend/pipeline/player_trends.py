@@ -0,0 +1,235 @@
+# pipeline/player_trends.py
+import json
+import numpy as np
+from pipeline.constants import FORM_GAMEWEEKS
+from pipeline.storage import plain_strings
+from utils.player_index import normalize_name
+
+TREND_FILL_VALUES = {
+    'web_name': 'Unknown',
+    'team_name': 'Unknown',
+    'opponent_team_name': 'Unknown',
+    'was_home': False,
+    'touches': 0,
+    'touches_opp_box': 0,
+    'chances_created': 0,
+    'total_shots': 0,
+    'shots_on_target': 0,
+    'goals': 0,
+    'assists': 0,
+    'clean_sheet': 0,
+    'goals_conceded': 0,
+    'minutes': 0,
+    'total_points': 0,
+    'now_cost': 0,
+    'selected_by_percent': 0,
+    'expected_goals': 0,
+    'expected_assists': 0,
+    'expected_goal_involvements': 0,
+    'expected_points': 0,
+    'expected_goals_conceded': 0,
+    'defensive_contribution': 0
+}
+
+TREND_DTYPES = {
+    'id': 'int32',
+    'element_type': 'int32',
+    'gameweek': 'int32',
+    'minutes': 'int32',
+    'total_points': 'float32',
+    'goals': 'int32',
+    'assists': 'int32',
+    'clean_sheet': 'int32',
+    'total_shots': 'int32',
+    'shots_on_target': 'int32',
+    'chances_created': 'int32',
+    'touches': 'int32',
+    'touches_opp_box': 'int32',
+    'goals_conceded': 'int32',
+    'now_cost': 'float32',
+    'selected_by_percent': 'float32',
+    'expected_goals': 'float32',
+    'expected_assists': 'float32',
+    'expected_goal_involvements': 'float32',
+    'expected_points': 'float32',
+    'expected_goals_conceded': 'float32',
+    'defensive_contribution': 'float32'
+}
+
+
+def prepare_trend_data(raw_df):
+    """Fill missing values and cast the raw CSV to compact native types"""
+    df_players = plain_strings(raw_df).fillna(TREND_FILL_VALUES)
+    df_players = df_players.astype(TREND_DTYPES)
+    df_players['was_home'] = df_players['was_home'].astype(bool)
+    return df_players
+
+
+# (output key, source column, conversion) for each gameweek entry
+GAMEWEEK_FIELDS = [
+    ('gameweek', 'gameweek', int),
+    ('opponent', 'opponent_team_name', str),
+    ('was_home', 'was_home', bool),
+    ('total_points', 'total_points', float),
+    ('minutes', 'minutes', int),
+    ('goals', 'goals', int),
+    ('assists', 'assists', int),
+    ('clean_sheets', 'clean_sheet', int),
+    ('xG', 'expected_goals', 2),
+    ('xA', 'expected_assists', 2),
+    ('xGI', 'expected_goal_involvements', 2),
+    ('xP', 'expected_points', 2),
+    ('shots', 'total_shots', int),
+    ('shots_on_target', 'shots_on_target', int),
+    ('key_passes', 'chances_created', int),
+    ('touches', 'touches', int),
+    ('touches_opp_box', 'touches_opp_box', int),
+    ('defensive_contribution', 'defensive_contribution', 2),
+    ('xGC', 'expected_goals_conceded', 2),
+    ('goals_conceded', 'goals_conceded', int)
+]
+
+
+def _column_values(df, column, conversion):
+    """A column as a list of plain Python values (int/str/bool, or floats rounded to n places)"""
+    values = df[column].tolist()
+    if isinstance(conversion, int):
+        return [round(float(value), conversion) for value in values]
+    return [conversion(value) for value in values]
+
+
+def build_all_players(df_players):
+    """Search list of every player, taken from their most recent gameweek"""
+    latest_gw = df_players.groupby('id')['gameweek'].transform('max')
+    unique_players = df_players[df_players['gameweek'] == latest_gw]
+
+    players_list = [
+        {"id": player_id, "name": name, "team": team, "position": position, "cost": cost, "ownership": ownership}
+        for player_id, name, team, position, cost, ownership in zip(
+            _column_values(unique_players, 'id', int),
+            _column_values(unique_players, 'web_name', str),
+            _column_values(unique_players, 'team_name', str),
+            _column_values(unique_players, 'element_type', int),
+            _column_values(unique_players, 'now_cost', 2),
+            _column_values(unique_players, 'selected_by_percent', 2)
+        )
+    ]
+    players_list.sort(key=lambda x: x['name'])
+    return {
+        "players": players_list,
+        "count": len(players_list)
+    }
+
+
+def build_player_data(df_players, form_gameweeks=FORM_GAMEWEEKS):
+    """
+    Gameweek-by-gameweek data, totals, per-90 and form (last form_gameweeks)
+    for every player, keyed by web_name.
+
+    Every row is converted to its output dict once, in a single pass over the
+    columns; players are then assembled from their row positions (grouped
+    once) instead of scanning the whole table per player.
+    """
+    df_players = df_players.reset_index(drop=True)
+    gameweek_rows = [
+        dict(zip([key for key, _, _ in GAMEWEEK_FIELDS], values))
+        for values in zip(*[_column_values(df_players, column, conversion) for _, column, conversion in GAMEWEEK_FIELDS])
+    ]
+
+    gameweek_numbers = df_players['gameweek'].to_numpy()
+    columns = {
+        column: df_players[column].to_numpy()
+        for column in ['total_points', 'minutes', 'goals', 'assists', 'expected_goals', 'expected_assists',
+                       'expected_goal_involvements', 'expected_points', 'total_shots', 'chances_created']
+    }
+    info = {
+        'team_name': df_players['team_name'].tolist(),
+        'element_type': df_players['element_type'].tolist(),
+        'now_cost': df_players['now_cost'].tolist(),
+        'selected_by_percent': df_players['selected_by_percent'].tolist()
+    }
+
+    player_data = {}
+    # Row positions per player (in table order), in order of first appearance
+    for player_name, positions in df_players.groupby('web_name', sort=False).indices.items():
+        # Same (default quicksort) ordering as sorting the player's rows by gameweek
+        order = positions[np.argsort(gameweek_numbers[positions])]
+        last = order[-1]
+
+        last_gws = order[-form_gameweeks:]
+        form_stats = {
+            "avg_points": round(float(columns['total_points'][last_gws].mean()), 1),
+            "avg_minutes": round(float(columns['minutes'][last_gws].mean()), 0),
+            "games_played": int(len(last_gws))
+        }
+
+        sums = {column: values[order].sum() for column, values in columns.items()}
+        total_minutes = int(sums['minutes'])
+        total_stats = {
+            "games_played": int(len(order)),
+            "total_points": int(sums['total_points']),
+            "total_goals": int(sums['goals']),
+            "total_assists": int(sums['assists']),
+            "total_xG": round(float(sums['expected_goals']), 2),
+            "total_xA": round(float(sums['expected_assists']), 2),
+            "total_xGI": round(float(sums['expected_goal_involvements']), 2),
+            "total_xP": round(float(sums['expected_points']), 2),
+            "total_minutes": total_minutes,
+            "total_shots": int(sums['total_shots']),
+            "total_key_passes": int(sums['chances_created'])
+        }
+
+        minutes = max(total_minutes, 1)
+        per90_stats = {
+            "points_per_90": round((total_stats["total_points"] * 90) / minutes, 2),
+            "goals_per_90": round((total_stats["total_goals"] * 90) / minutes, 2),
+            "assists_per_90": round((total_stats["total_assists"] * 90) / minutes, 2),
+            "xG_per_90": round((total_stats["total_xG"] * 90) / minutes, 2),
+            "xA_per_90": round((total_stats["total_xA"] * 90) / minutes, 2),
+            "xGI_per_90": round((total_stats["total_xGI"] * 90) / minutes, 2),
+            "shots_per_90": round((total_stats["total_shots"] * 90) / minutes, 2),
+            "key_passes_per_90": round((total_stats["total_key_passes"] * 90) / minutes, 2)
+        }
+
+        player_data[player_name] = {
+            "player_name": str(player_name),
+            "team": str(info['team_name'][last]),
+            "position": int(info['element_type'][last]),
+            "web_name": str(player_name),
+            "cost": round(float(info['now_cost'][last]), 2),
+            "ownership": round(float(info['selected_by_percent'][last]), 2),
+            "form": form_stats,
+            "total_stats": total_stats,
+            "per90_stats": per90_stats,
+            "gameweeks": [gameweek_rows[position] for position in order]
+        }
+
+    return player_data
+
+
+def build_player_index(player_data, df_players):
+    """
+    Serialize every player record on its own line and index the byte ranges
+    by web_name, normalized name and player id, so the API can read single
+    players without loading player_data.json.
+
+    Returns (records bytes, index dict).
+    """
+    ids_by_name = df_players.groupby('web_name', sort=False)['id'].unique()
+
+    lines = []
+    entries = []
+    offset = 0
+    for name, record in player_data.items():
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        entries.append({
+            'name': name,
+            'key': normalize_name(name),
+            'ids': [int(player_id) for player_id in ids_by_name[name]],
+            'offset': offset,
+            'length': len(line)
+        })
+        lines.append(line)
+        offset += len(line) + 1
+
+    return b'\n'.join(lines) + b'\n', {'count': len(entries), 'players': entries}
@@ -0,0 +1,324 @@
+# pipeline/projections.py
+# Points distributions of the current players over the upcoming gameweeks,
+# from a Monte Carlo simulation of their fixtures. Draws are simulated in
+# numpy batches (player fixtures × draws) and folded into running sums and
+# per-player histograms of the horizon total, so memory is bounded by the
+# chunk size, not by the number of draws.
+import numpy as np
+from utils.fixture_matrix import METRICS
+from pipeline.planner import current_players, fixture_multiplier, matrix_team_rows
+
+PLAYER_PROJECTIONS_FILE = 'projections/player_projections.json'
+
+# Defaults of the run parameters (see pipeline.runner.DEFAULT_PARAMS)
+PROJECTION_GAMEWEEKS = 6
+PROJECTION_DRAWS = 20000
+PROJECTION_SEED = 2025
+
+# Simulated values per batch (fixture rows × draws); bounds the memory used
+CHUNK_CELLS = 500_000
+
+# FPL scoring by element_type (GK, DEF, MID, FWD)
+APPEARANCE_POINTS = 2
+GOAL_POINTS = {1: 10, 2: 6, 3: 5, 4: 4}
+ASSIST_POINTS = 3
+CLEAN_SHEET_POINTS = {1: 4, 2: 4, 3: 1, 4: 0}
+# Goalkeepers and defenders lose a point per CONCEDED_PER_POINT goals conceded
+CONCEDED_PER_POINT = 2
+CONCEDED_TYPES = (1, 2)
+
+# A gameweek score of at least HAUL_POINTS is a haul, at most BLANK_POINTS a blank
+HAUL_POINTS = 10
+BLANK_POINTS = 2
+
+# Clean sheet probabilities are kept inside this range (a rate of 0 or 1
+# from a few games is not a certainty)
+CLEAN_SHEET_BOUNDS = (0.02, 0.9)
+
+PERCENTILES = (10, 50, 90)
+
+# Resolution of the simulation's uniform draws (16 bits); Poisson counts
+# are truncated where the remaining probability is below 1 / UNIFORM_LEVELS
+UNIFORM_LEVELS = 1 << 16
+
+
+def _by_type(points):
+    """Scoring table as an array indexed by element_type"""
+    table = np.zeros(max(points) + 1, dtype=int)
+    table[list(points)] = list(points.values())
+    return table
+
+
+def player_rates(players):
+    """
+    Per-fixture event rates of each player, from their season:
+    - play: probability of playing (share of the available minutes played)
+    - goals, assists: xG and xA per 90, the Poisson means when playing
+    - conceded: Poisson mean of their team's goals conceded, chosen so the
+      probability of conceding none equals their xCS per game
+    """
+    minutes = players['season_minutes'].to_numpy(dtype=float)
+    games = players['games_played'].to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        per_90 = np.where(minutes > 0, 90 / minutes, 0.0)
+        clean_sheet = np.where(games > 0, players['season_xCS'].to_numpy(dtype=float) / games, 0.0)
+    return {
+        'play': np.clip(np.nan_to_num(minutes / np.maximum(games, 1) / 90), 0.0, 1.0),
+        'goals': np.nan_to_num(players['season_xG'].to_numpy(dtype=float) * per_90),
+        'assists': np.nan_to_num(players['season_xA'].to_numpy(dtype=float) * per_90),
+        'conceded': -np.log(np.clip(np.nan_to_num(clean_sheet), *CLEAN_SHEET_BOUNDS))
+    }
+
+
+def fixture_rows(players, matrix, team_rows):
+    """
+    One row per (player, fixture) in gameweek order, grouped by player:
+    (player index, gameweek column, attack multiplier, defense multiplier).
+    A fixture's FDR scales the player's goal and assist means (attacking
+    FDR) and divides the team's goals conceded mean (defensive FDR).
+    """
+    rows = players['team_name'].map(team_rows)
+    team = rows.fillna(0).astype(int).to_numpy()
+    sequences = matrix.sequences[team] if len(team) else np.zeros((0, 0), dtype=int)
+    present = (sequences >= 0) & rows.notna().to_numpy()[:, None]
+    player, slot = np.nonzero(present)
+    sides = sequences[player, slot]
+    column = matrix.gameweek[sides] - matrix.gameweeks[0] if len(sides) else np.zeros(0, dtype=int)
+    multipliers = fixture_multiplier(matrix.fdr[sides])
+    return player, column, multipliers[:, METRICS.index('attack')], multipliers[:, METRICS.index('defense')]
+
+
+def _uniform16(bit_generator, shape):
+    """
+    Uniform integers in [0, UNIFORM_LEVELS), four per 64-bit word of the
+    generator: 16 bits of resolution is plenty for point probabilities and
+    several times cheaper than floating point uniforms
+    """
+    count = int(np.prod(shape))
+    words = bit_generator.random_raw(-(-count // 4))
+    return words.view(np.uint16)[:count].reshape(shape)
+
+
+class _PoissonSampler:
+    """
+    Poisson draws for a fixed vector of means (one row per mean), by
+    inverting each row's cumulative probabilities against 16-bit uniforms
+    (count = number of k with u >= P(X <= k)). Rows are held sorted by
+    mean, largest first, so the pass for count k only touches the prefix
+    of rows for which P(X > k) is still above the uniforms' resolution.
+    """
+
+    def __init__(self, means):
+        means = np.asarray(means, dtype=float)
+        self.order = np.argsort(-means, kind='stable')
+        self.restore = np.argsort(self.order)
+        means = means[self.order]
+        largest = means[0] if len(means) else 0.0
+        probability, cumulative, depth = np.exp(-largest), np.exp(-largest), 1
+        while (1 - cumulative) * UNIFORM_LEVELS >= 1:
+            probability *= largest / depth
+            cumulative += probability
+            depth += 1
+        k = np.arange(depth)
+        log_factorial = np.cumsum(np.log(np.maximum(k, 1)))
+        log_probability = k * np.log(np.maximum(means, 1e-300)[:, None]) - means[:, None] - log_factorial
+        thresholds = np.round(np.cumsum(np.exp(log_probability), axis=1) * UNIFORM_LEVELS)
+        # Smaller means have larger cumulative probabilities, so the rows still
+        # in play at each k are a prefix
+        self.active = (thresholds < UNIFORM_LEVELS).sum(axis=0)
+        self.thresholds = np.minimum(thresholds, UNIFORM_LEVELS - 1).astype(np.uint16)
+
+    def sample(self, bit_generator, size):
+        """int8 draws, rows × size"""
+        uniform = _uniform16(bit_generator, (len(self.order), size))
+        counts = np.zeros((len(self.order), size), dtype=np.int8)
+        for k, rows in enumerate(self.active):
+            if rows == 0:
+                break
+            counts[:rows] += uniform[:rows] >= self.thresholds[:rows, k:k + 1]
+        return counts[self.restore]
+
+
+class _TotalHistogram:
+    """
+    Counts of each player's horizon total over the draws (totals are small
+    integers, so percentiles are read off the counts exactly instead of
+    keeping every draw). The value range grows as new totals appear.
+    """
+
+    def __init__(self, player_count):
+        self.low = 0
+        self.counts = np.zeros((player_count, 0), dtype=np.int64)
+
+    def add(self, totals):
+        """Fold in a players × draws block of totals"""
+        if totals.size == 0:
+            return
+        low, high = int(totals.min()), int(totals.max())
+        span = self.counts.shape[1]
+        if not span:
+            self.low, self.counts = low, np.zeros((len(self.counts), high - low + 1), dtype=np.int64)
+        elif low < self.low or high >= self.low + span:
+            new_low = min(low, self.low)
+            before, after = self.low - new_low, max(high - self.low - span + 1, 0)
+            self.counts = np.pad(self.counts, ((0, 0), (before, after)))
+            self.low = new_low
+        span = self.counts.shape[1]
+        rows = np.repeat(np.arange(len(self.counts)), totals.shape[1])
+        index = rows * span + (totals.ravel().astype(np.int64) - self.low)
+        self.counts += np.bincount(index, minlength=self.counts.size).reshape(self.counts.shape)
+
+    def summary(self, draws):
+        """Per player mean, std and PERCENTILES (as np.percentile's linear interpolation)"""
+        player_count = len(self.counts)
+        if not draws or not self.counts.shape[1]:
+            return np.zeros(player_count), np.zeros(player_count), np.zeros((player_count, len(PERCENTILES)))
+        values = np.arange(self.low, self.low + self.counts.shape[1], dtype=float)
+        mean = self.counts @ values / draws
+        std = np.sqrt(np.maximum(self.counts @ values ** 2 / draws - mean ** 2, 0))
+        cumulative = self.counts.cumsum(axis=1)
+
+        def sorted_value(position):
+            # Value at `position` of each player's sorted draws
+            return self.low + (cumulative <= position).sum(axis=1)
+
+        percentiles = []
+        for percentile in PERCENTILES:
+            position = (draws - 1) * percentile / 100
+            below = int(np.floor(position))
+            lower, upper = sorted_value(below), sorted_value(min(below + 1, draws - 1))
+            percentiles.append(lower + (position - below) * (upper - lower))
+        return mean, std, np.column_stack(percentiles)
+
+
+def simulate_points(rates, element_type, player, column, attack, defense, player_count, gameweek_count,
+                    draws, seed, chunk_cells=CHUNK_CELLS):
+    """
+    Simulate `draws` seasons of the horizon and summarize each player's
+    gameweek and total points. Draws are generated `chunk_cells //
+    fixture rows` at a time from one seeded generator, so the same inputs
+    and seed give the same result.
+
+    Returns a dict of arrays: per (player, gameweek) mean, std, p_haul and
+    p_blank; per player total mean, std, percentiles and p_any_haul.
+    """
+    bit_generator = np.random.default_rng(seed).bit_generator
+    row_count = len(player)
+    fixture_type = element_type[player]
+    play = np.round(rates['play'][player] * UNIFORM_LEVELS).astype(np.int32)[:, None]
+    goals = _PoissonSampler(rates['goals'][player] * attack)
+    assists = _PoissonSampler(rates['assists'][player] * attack)
+    goal_points = _by_type(GOAL_POINTS).astype(np.int16)[fixture_type][:, None]
+    # Clean sheets and goals conceded only matter for some positions
+    clean_sheet_points = _by_type(CLEAN_SHEET_POINTS).astype(np.int16)[fixture_type]
+    defending = np.flatnonzero(clean_sheet_points > 0)
+    clean_sheet_points = clean_sheet_points[defending][:, None]
+    goals_conceded = _PoissonSampler((rates['conceded'][player] / defense)[defending])
+    concedes = np.isin(fixture_type[defending], CONCEDED_TYPES)[:, None].astype(np.int16)
+
+    # Output cell of every row; a double gameweek's second fixture is added
+    # in a second pass, so every pass writes each cell at most once
+    cells = player * gameweek_count + column
+    rank = np.zeros(row_count, dtype=int)
+    if row_count:
+        same_cell = np.r_[False, cells[1:] == cells[:-1]]
+        group_start = np.maximum.accumulate(np.where(same_cell, 0, np.arange(row_count)))
+        rank = np.arange(row_count) - group_start
+    passes = [np.flatnonzero(rank == r) for r in range(rank.max() + 1 if row_count else 0)]
+
+    cell_count = player_count * gameweek_count
+    point_sum = np.zeros(cell_count)
+    point_squares = np.zeros(cell_count)
+    hauls = np.zeros(cell_count)
+    blanks = np.zeros(cell_count)
+    totals = _TotalHistogram(player_count)
+    any_haul = np.zeros(player_count)
+
+    chunk = max(1, chunk_cells // max(row_count, 1))
+    for first in range(0, draws, chunk):
+        size = min(chunk, draws - first)
+        plays = _uniform16(bit_generator, (row_count, size)) < play
+        points = goal_points * goals.sample(bit_generator, size)
+        points += ASSIST_POINTS * assists.sample(bit_generator, size)
+        if len(defending):
+            conceded = goals_conceded.sample(bit_generator, size)
+            points[defending] += clean_sheet_points * (conceded == 0) - concedes * (conceded // CONCEDED_PER_POINT)
+        points += APPEARANCE_POINTS
+        points *= plays
+
+        gameweek_points = np.zeros((cell_count, size), dtype=np.int16)
+        for rows in passes:
+            gameweek_points[cells[rows]] += points[rows]
+        point_sum += gameweek_points.sum(axis=1)
+        point_squares += np.square(gameweek_points, dtype=np.float32).sum(axis=1)
+        haul = gameweek_points >= HAUL_POINTS
+        hauls += haul.sum(axis=1)
+        blanks += (gameweek_points <= BLANK_POINTS).sum(axis=1)
+        totals.add(gameweek_points.reshape(player_count, gameweek_count, size).sum(axis=1))
+        any_haul += haul.reshape(player_count, gameweek_count, size).any(axis=1).sum(axis=1)
+
+    shape = (player_count, gameweek_count)
+    mean = point_sum / draws
+    total_mean, total_std, total_percentiles = totals.summary(draws)
+    return {
+        'mean': mean.reshape(shape),
+        'std': np.sqrt(np.maximum(point_squares / draws - mean ** 2, 0)).reshape(shape),
+        'p_haul': (hauls / draws).reshape(shape),
+        'p_blank': (blanks / draws).reshape(shape),
+        'total_mean': total_mean,
+        'total_std': total_std,
+        'total_percentiles': total_percentiles,
+        'p_any_haul': any_haul / draws
+    }
+
+
+def build_player_projections(season_stats, matrix, team_mapping, gameweeks=PROJECTION_GAMEWEEKS,
+                             draws=PROJECTION_DRAWS, seed=PROJECTION_SEED):
+    """
+    Simulated points of every current player (see current_players) over the
+    next `gameweeks` gameweeks of the fixture matrix: expected points, spread
+    and haul/blank probabilities per gameweek and over the whole horizon.
+
+    The model is deliberately simple: a player plays a fixture with their
+    share of minutes and then scores appearance, goal, assist, clean sheet
+    and goals conceded points; bonus and defensive contribution points are
+    not simulated.
+    """
+    players = current_players(season_stats).sort_values('id', kind='stable')
+    horizon = matrix.gameweeks[:gameweeks]
+    if len(horizon):
+        matrix = matrix.between(int(horizon[0]), int(horizon[-1]))
+
+    element_type = players['element_type'].to_numpy(dtype=int)
+    player, column, attack, defense = fixture_rows(players, matrix, matrix_team_rows(matrix, team_mapping))
+    summary = simulate_points(player_rates(players), element_type, player, column, attack, defense,
+                              len(players), len(horizon), draws, seed)
+
+    records = []
+    for i, record in enumerate(players.to_dict(orient='records')):
+        percentiles = np.round(summary['total_percentiles'][i], 1).tolist()
+        records.append({
+            'id': int(record['id']),
+            'web_name': record['web_name'],
+            'team': record['team_name'],
+            'team_short': record['team_name_short'],
+            'position': record['position_name'],
+            'element_type': int(record['element_type']),
+            'now_cost': float(record['now_cost']),
+            'expected_points': round(float(summary['total_mean'][i]), 2),
+            'std': round(float(summary['total_std'][i]), 2),
+            **{f'p{percentile}': value for percentile, value in zip(PERCENTILES, percentiles)},
+            'p_any_haul': round(float(summary['p_any_haul'][i]), 4),
+            'gameweek_expected_points': np.round(summary['mean'][i], 2).tolist(),
+            'gameweek_std': np.round(summary['std'][i], 2).tolist(),
+            'gameweek_p_haul': np.round(summary['p_haul'][i], 4).tolist(),
+            'gameweek_p_blank': np.round(summary['p_blank'][i], 4).tolist()
+        })
+    return {
+        'gameweeks': horizon.tolist(),
+        'draws': draws,
+        'seed': seed,
+        'haul_points': HAUL_POINTS,
+        'blank_points': BLANK_POINTS,
+        'players': records
+    }
@@ -0,0 +1,178 @@
+# pipeline/quick_picks.py
+import numpy as np
+from pipeline.constants import MIN_MINUTES_THRESHOLD
+
+ATTACKER_COLUMNS = [
+    'web_name', 'position_name', 'now_cost', 'goals_per_game', 'assists_per_game',
+    'xg_per_game', 'xa_per_game', 'shots_per_game', 'key_passes_per_game', 'SoT_per_game',
+    'points_per_game', 'points_per_million', 'consistency_score', 'selected_by_percent',
+    'team_name_short', 'form', 'attacker_score'
+]
+
+DEFENDER_COLUMNS = [
+    'web_name', 'position_name', 'now_cost', 'clean_sheet_rate', 'xcs_per_game',
+    'goals_per_game', 'assists_per_game', 'goals_conceded_per_game', 'def_contrib_per_game',
+    'points_per_game', 'points_per_million', 'consistency_score', 'selected_by_percent',
+    'team_name_short', 'form', 'defender_score'
+]
+
+# Defaults for columns that may be missing from season_stats
+DEFAULT_COLUMNS = {
+    'season_xG': 0.0, 'season_xGC': 0.0, 'season_CS': 0.0, 'season_xCS': 0.0,
+    'season_points': 0.0, 'season_goals': 0.0, 'season_assists': 0.0,
+    'season_xA': 0.0, 'season_shots': 0.0, 'season_SoT': 0.0, 'season_SiB': 0.0,
+    'season_minutes': 0.0, 'now_cost': 5.0, 'selected_by_percent': 0.0, 'form': 0.0
+}
+
+
+def score_matchup_players(season_stats, matchup_type, min_minutes=MIN_MINUTES_THRESHOLD):
+    """
+    Score every eligible player (at least min_minutes season minutes) of
+    every team for a matchup type in one pass.
+
+    'weak_defense' scores forwards/midfielders by attacker_score,
+    'weak_attack' scores defenders/goalkeepers by defender_score.
+    Returns (scored players, sort columns, display columns).
+    """
+    team_players = season_stats.copy()
+    for col, val in DEFAULT_COLUMNS.items():
+        if col not in team_players.columns:
+            team_players[col] = val
+
+    team_players = team_players[team_players['season_minutes'] >= min_minutes].copy()
+
+    # Use minutes played / 90 instead of games_played for accurate per-game metrics
+    team_players['games_equivalent'] = team_players['season_minutes'] / 90
+    team_players['points_per_game'] = team_players['season_points'] / team_players['games_equivalent']
+    team_players['points_per_million'] = team_players['season_points'] / team_players['now_cost'].replace(0, 1)
+
+    # Consistency = avg minutes per appearance (rewards full 90min starters)
+    team_players['consistency_score'] = np.minimum(
+        (team_players['season_minutes'] / team_players['games_played']) / 90,
+        1
+    )
+
+    if matchup_type == 'weak_defense':
+        team_players['xg_per_game'] = team_players['season_xG'] / team_players['games_equivalent']
+        team_players['xa_per_game'] = team_players['season_xA'] / team_players['games_equivalent']
+        team_players['goals_per_game'] = team_players['season_goals'] / team_players['games_equivalent']
+        team_players['assists_per_game'] = team_players['season_assists'] / team_players['games_equivalent']
+        team_players['shots_per_game'] = team_players['season_shots'] / team_players['games_equivalent']
+        if 'season_key_passes' in team_players.columns:
+            team_players['key_passes_per_game'] = team_players['season_key_passes'] / team_players['games_equivalent']
+        else:
+            team_players['key_passes_per_game'] = 0.0
+        team_players['SoT_per_game'] = team_players['season_SoT'] / team_players['games_equivalent']
+        team_players['SiB_per_game'] = team_players['season_SiB'] / team_players['games_equivalent']
+        position_filter = team_players['position_name'].isin(['Forward', 'Midfielder'])
+
+        # 60% base stats (aligned with attack ranking weights) + 25% form + 15% consistency
+        team_players['attacker_score'] = (
+            0.20 * team_players['xg_per_game'] +
+            0.30 * team_players['goals_per_game'] +
+            0.15 * team_players['xa_per_game'] +
+            0.15 * team_players['assists_per_game'] +
+            0.10 * team_players['shots_per_game'] +
+            0.10 * team_players['key_passes_per_game']
+        ) * 0.60 + 0.25 * team_players['form'] + 0.15 * team_players['consistency_score']
+        sort_columns = ['attacker_score', 'points_per_game', 'goals_per_game']
+        display_cols = ATTACKER_COLUMNS
+    elif matchup_type == 'weak_attack':
+        # Clean sheet rate is a per-game stat, so use games_played
+        team_players['clean_sheet_rate'] = team_players['season_CS'] / team_players['games_played']
+        team_players['xcs_per_game'] = team_players['season_xCS'] / team_players['games_equivalent']
+        team_players['xgc_per_game'] = team_players['season_xGC'] / team_players['games_equivalent']
+        team_players['goals_conceded_per_game'] = team_players['season_GC'] / team_players['games_equivalent']
+        if 'season_defensive_contribution' in team_players.columns:
+            team_players['def_contrib_per_game'] = team_players['season_defensive_contribution'] / team_players['games_equivalent']
+        else:
+            team_players['def_contrib_per_game'] = 0.0
+
+        # Attacking stats capture attacking wing-backs
+        team_players['goals_per_game'] = team_players['season_goals'] / team_players['games_equivalent']
+        team_players['assists_per_game'] = team_players['season_assists'] / team_players['games_equivalent']
+        team_players['xg_per_game'] = team_players['season_xG'] / team_players['games_equivalent']
+        team_players['xa_per_game'] = team_players['season_xA'] / team_players['games_equivalent']
+        position_filter = team_players['position_name'].isin(['Defender', 'Goalkeeper'])
+
+        # DEFENSIVE: 25% CS, 20% xCS, 20% Def Contrib, 15% GC, 10% xGC
+        defensive_component = (
+            0.25 * team_players['clean_sheet_rate'] +
+            0.20 * team_players['xcs_per_game'] +
+            0.20 * _team_relative(team_players, 'def_contrib_per_game') +
+            0.15 / (team_players['goals_conceded_per_game'] + 0.1) +
+            0.10 / (team_players['xgc_per_game'] + 0.1)
+        )
+        # ATTACKING: goals, assists, xG, xA for attacking defenders
+        attacking_component = (
+            0.40 * team_players['goals_per_game'] +
+            0.35 * team_players['assists_per_game'] +
+            0.15 * team_players['xg_per_game'] +
+            0.10 * team_players['xa_per_game']
+        )
+        # 50% defensive + 20% attacking + 20% form + 10% consistency
+        team_players['defender_score'] = (
+            0.50 * defensive_component +
+            0.20 * attacking_component +
+            0.20 * team_players['form'] +
+            0.10 * team_players['consistency_score']
+        )
+        sort_columns = ['defender_score', 'points_per_game']
+        display_cols = DEFENDER_COLUMNS
+    else:
+        raise ValueError(f"Unknown matchup type: {matchup_type}")
+
+    return team_players[position_filter], sort_columns, display_cols
+
+
+def _team_relative(team_players, column):
+    """column / its max within the player's team (0 where the team max is not positive)"""
+    team_max = team_players.groupby('team_name')[column].transform('max')
+    return (team_players[column] / team_max).where(team_max > 0, 0.0)
+
+
+def top_players_by_team(season_stats, matchup_type, n=4, min_minutes=MIN_MINUTES_THRESHOLD):
+    """Top n players of every team for a matchup type, as {team: DataFrame}"""
+    scored, sort_columns, display_cols = score_matchup_players(season_stats, matchup_type, min_minutes)
+    # Multi-column sorts are stable, so ties keep season_stats order within a team
+    ranked = scored.sort_values(by=sort_columns, ascending=False)
+    top = ranked.groupby('team_name', sort=False).head(n)
+    return {team: players[display_cols].round(3) for team, players in top.groupby('team_name', sort=False)}
+
+
+def build_quick_picks(season_stats, team_rankings, min_minutes=MIN_MINUTES_THRESHOLD):
+    """
+    Attacking and defensive picks for every team, ordered by attack/defense rank.
+    Returns a dict keyed by output file name.
+    """
+    attackers_by_team = top_players_by_team(season_stats, 'weak_defense', 4, min_minutes)
+    defenders_by_team = top_players_by_team(season_stats, 'weak_attack', 4, min_minutes)
+
+    attacking_picks = []
+    for team, data in team_rankings.sort_values('attack_rank').head(20).iterrows():
+        attackers = attackers_by_team.get(team)
+        if attackers is not None:
+            attacking_picks.append({
+                'team': team,
+                'attack_rank': int(data['attack_rank']),
+                'attack_strength': data['attack_strength'],
+                'overall_strength': data['overall_strength'],
+                'players': attackers.to_dict(orient='records')
+            })
+
+    defensive_picks = []
+    for team, data in team_rankings.sort_values('defense_rank').head(20).iterrows():
+        defenders = defenders_by_team.get(team)
+        if defenders is not None:
+            defensive_picks.append({
+                'team': team,
+                'defense_rank': int(data['defense_rank']),
+                'defense_strength': data['defense_strength'],
+                'overall_strength': data['overall_strength'],
+                'players': defenders.to_dict(orient='records')
+            })
+
+    return {
+        'attackingpicks': attacking_picks,
+        'defensivepicks': defensive_picks
+    }
@@ -0,0 +1,299 @@
+# pipeline/rankings.py
+import numpy as np
+import pandas as pd
+
+DEFENSIVE_POSITIONS = ['Defender', 'Goalkeeper']
+
+# Weight of each per-game stat in a team's attack strength
+ATTACK_STRENGTH_WEIGHTS = {'xG': 0.20, 'goals': 0.30, 'xA': 0.15, 'assists': 0.15, 'shots': 0.10, 'key_passes': 0.10}
+
+# Home/away strength works on per-team, per-venue, per-gameweek totals
+TEAM_GAMEWEEK_KEYS = ['team_name', 'was_home', 'gameweek']
+TEAM_ATTACK_COLUMNS = ['expected_goals', 'goals', 'expected_assists', 'assists', 'total_shots', 'chances_created']
+TEAM_GAMEWEEK_COMBINE_RULES = {
+    **{column: 'sum' for column in TEAM_ATTACK_COLUMNS},
+    'clean_sheet': 'max',
+    'goals_conceded': 'max',
+    'tackles': 'sum',
+    'recoveries': 'sum',
+    'expected_clean_sheet': 'sum',
+    'defender_rows': 'sum'
+}
+
+
+def _normalize(series):
+    return (series - series.min()) / (series.max() - series.min()) if series.max() > series.min() else series
+
+
+def create_comprehensive_team_strength_rankings(season_data, attack_weights=ATTACK_STRENGTH_WEIGHTS):
+    """
+    Rank teams by attack, defense and overall strength.
+
+    Attack blends per-game goals/xG/assists/xA/shots/key passes (weighted by
+    attack_weights, see ATTACK_STRENGTH_WEIGHTS); defense uses
+    the team-level CS rate and goals conceded from defenders and goalkeepers.
+    Overall is 60% normalized attack + 40% normalized defense.
+    """
+    attacking_stats = season_data.groupby('team_name').agg({
+        'season_goals': 'sum', 'season_xG': 'sum', 'season_assists': 'sum',
+        'season_xA': 'sum', 'season_shots': 'sum', 'season_key_passes': 'sum',
+        'games_played': 'mean'
+    }).copy()
+
+    for col in ['goals', 'xG', 'assists', 'xA', 'shots', 'key_passes']:
+        attacking_stats[f'{col}_pg'] = attacking_stats[f'season_{col}'] / attacking_stats['games_played']
+
+    attacking_stats['attack_strength'] = sum(
+        attacking_stats[f'{col}_pg'] * weight for col, weight in attack_weights.items()
+    )
+
+    defensive_players = season_data[season_data['element_type'].isin([1, 2])]
+    defensive_stats = defensive_players.groupby('team_name').agg({
+        'season_CS': 'max', 'season_GC': 'max', 'games_played': 'mean'
+    }).copy()
+
+    defensive_stats['CS_rate'] = defensive_stats['season_CS'] / defensive_stats['games_played']
+    defensive_stats['GC_pg'] = defensive_stats['season_GC'] / defensive_stats['games_played']
+    defensive_stats['defense_strength'] = (defensive_stats['CS_rate'] * 0.6 + (1 / (defensive_stats['GC_pg'] + 0.1)) * 0.4)
+
+    team_rankings = attacking_stats[['attack_strength']].join(
+        defensive_stats[['defense_strength']], how='outer'
+    )
+    team_rankings = team_rankings.fillna(team_rankings.median())
+
+    # Normalization prevents Attack from overpowering Defense in the overall score
+    team_rankings['att_norm'] = _normalize(team_rankings['attack_strength'])
+    team_rankings['def_norm'] = _normalize(team_rankings['defense_strength'])
+    team_rankings['overall_strength_scaled'] = (team_rankings['att_norm'] * 0.6) + (team_rankings['def_norm'] * 0.4)
+
+    team_rankings['attack_rank'] = team_rankings['attack_strength'].rank(ascending=False, method='dense').astype(int)
+    team_rankings['defense_rank'] = team_rankings['defense_strength'].rank(ascending=False, method='dense').astype(int)
+    team_rankings['overall_rank'] = team_rankings['overall_strength_scaled'].rank(ascending=False, method='dense').astype(int)
+
+    team_rankings = team_rankings.rename(columns={'overall_strength_scaled': 'overall_strength'})
+    return team_rankings[['overall_rank', 'attack_rank', 'defense_rank', 'overall_strength', 'attack_strength', 'defense_strength']]
+
+
+def team_export_stats(season_stats, teams):
+    """
+    Per-team stats attached to every ranking record, for all teams in one
+    grouped pass. Returns a DataFrame indexed by team (teams without players
+    get zeros).
+    """
+    by_team = season_stats.groupby('team_name', sort=False)
+    max_games = by_team['games_played'].max()
+    stats = pd.DataFrame({
+        'team_short': by_team['team_name_short'].first(),
+        'goals_per_game': by_team['season_goals'].sum() / max_games,
+        'expected_goals_per_game': by_team['season_xG'].sum() / max_games
+    })
+
+    # All defenders share the same team-level CS/GC values, so max() is the team value
+    by_team = season_stats[season_stats['position_name'].isin(DEFENSIVE_POSITIONS)].groupby('team_name', sort=False)
+    def_games = by_team['games_played'].max()
+    stats['max_goals_conceded'] = by_team['season_GC'].max()
+    stats['max_cs_rate'] = by_team['season_CS'].max() / def_games
+    stats['mean_goals_conceded'] = by_team['season_GC'].mean()
+    stats['mean_cs_rate'] = by_team['season_CS'].mean() / def_games
+    stats['defensive_contribution'] = by_team['season_tackles'].mean()
+
+    stats = stats.reindex(teams)
+    stats['team_short'] = stats['team_short'].fillna(pd.Series(teams, index=teams).str[:3].str.upper())
+    return stats.fillna(0)
+
+
+def build_ranking_exports(team_rankings, season_stats):
+    """
+    Build the attack, defense and overall ranking records.
+    Returns a dict keyed by output file name.
+    """
+    team_stats = team_export_stats(season_stats, team_rankings.index).to_dict(orient='index')
+
+    attack_rankings = []
+    for team, ranks in team_rankings.sort_values('attack_rank').iterrows():
+        stats = team_stats[team]
+        attack_rankings.append({
+            'team': team,
+            'team_short': stats['team_short'],
+            'attack_rank': int(ranks['attack_rank']),
+            'overall_rank': int(ranks['overall_rank']),
+            'overall_strength': round(float(ranks['overall_strength']), 3),
+            'attack_strength': round(float(ranks['attack_strength']), 3),
+            'goals_per_game': round(stats['goals_per_game'], 2),
+            'expected_goals_per_game': round(stats['expected_goals_per_game'], 2),
+            'goals_conceded_per_game': round(stats['max_goals_conceded'], 2),
+            'clean_sheet_rate': round(stats['max_cs_rate'], 2),
+            'defensive_contribution': round(stats['defensive_contribution'], 0)
+        })
+
+    defense_rankings = []
+    for team, ranks in team_rankings.sort_values('defense_rank').iterrows():
+        stats = team_stats[team]
+        defense_rankings.append({
+            'team': team,
+            'team_short': stats['team_short'],
+            'defense_rank': int(ranks['defense_rank']),
+            'overall_rank': int(ranks['overall_rank']),
+            'overall_strength': round(float(ranks['overall_strength']), 3),
+            'defense_strength': round(float(ranks['defense_strength']), 3),
+            'goals_per_game': round(stats['goals_per_game'], 2),
+            'expected_goals_per_game': round(stats['expected_goals_per_game'], 2),
+            'goals_conceded_per_game': round(stats['max_goals_conceded'], 2),
+            'clean_sheet_rate': round(stats['max_cs_rate'], 2),
+            'defensive_contribution': round(stats['defensive_contribution'], 0)
+        })
+
+    overall_rankings = []
+    for team, ranks in team_rankings.sort_values('overall_rank').iterrows():
+        stats = team_stats[team]
+        overall_rankings.append({
+            'team': team,
+            'team_short': stats['team_short'],
+            'overall_rank': int(ranks['overall_rank']),
+            'attack_rank': int(ranks['attack_rank']),
+            'defense_rank': int(ranks['defense_rank']),
+            'overall_strength': round(float(ranks['overall_strength']), 3),
+            'attack_strength': round(float(ranks['attack_strength']), 3),
+            'defense_strength': round(float(ranks['defense_strength']), 3),
+            'goals_per_game': round(stats['goals_per_game'], 2),
+            'expected_goals_per_game': round(stats['expected_goals_per_game'], 2),
+            'goals_conceded_per_game': round(stats['mean_goals_conceded'], 2),
+            'clean_sheet_rate': round(stats['mean_cs_rate'], 2),
+            'defensive_contribution': round(stats['defensive_contribution'], 0)
+        })
+
+    return {
+        'attack_rankings': attack_rankings,
+        'defense_rankings': defense_rankings,
+        'overall_rankings': overall_rankings
+    }
+
+
+def build_team_gameweek_totals(df):
+    """
+    Collapse gameweek rows into one row per (team, venue, gameweek).
+
+    Attacking stats are summed over all players; defensive stats come from
+    defenders and goalkeepers only. A team only gets 1 CS per game, so CS and
+    goals conceded take the max over players rather than the sum.
+    """
+    attack = df.groupby(TEAM_GAMEWEEK_KEYS)[TEAM_ATTACK_COLUMNS].sum()
+    defenders = df[df['element_type'].isin([1, 2])]
+    defense = defenders.groupby(TEAM_GAMEWEEK_KEYS).agg(
+        clean_sheet=('clean_sheet', 'max'),
+        goals_conceded=('goals_conceded', 'max'),
+        tackles=('tackles', 'sum'),
+        recoveries=('recoveries', 'sum'),
+        expected_clean_sheet=('expected_clean_sheet', 'sum'),
+        defender_rows=('element_type', 'size')
+    )
+    return attack.join(defense, how='left')
+
+
+def combine_team_gameweek_totals(totals, new_totals):
+    """Merge two sets of team gameweek totals (e.g. a late-folded player's rows)"""
+    if totals is None or totals.empty:
+        return new_totals
+    if new_totals.empty:
+        return totals
+    combined = pd.concat([totals, new_totals])
+    return combined.groupby(level=TEAM_GAMEWEEK_KEYS).agg(TEAM_GAMEWEEK_COMBINE_RULES)
+
+
+def calculate_home_away_advantage(team_gameweeks, team_rankings):
+    """
+    Calculate actual home/away performance for each team from gameweek data.
+    Returns home advantage factors for adjusting fixture difficulty dynamically.
+
+    Counts unique fixtures (gameweeks), not player rows:
+    1. Separate home and away games for each team
+    2. Calculate attack/defense strength for each context
+    3. Compute advantage factor as (home_strength - away_strength) / away_strength
+    4. Convert to rank adjustment
+
+    Args:
+        team_gameweeks: output of build_team_gameweek_totals
+        team_rankings: output of create_comprehensive_team_strength_rankings
+    """
+    total_teams = len(team_rankings)
+    strengths = venue_strengths(team_gameweeks)
+    venues = strengths.unstack('was_home').reindex(
+        index=team_rankings.index,
+        columns=pd.MultiIndex.from_product([strengths.columns, [True, False]])
+    )
+    home_fixtures = venues[('fixtures', True)].fillna(0).astype(int)
+    away_fixtures = venues[('fixtures', False)].fillna(0).astype(int)
+    home_attack_strength = venues[('attack_strength', True)]
+    away_attack_strength = venues[('attack_strength', False)]
+    home_defense_strength = venues[('defense_strength', True)]
+    away_defense_strength = venues[('defense_strength', False)]
+
+    # Positive = better at home, Negative = better away
+    attack_advantage_factor = ((home_attack_strength - away_attack_strength) / away_attack_strength).where(away_attack_strength > 0, 0.0)
+    defense_advantage_factor = ((home_defense_strength - away_defense_strength) / away_defense_strength).where(away_defense_strength > 0, 0.0)
+
+    boost_scale = (total_teams / 10) * 0.8
+    home_away = pd.DataFrame({
+        'home_games': home_fixtures,
+        'away_games': away_fixtures,
+        'home_attack_str': home_attack_strength.round(3),
+        'away_attack_str': away_attack_strength.round(3),
+        'home_defense_str': home_defense_strength.round(3),
+        'away_defense_str': away_defense_strength.round(3),
+        'attack_advantage_factor': attack_advantage_factor.round(3),
+        'defense_advantage_factor': defense_advantage_factor.round(3),
+        'attack_rank_boost': (attack_advantage_factor * boost_scale).round(2),
+        'defense_rank_boost': (defense_advantage_factor * boost_scale).round(2),
+        # Teams that perform better away get a boost when playing away
+        'away_attack_rank_boost': (-attack_advantage_factor * boost_scale).round(2),
+        'away_defense_rank_boost': (-defense_advantage_factor * boost_scale).round(2),
+        'data_quality': np.where((home_fixtures >= 5) & (away_fixtures >= 5), 'good', 'limited')
+    })
+
+    # Not enough data - no advantage
+    insufficient = (home_fixtures < 2) | (away_fixtures < 2)
+    strength_columns = [
+        'home_attack_str', 'away_attack_str', 'home_defense_str', 'away_defense_str',
+        'attack_advantage_factor', 'defense_advantage_factor', 'attack_rank_boost', 'defense_rank_boost'
+    ]
+    home_away.loc[insufficient, strength_columns] = 0.0
+    home_away.loc[insufficient, ['away_attack_rank_boost', 'away_defense_rank_boost']] = np.nan
+    home_away.loc[insufficient, 'data_quality'] = 'insufficient'
+    return home_away
+
+
+def venue_strengths(team_gameweeks):
+    """
+    Attack and defense strength per fixture for every (team, venue) in one
+    grouped pass over the team gameweek totals.
+    """
+    by_venue = team_gameweeks.groupby(level=['team_name', 'was_home'])
+    fixtures = by_venue.size()
+    totals = by_venue[TEAM_ATTACK_COLUMNS].sum()
+
+    attack_strength = (
+        (totals['expected_goals'] / fixtures) * 0.25 +
+        (totals['goals'] / fixtures) * 0.20 +
+        (totals['expected_assists'] / fixtures) * 0.20 +
+        (totals['assists'] / fixtures) * 0.15 +
+        (totals['total_shots'] / fixtures) * 0.10 +
+        (totals['chances_created'] / fixtures) * 0.10
+    )
+
+    # Defensive strength per fixture from defenders and goalkeepers
+    defended = team_gameweeks[team_gameweeks['defender_rows'] > 0].groupby(level=['team_name', 'was_home'])
+    cs = defended['clean_sheet'].sum()
+    gc = defended['goals_conceded'].sum()
+    defense_strength = (
+        (cs / fixtures) * 0.35 +
+        (1 / (gc / fixtures + 0.1)) * 0.30 +
+        defended['expected_clean_sheet'].mean() * 0.20 +
+        defended['tackles'].mean() * 0.10 +
+        defended['recoveries'].mean() * 0.05
+    ).reindex(fixtures.index).fillna(0.0)
+
+    return pd.DataFrame({
+        'fixtures': fixtures,
+        'attack_strength': attack_strength,
+        'defense_strength': defense_strength
+    })
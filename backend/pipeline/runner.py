@@ -0,0 +1,571 @@
+# pipeline/runner.py
+import json
+import os
+import tempfile
+import time
+import pandas as pd
+from config.config import Config
+from pipeline.constants import FORM_GAMEWEEKS, MIN_MINUTES_THRESHOLD
+from pipeline.storage import StagedGameweekAppend, read_gameweek_data, stage_gameweek_append
+from pipeline.aggregates import SeasonAggregates, state_path
+from pipeline.insights import build_layout, build_top_performers, build_performance_analysis
+from pipeline.rankings import (
+    ATTACK_STRENGTH_WEIGHTS, create_comprehensive_team_strength_rankings, build_ranking_exports, calculate_home_away_advantage
+)
+from pipeline.quick_picks import build_quick_picks
+from pipeline.fixtures import EnhancedFixtureAnalyzer
+from pipeline.planner import build_player_scores
+from pipeline.player_features import build_player_features
+from pipeline.projections import (
+    PLAYER_PROJECTIONS_FILE, PROJECTION_DRAWS, PROJECTION_GAMEWEEKS, PROJECTION_SEED, build_player_projections
+)
+from pipeline.player_trends import prepare_trend_data, build_all_players, build_player_data, build_player_index
+from pipeline.stage_cache import StageCache, stage_key
+from utils.player_index import PLAYER_INDEX_FILE, PLAYER_RECORDS_FILE
+from utils.squad_planner import PLAYER_SCORES_FILE
+from utils.player_similarity import PLAYER_FEATURES_FILE
+from utils.fixture_store import FIXTURES_FILE, PARTITION_DIR, write_partitions
+from utils.fixture_matrix import FixtureMatrix
+from utils.manifest import write_manifest
+from utils.snapshots import stage_snapshot, publish_snapshot, discard_staging
+
+# Model parameters a run can override (what-if runs, see pipeline.batch);
+# the defaults produce the published data
+DEFAULT_PARAMS = {
+    'form_gameweeks': FORM_GAMEWEEKS,
+    'min_minutes': MIN_MINUTES_THRESHOLD,
+    'attack_weights': ATTACK_STRENGTH_WEIGHTS,
+    'projection_gameweeks': PROJECTION_GAMEWEEKS,
+    'projection_draws': PROJECTION_DRAWS,
+    'projection_seed': PROJECTION_SEED
+}
+
+
+def resolve_params(params=None):
+    """
+    DEFAULT_PARAMS with `params` applied. attack_weights overrides are merged
+    into the default weights, so a variant can change a single weight.
+    Raises:
+        ValueError: for unknown parameters or attack weight names
+    """
+    params = params or {}
+    unknown = [name for name in params if name not in DEFAULT_PARAMS]
+    if unknown:
+        raise ValueError(f"Unknown pipeline parameter(s): {', '.join(unknown)}")
+    weights = params.get('attack_weights') or {}
+    unknown = [name for name in weights if name not in ATTACK_STRENGTH_WEIGHTS]
+    if unknown:
+        raise ValueError(f"Unknown attack weight(s): {', '.join(unknown)}")
+    return {
+        **DEFAULT_PARAMS,
+        **params,
+        'attack_weights': {**ATTACK_STRENGTH_WEIGHTS, **weights}
+    }
+
+
+class PipelineRun:
+    """
+    One pipeline execution. Stages are computed lazily (dependencies first),
+    each at most once, and their wall-clock durations are recorded.
+
+    With a StageCache, a stage whose key (inputs, parameters, code) was seen
+    before is restored instead of computed, without computing its
+    dependencies: computation stages from a pickle, export stages by putting
+    their cached output files back.
+    """
+
+    def __init__(self, csv_path, fixtures_path, output_dir, log=print, on_stage=None, data_dir=None, params=None,
+                 cache=None):
+        self.csv_path = csv_path
+        self.fixtures_path = fixtures_path
+        self.output_dir = output_dir
+        # Where state that outlives a snapshot (running aggregates) is kept
+        self.data_dir = data_dir or output_dir
+        self.log = log
+        self.on_stage = on_stage
+        self.params = resolve_params(params)
+        self.cache = cache
+        self.results = {}
+        self.keys = {}
+        self.cache_report = {'hit': [], 'recomputed': []}
+        self.timings = []
+        self.outputs = []
+
+    def key(self, stage):
+        """
+        Cache key of a stage, or None when it cannot be cached: no cache,
+        a side-effect stage, or a result handed in by the caller (e.g. the
+        running aggregates of an ingest) rather than derived from the files
+        """
+        if stage not in self.keys:
+            if self.cache is None or stage in UNCACHED_STAGES or stage in self.results:
+                self.keys[stage] = None
+            elif stage in SOURCE_STAGES:
+                self.keys[stage] = self.cache.source_key(getattr(self, SOURCE_STAGES[stage]))
+            else:
+                dependency_keys = [self.key(dependency) for dependency in STAGES[stage][0]]
+                params = {name: self.params[name] for name in STAGE_PARAMS.get(stage, ())}
+                self.keys[stage] = None if None in dependency_keys else stage_key(stage, params, dependency_keys)
+        return self.keys[stage]
+
+    def _restore(self, stage, key):
+        """(True, result) if the stage could be restored from the cache"""
+        if stage in SOURCE_STAGES:
+            return False, None
+        if stage in TARGETS:
+            files = self.cache.restore_files(key, self.output_dir, OWNED_DIRS.get(stage))
+            if files is None:
+                return False, None
+            self.outputs.extend(files)
+            return True, None
+        return self.cache.load_result(key)
+
+    def _store(self, stage, key, result, outputs_before):
+        if stage in SOURCE_STAGES:
+            return
+        if stage in TARGETS:
+            self.cache.save_files(key, stage, self.output_dir, self.outputs[outputs_before:])
+        else:
+            self.cache.save_result(key, stage, result)
+
+    def get(self, stage):
+        """Return a stage's result, running it (and its dependencies) if needed"""
+        if stage not in self.results:
+            dependencies, func = STAGES[stage]
+            key = self.key(stage)
+            start = time.perf_counter()
+            hit, result = self._restore(stage, key) if key is not None else (False, None)
+            if not hit:
+                args = [self.get(dependency) for dependency in dependencies]
+                start = time.perf_counter()
+                outputs_before = len(self.outputs)
+                result = func(self, *args)
+            elapsed = time.perf_counter() - start
+            self.results[stage] = result
+            if key is not None and not hit:
+                self._store(stage, key, result, outputs_before)
+
+            timing = {'stage': stage, 'seconds': round(elapsed, 4)}
+            if key is not None and stage not in SOURCE_STAGES:
+                timing['cache'] = 'hit' if hit else 'miss'
+                self.cache_report['hit' if hit else 'recomputed'].append(stage)
+            self.timings.append(timing)
+            self.log(f"⏱️  {stage:<22} {elapsed:8.3f}s{' (cached)' if hit else ''}")
+            if self.on_stage is not None:
+                self.on_stage(timing)
+        return self.results[stage]
+
+    def write_json(self, filename, data):
+        """Write one output file below the output directory"""
+        self.write_bytes(filename, json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8'))
+
+    def write_bytes(self, filename, data):
+        """
+        Write one pre-serialized output file below the output directory.
+        The file is replaced, never rewritten in place: staged snapshots share
+        unchanged files with the published ones through hard links.
+        """
+        filepath = os.path.join(self.output_dir, filename)
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(filepath), prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, filepath)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        self.outputs.append(filename)
+
+
+def stage_cache_dir(data_dir):
+    """Where the stage cache of a data directory is kept (outlives snapshots, like the aggregates)"""
+    return os.path.join(data_dir, 'pipeline_state', 'stage_cache')
+
+
+# --- Computation stages ---
+
+def _raw_data(run):
+    return read_gameweek_data(run.csv_path)
+
+
+def _season_state(run, raw_df):
+    return SeasonAggregates.from_gameweeks(raw_df, run.params['form_gameweeks'])
+
+
+def _season_stats(run, state):
+    return state.season_stats()
+
+
+def _team_rankings(run, season_stats):
+    return create_comprehensive_team_strength_rankings(season_stats, run.params['attack_weights'])
+
+
+def _home_away(run, state, team_rankings):
+    return calculate_home_away_advantage(state.team_gameweeks, team_rankings)
+
+
+def _fixture_template(run):
+    return pd.read_csv(run.fixtures_path)
+
+
+def _fixture_analyzer(run, season_stats, team_rankings, home_away_df, fixtures_df):
+    return EnhancedFixtureAnalyzer(season_stats, team_rankings, fixtures_df, home_away_df=home_away_df)
+
+
+def _fixture_list(run, analyzer):
+    return analyzer.build_fixtures()
+
+
+def _fixture_matrix(run, fixtures):
+    """Teams × gameweeks FDR of the upcoming fixtures (horizon queries for later stages)"""
+    return FixtureMatrix.from_fixtures(fixtures)
+
+
+# --- Export stages (the selectable targets) ---
+
+def _export_aggregates(run, state):
+    state.save(state_path(run.data_dir))
+    run.outputs.append(os.path.relpath(state_path(run.data_dir), run.data_dir))
+
+
+def _export_layout(run, season_stats):
+    run.write_json('layout.json', build_layout(season_stats))
+
+
+def _export_top_performers(run, season_stats):
+    insights = build_top_performers(season_stats)
+    for category, data in insights.items():
+        run.write_json(f'top_performers/{category}.json', data)
+    run.write_json('top_performers/all_insights.json', insights)
+
+
+def _export_performance_analysis(run, season_stats):
+    for category, data in build_performance_analysis(season_stats).items():
+        run.write_json(f'performance_analysis/{category}.json', data)
+
+
+def _export_rankings(run, team_rankings, season_stats):
+    for category, data in build_ranking_exports(team_rankings, season_stats).items():
+        run.write_json(f'rankings/{category}.json', data)
+
+
+def _export_quick_picks(run, season_stats, team_rankings):
+    for category, data in build_quick_picks(season_stats, team_rankings, run.params['min_minutes']).items():
+        run.write_json(f'quick_picks/{category}.json', data)
+
+
+def _export_fixtures(run, analyzer, fixtures):
+    run.write_json(FIXTURES_FILE, fixtures)
+    # Per-gameweek partitions served by the fixture store
+    run.outputs.extend(write_partitions(run.output_dir, fixtures))
+    run.write_json('fixture_analysis/team_fixture_summary.json', analyzer.build_team_summary())
+
+
+def _export_planner(run, season_stats, analyzer, matrix):
+    run.write_json(PLAYER_SCORES_FILE, build_player_scores(season_stats, matrix, analyzer.team_mapping))
+
+
+def _export_projections(run, season_stats, analyzer, matrix):
+    run.write_json(PLAYER_PROJECTIONS_FILE, build_player_projections(
+        season_stats, matrix, analyzer.team_mapping, run.params['projection_gameweeks'],
+        run.params['projection_draws'], run.params['projection_seed']))
+
+
+def _export_player_features(run, season_stats):
+    run.write_json(PLAYER_FEATURES_FILE, build_player_features(season_stats, run.params['min_minutes']))
+
+
+def _export_player_trends(run, raw_df):
+    df_players = prepare_trend_data(raw_df)
+    player_data = build_player_data(df_players, run.params['form_gameweeks'])
+    run.write_json('player_trends/all_players.json', build_all_players(df_players))
+    run.write_json('player_trends/player_data.json', player_data)
+
+    # Records first: the index must never point into an older records file
+    records, index = build_player_index(player_data, df_players)
+    run.write_bytes(PLAYER_RECORDS_FILE, records)
+    run.write_json(PLAYER_INDEX_FILE, index)
+
+
+# stage name -> (dependencies, function)
+STAGES = {
+    'raw_data': ([], _raw_data),
+    'season_state': (['raw_data'], _season_state),
+    'season_stats': (['season_state'], _season_stats),
+    'team_rankings': (['season_stats'], _team_rankings),
+    'home_away': (['season_state', 'team_rankings'], _home_away),
+    'fixture_template': ([], _fixture_template),
+    'fixture_analyzer': (['season_stats', 'team_rankings', 'home_away', 'fixture_template'], _fixture_analyzer),
+    'fixture_list': (['fixture_analyzer'], _fixture_list),
+    'fixture_matrix': (['fixture_list'], _fixture_matrix),
+    'aggregates': (['season_state'], _export_aggregates),
+    'layout': (['season_stats'], _export_layout),
+    'top_performers': (['season_stats'], _export_top_performers),
+    'performance_analysis': (['season_stats'], _export_performance_analysis),
+    'rankings': (['team_rankings', 'season_stats'], _export_rankings),
+    'quick_picks': (['season_stats', 'team_rankings'], _export_quick_picks),
+    'fixtures': (['fixture_analyzer', 'fixture_list'], _export_fixtures),
+    'planner': (['season_stats', 'fixture_analyzer', 'fixture_matrix'], _export_planner),
+    'projections': (['season_stats', 'fixture_analyzer', 'fixture_matrix'], _export_projections),
+    'player_features': (['season_stats'], _export_player_features),
+    'player_trends': (['raw_data'], _export_player_trends),
+}
+
+TARGETS = ['aggregates', 'layout', 'top_performers', 'performance_analysis', 'rankings', 'quick_picks', 'fixtures', 'planner',
+           'projections', 'player_features', 'player_trends']
+
+# Stage cache: the input files behind the source stages, the parameters each
+# stage depends on, stages never cached (side effects outside the outputs) and
+# directories an export stage writes in full (stale files are removed on a hit)
+SOURCE_STAGES = {'raw_data': 'csv_path', 'fixture_template': 'fixtures_path'}
+STAGE_PARAMS = {
+    'season_state': ['form_gameweeks'],
+    'team_rankings': ['attack_weights'],
+    'quick_picks': ['min_minutes'],
+    'projections': ['projection_gameweeks', 'projection_draws', 'projection_seed'],
+    'player_features': ['min_minutes'],
+    'player_trends': ['form_gameweeks'],
+}
+UNCACHED_STAGES = {'aggregates'}
+OWNED_DIRS = {'fixtures': PARTITION_DIR}
+
+# Outputs derived from the gameweek rows; ingest_gameweeks refreshes all of
+# them, so a published snapshot never mixes gameweeks
+INCREMENTAL_TARGETS = ['layout', 'top_performers', 'performance_analysis', 'rankings', 'quick_picks', 'fixtures', 'planner',
+                       'projections', 'player_features', 'player_trends']
+
+
+def pending_ingest_path(data_dir):
+    """Commit record of an ingest whose files are staged but not all in place yet"""
+    return os.path.join(data_dir, 'pipeline_state', 'pending_ingest.json')
+
+
+def _commit_ingest(data_dir, pending):
+    """
+    Move a staged ingest into place: the rows appended to the CSV and its
+    columnar copy, the aggregates, then the snapshot. Steps already done are
+    skipped (or repeated without effect), so an interrupted commit is
+    finished by running it again.
+    """
+    StagedGameweekAppend.from_record(pending['data']).commit()
+    for staged, target in pending['files']:
+        if os.path.exists(staged):
+            os.replace(staged, target)
+    version = None
+    staging = pending['staging']
+    if staging is not None and os.path.isdir(staging):
+        version = publish_snapshot(data_dir, staging, pending['timings'])
+    os.remove(pending_ingest_path(data_dir))
+    return version
+
+
+def finish_pending_ingest(data_dir, log=print):
+    """
+    Complete an ingest interrupted while it was being committed (crash or
+    kill), before anything else reads or writes the data. Returns the
+    snapshot it published, or None.
+    """
+    path = pending_ingest_path(data_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        pending = json.load(f)
+    log(f"♻️  Finishing interrupted ingest of gameweek {', '.join(map(str, pending['gameweeks']))}")
+    return _commit_ingest(data_dir, pending)
+
+
+def run_pipeline(csv_path=None, fixtures_path=None, output_dir=None, targets=None, log=print, season_state=None,
+                 on_stage=None, snapshot=True, params=None, raw_data=None, fixture_template=None, cache=True,
+                 staging=None):
+    """
+    Run the analytics pipeline in-process and write the JSON outputs.
+
+    Args:
+        csv_path: gameweek data CSV (defaults to Config.FPL_DATA_CSV)
+        fixtures_path: fixture template CSV (defaults to Config.FIXTURE_TEMPLATE_CSV)
+        output_dir: where the JSON files are written (defaults to Config.DATA_DIR)
+        targets: output groups to rebuild (defaults to all of TARGETS); only the
+            stages those targets depend on are run
+        log: callable used for progress lines
+        season_state: already computed SeasonAggregates; when given, the
+            season is not re-aggregated from the CSV
+        on_stage: optional callable receiving each {'stage', 'seconds'} timing
+            as soon as the stage finishes (progress reporting)
+        snapshot: write into a new snapshot of output_dir (seeded with the
+            current outputs) and publish it atomically when every target
+            succeeded; False writes the files straight into output_dir
+            (and rewrites its manifest)
+        params: overrides of DEFAULT_PARAMS (form window, quick pick
+            minutes threshold, attack strength weights, projection
+            horizon/draws/seed)
+        raw_data, fixture_template: already loaded gameweek rows / fixture
+            template DataFrames (shared, not modified); when given, the
+            CSVs are not read
+        cache: reuse stage results whose inputs, parameters and code are
+            unchanged (see pipeline.stage_cache); stages depending on
+            season_state/raw_data/fixture_template handed in are recomputed
+        staging: a snapshot of output_dir already staged by the caller (see
+            utils.snapshots.stage_snapshot) to write into instead; the caller
+            publishes or discards it, so several runs can be published as
+            one version
+    Returns:
+        Report dict with per-stage timings, the files written and the
+        stages served from the cache or recomputed
+    """
+    targets = list(targets) if targets else list(TARGETS)
+    unknown = [target for target in targets if target not in TARGETS]
+    if unknown:
+        raise ValueError(f"Unknown pipeline target(s): {', '.join(unknown)}")
+
+    data_dir = output_dir or Config.DATA_DIR
+    if staging is None:
+        finish_pending_ingest(data_dir, log)
+    publish = snapshot and staging is None
+    if publish:
+        staging = stage_snapshot(data_dir)
+    stage_cache = StageCache(stage_cache_dir(data_dir), Config.STAGE_CACHE_MAX_BYTES) if cache else None
+    run = PipelineRun(
+        csv_path or Config.FPL_DATA_CSV,
+        fixtures_path or Config.FIXTURE_TEMPLATE_CSV,
+        staging or data_dir,
+        log=log,
+        on_stage=on_stage,
+        data_dir=data_dir,
+        params=params,
+        cache=stage_cache
+    )
+    if season_state is not None:
+        run.results['season_state'] = season_state
+    if raw_data is not None:
+        run.results['raw_data'] = raw_data
+    if fixture_template is not None:
+        run.results['fixture_template'] = fixture_template
+
+    start = time.perf_counter()
+    try:
+        for target in targets:
+            run.get(target)
+    except BaseException:
+        if publish:
+            discard_staging(staging)
+        raise
+    version = None
+    if publish:
+        version = publish_snapshot(data_dir, staging, run.timings)
+    elif staging is None:
+        # Files were rewritten in place: describe them all again
+        write_manifest(data_dir, None, run.timings)
+    evicted = stage_cache.evict() if stage_cache is not None else 0
+    total = time.perf_counter() - start
+    published = f", snapshot {version}" if version else ''
+    log(f"✅ Pipeline finished in {total:.3f}s ({len(run.outputs)} files written{published})")
+    if stage_cache is not None:
+        log(f"🗃️  Stage cache: {len(run.cache_report['hit'])} hit, {len(run.cache_report['recomputed'])} recomputed"
+            f"{f', {evicted} evicted' if evicted else ''}")
+
+    return {
+        'targets': targets,
+        'stages': run.timings,
+        'outputs': run.outputs,
+        'total_seconds': round(total, 4),
+        'snapshot': version,
+        'params': run.params,
+        'cache': {**run.cache_report, 'evicted': evicted} if stage_cache is not None else None
+    }
+
+
+def ingest_gameweeks(new_rows, csv_path=None, fixtures_path=None, output_dir=None, log=print, snapshot=True):
+    """
+    Fold only the new gameweek's rows into the persisted running aggregates
+    and refresh every output derived from the gameweek rows (see
+    INCREMENTAL_TARGETS), so the cost of the aggregation scales with one
+    gameweek instead of the whole season.
+
+    The rows are appended to the season CSV and its columnar copy (the
+    source of truth for full rebuilds), the aggregates are saved and the
+    outputs published as one step (see finish_pending_ingest). If no
+    aggregates were saved yet they are first built from the CSV.
+
+    Args:
+        new_rows: DataFrame of raw gameweek rows (same columns as the CSV)
+        snapshot: publish the refreshed outputs as a new snapshot (see run_pipeline)
+    Returns:
+        run_pipeline report plus the ingested gameweeks and row count
+    Raises:
+        GameweekAlreadyIngested: if a gameweek in new_rows was already ingested
+    """
+    csv_path = csv_path or Config.FPL_DATA_CSV
+    output_dir = output_dir or Config.DATA_DIR
+
+    finish_pending_ingest(output_dir, log)
+    start = time.perf_counter()
+    form_gameweeks = DEFAULT_PARAMS['form_gameweeks']
+    state = SeasonAggregates.load(state_path(output_dir), form_gameweeks)
+    if state is None:
+        log("📦 No current saved aggregates found, building them from the season CSV")
+        state = SeasonAggregates.from_gameweeks(read_gameweek_data(csv_path), form_gameweeks)
+    load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    gameweeks = state.update(new_rows)
+    update_seconds = time.perf_counter() - start
+    log(f"⏱️  {'ingest':<22} {update_seconds:8.3f}s (gameweek {', '.join(map(str, gameweeks))}, {len(new_rows)} rows)")
+
+    # Everything is staged first: the new rows for the CSV and its columnar
+    # copy, the aggregates, and every output in one snapshot staging
+    # directory. A commit record then lists the moves into place and the
+    # publish; a crash part-way through is finished by the next run, so the
+    # CSV, the aggregates and the served snapshot never disagree.
+    staged_state = f'{state_path(output_dir)}.staged'
+    staging = None
+    staged_data = stage_gameweek_append(new_rows, csv_path)
+    try:
+        state.save(staged_state)
+        staging = stage_snapshot(output_dir) if snapshot else None
+        start = time.perf_counter()
+        raw_data = staged_data.read()
+        read_seconds = time.perf_counter() - start
+        report = run_pipeline(
+            csv_path=csv_path,
+            fixtures_path=fixtures_path,
+            output_dir=output_dir,
+            targets=INCREMENTAL_TARGETS,
+            log=log,
+            season_state=state,
+            snapshot=snapshot,
+            raw_data=raw_data,
+            staging=staging
+        )
+        timings = [
+            {'stage': 'load_aggregates', 'seconds': round(load_seconds, 4)},
+            {'stage': 'ingest', 'seconds': round(update_seconds, 4)},
+            {'stage': 'raw_data', 'seconds': round(read_seconds, 4)}
+        ] + report['stages']
+        pending = {
+            'gameweeks': gameweeks,
+            'data': staged_data.as_record(),
+            'files': [[staged_state, state_path(output_dir)]],
+            'staging': staging,
+            'timings': timings
+        }
+        record = pending_ingest_path(output_dir)
+        with open(f'{record}.tmp', 'w', encoding='utf-8') as f:
+            json.dump(pending, f)
+        os.replace(f'{record}.tmp', record)
+    except BaseException:
+        staged_data.discard()
+        if os.path.exists(staged_state):
+            os.remove(staged_state)
+        if staging is not None:
+            discard_staging(staging)
+        raise
+    report['snapshot'] = _commit_ingest(output_dir, pending)
+    if report['snapshot'] is not None:
+        log(f"📦 Published snapshot {report['snapshot']}")
+
+    report['stages'] = timings
+    report['gameweeks'] = gameweeks
+    report['rows'] = len(new_rows)
+    return report
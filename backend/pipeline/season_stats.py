@@ -0,0 +1,177 @@
+# pipeline/season_stats.py
+import numpy as np
+import pandas as pd
+from pipeline.constants import FORM_GAMEWEEKS
+
+SEASON_GROUP_KEYS = ['id', 'web_name', 'team_name', 'team_name_short', 'position_name', 'element_type', 'player_team_key']
+
+SEASON_AGGREGATIONS = {
+    # Core stats
+    'total_points': 'sum',
+    'now_cost': 'last',
+    'selected_by_percent': 'last',
+    'minutes': 'sum',
+    'gameweek': ['max', 'count'],
+
+    # Attacking stats
+    'goals': 'sum',
+    'assists': 'sum',
+    'expected_goals': 'sum',
+    'expected_assists': 'sum',
+    'expected_goal_involvements': 'sum',
+    'total_shots': 'sum',
+    'shots_on_target': 'sum',
+    'shots_in_box': 'sum',
+    'chances_created': 'sum',
+
+    # Defensive stats
+    'clean_sheet': 'sum',
+    'goals_conceded': 'sum',
+    'expected_clean_sheet': 'sum',
+    'expected_goals_conceded': 'sum',
+    'tackles': 'sum',
+    'recoveries': 'sum',
+    'clearances_blocks_interceptions': 'sum',
+    'defensive_contribution': 'sum'
+}
+
+SEASON_COLUMN_NAMES = {
+    'now_cost_last': 'now_cost',
+    'selected_by_percent_last': 'selected_by_percent',
+    'gameweek_max': 'last_gameweek',
+    'gameweek_count': 'games_played',
+    'total_points_sum': 'season_points',
+    'minutes_sum': 'season_minutes',
+    'goals_sum': 'season_goals',
+    'assists_sum': 'season_assists',
+    'expected_goals_sum': 'season_xG',
+    'expected_assists_sum': 'season_xA',
+    'expected_goal_involvements_sum': 'season_xGI',
+    'total_shots_sum': 'season_shots',
+    'shots_on_target_sum': 'season_SoT',
+    'shots_in_box_sum': 'season_SiB',
+    'chances_created_sum': 'season_key_passes',
+    'clean_sheet_sum': 'season_CS',
+    'goals_conceded_sum': 'season_GC',
+    'expected_clean_sheet_sum': 'season_xCS',
+    'expected_goals_conceded_sum': 'season_xGC',
+    'tackles_sum': 'season_tackles',
+    'recoveries_sum': 'season_recoveries',
+    'clearances_blocks_interceptions_sum': 'clearances_blocks_interceptions_sum',
+    'defensive_contribution_sum': 'defensive_contribution_sum'
+}
+
+
+# How two partial aggregates of the same group combine (count becomes a sum)
+_COMBINE_FUNCS = {'sum': 'sum', 'count': 'sum', 'max': 'max', 'last': 'last'}
+
+
+def _season_combine_rules():
+    rules = {}
+    for column, funcs in SEASON_AGGREGATIONS.items():
+        for func in ([funcs] if isinstance(funcs, str) else funcs):
+            flat_name = f'{column}_{func}'
+            rules[SEASON_COLUMN_NAMES.get(flat_name, flat_name)] = _COMBINE_FUNCS[func]
+    return rules
+
+
+SEASON_COMBINE_RULES = _season_combine_rules()
+
+
+def aggregate_gameweeks(df):
+    """
+    Aggregate gameweek rows into season totals, one row per player-team group.
+
+    Groups by player_team_key (plus the descriptive keys) so CS/GC are never
+    mixed across teams.
+    """
+    totals = df.groupby(SEASON_GROUP_KEYS).agg(SEASON_AGGREGATIONS).reset_index()
+
+    # Flatten multi-level columns
+    totals.columns = ['_'.join(col).strip('_') if col[1] else col[0] for col in totals.columns]
+    totals.rename(columns=SEASON_COLUMN_NAMES, inplace=True)
+    return totals
+
+
+def combine_season_totals(totals, new_totals):
+    """
+    Merge season totals of later gameweeks into existing totals.
+
+    Sums and counts add up, maxima take the max and last-value fields take the
+    newest non-missing value, so the result equals aggregating all rows at once.
+    """
+    if totals is None or totals.empty:
+        return new_totals
+    combined = pd.concat([totals, new_totals], ignore_index=True)
+    return combined.groupby(SEASON_GROUP_KEYS).agg(SEASON_COMBINE_RULES).reset_index()
+
+
+def finalize_season_stats(totals):
+    """
+    Turn season totals into the season_stats table: per-game metrics,
+    points per million, rounding, and for transferred players ONLY their
+    most-played team.
+    """
+    season_stats = totals.copy()
+
+    # Per-game metrics
+    season_stats['points_per_game'] = season_stats['season_points'] / season_stats['games_played']
+    season_stats['goals_per_game'] = season_stats['season_goals'] / season_stats['games_played']
+    season_stats['assists_per_game'] = season_stats['season_assists'] / season_stats['games_played']
+    season_stats['minutes_per_game'] = season_stats['season_minutes'] / season_stats['games_played']
+
+    # Points per million (needed for hidden gems)
+    season_stats['points_per_million'] = season_stats['season_points'] / season_stats['now_cost']
+
+    numeric_cols = season_stats.select_dtypes(include=[np.number]).columns
+    season_stats[numeric_cols] = season_stats[numeric_cols].round(2)
+
+    # For transferred players, keep ONLY their most-played team
+    season_stats = season_stats.loc[season_stats.groupby('web_name')['games_played'].idxmax()]
+    return season_stats
+
+
+# Form multiplier by element_type (goalkeepers, defenders, everyone else)
+FORM_MULTIPLIERS = {1: 1.2, 2: 1.1}
+DEFAULT_FORM_MULTIPLIER = 0.9
+
+
+def recent_gameweeks(df, keys, n=FORM_GAMEWEEKS):
+    """
+    The n most recent gameweek rows of each group, in table order.
+
+    Same rows as nlargest(n, 'gameweek') per group (ties keep the earlier
+    row), computed with one stable sort instead of one scan per group.
+    """
+    return (
+        df.sort_values('gameweek', ascending=False, kind='mergesort')
+        .groupby(keys, sort=False)
+        .head(n)
+        .sort_index()
+    )
+
+
+def calculate_player_form(df, form_gameweeks=FORM_GAMEWEEKS):
+    """
+    Form as a 0-10 score from points per game over the last form_gameweeks,
+    for every (web_name, team_name) in df at once.
+
+    Returns a Series indexed by (web_name, team_name).
+    """
+    keys = ['web_name', 'team_name']
+    element_type = df.groupby(keys, sort=False)['element_type'].first()
+    avg_points = recent_gameweeks(df, keys, form_gameweeks).groupby(keys, sort=False)['total_points'].mean()
+
+    multiplier = element_type.map(FORM_MULTIPLIERS).fillna(DEFAULT_FORM_MULTIPLIER)
+    form_score = (avg_points * multiplier.reindex(avg_points.index)).clip(0.0, 10.0)
+    return form_score.map(lambda score: round(score, 1)).rename('form')
+
+
+def add_player_form(season_stats, df, form_gameweeks=FORM_GAMEWEEKS):
+    """Add the form column to season_stats, filling missing values with the median"""
+    season_stats = season_stats.copy()
+    form = calculate_player_form(df, form_gameweeks)
+    season_stats['form'] = form.reindex(pd.MultiIndex.from_frame(season_stats[['web_name', 'team_name']])).to_numpy()
+    if season_stats['form'].isna().any():
+        season_stats['form'] = season_stats['form'].fillna(season_stats['form'].median())
+    return season_stats
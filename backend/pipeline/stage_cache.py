@@ -0,0 +1,216 @@
+# pipeline/stage_cache.py
+# Content-addressed cache of pipeline stage results. A stage's key hashes
+# the pipeline code, its parameters and its dependencies' keys, down to the
+# content of the input CSVs, so a run can tell which stages would produce
+# the same result without running anything. Computation stages are cached
+# as pickles, export stages as the output files they wrote.
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import uuid
+
+# Files whose code determines the stage results
+_CODE_DIRS = {
+    'pipeline': None,
+    'utils': ('fixture_store.py', 'fixture_matrix.py', 'player_index.py', 'squad_planner.py'),
+}
+
+META_FILE = 'meta.json'
+RESULT_FILE = 'result.pkl'
+FILES_DIR = 'files'
+SOURCE_MEMO_FILE = 'sources.json'
+
+_code_version = None
+
+
+def code_version():
+    """Hash of the pipeline's source files (a code change invalidates every entry)"""
+    global _code_version
+    if _code_version is None:
+        backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        digest = hashlib.blake2b(digest_size=16)
+        for directory, names in sorted(_CODE_DIRS.items()):
+            path = os.path.join(backend, directory)
+            for name in sorted(names or [name for name in os.listdir(path) if name.endswith('.py')]):
+                digest.update(name.encode('utf-8'))
+                with open(os.path.join(path, name), 'rb') as f:
+                    digest.update(f.read())
+        _code_version = digest.hexdigest()
+    return _code_version
+
+
+def stage_key(stage, params, dependency_keys):
+    """Key of a stage from its parameters and its dependencies' keys"""
+    payload = json.dumps([code_version(), stage, params, dependency_keys], sort_keys=True)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _link_or_copy(source, target):
+    # Outputs are always replaced, never rewritten in place, so cached
+    # files can share storage with the snapshots they were written to
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+class StageCache:
+    """
+    Entries live in root/<key>/ (meta.json plus result.pkl or files/...),
+    are written to a temporary directory and renamed into place, and are
+    evicted least recently used first once the cache exceeds max_bytes.
+    """
+
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = max_bytes
+
+    def _entry(self, key):
+        return os.path.join(self.root, key)
+
+    def source_key(self, path):
+        """
+        Content hash of an input file. Hashes are remembered per (size,
+        mtime), so an unchanged file is not read again.
+        """
+        stat = os.stat(path)
+        signature = [stat.st_size, stat.st_mtime_ns]
+        memo_path = os.path.join(self.root, SOURCE_MEMO_FILE)
+        try:
+            with open(memo_path, 'r', encoding='utf-8') as f:
+                memo = json.load(f)
+        except (OSError, ValueError):
+            memo = {}
+        cached = memo.get(os.path.abspath(path))
+        if cached is not None and cached[:2] == signature:
+            return cached[2]
+
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        key = digest.hexdigest()
+        memo[os.path.abspath(path)] = signature + [key]
+        self._write_file(memo_path, json.dumps(memo).encode('utf-8'))
+        return key
+
+    def _write_file(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _read_meta(self, key):
+        try:
+            with open(os.path.join(self._entry(key), META_FILE), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Mark as recently used for eviction
+        try:
+            os.utime(os.path.join(self._entry(key), META_FILE))
+        except OSError:
+            pass
+        return meta
+
+    def _commit(self, key, stage, fill, **meta):
+        """Build an entry in a temporary directory with fill(path) and rename it into place"""
+        os.makedirs(self.root, exist_ok=True)
+        tmp_dir = os.path.join(self.root, f'.tmp-{uuid.uuid4().hex[:8]}')
+        os.makedirs(tmp_dir)
+        try:
+            fill(tmp_dir)
+            with open(os.path.join(tmp_dir, META_FILE), 'w', encoding='utf-8') as f:
+                json.dump({'stage': stage, **meta}, f)
+            os.rename(tmp_dir, self._entry(key))
+        except OSError:
+            # Written concurrently by another run (or the disk is full): keep what is there
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def load_result(self, key):
+        """(True, result) for a cached computation stage, else (False, None)"""
+        if self._read_meta(key) is None:
+            return False, None
+        try:
+            with open(os.path.join(self._entry(key), RESULT_FILE), 'rb') as f:
+                return True, pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return False, None
+
+    def save_result(self, key, stage, result):
+        def fill(path):
+            with open(os.path.join(path, RESULT_FILE), 'wb') as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        self._commit(key, stage, fill)
+
+    def restore_files(self, key, output_dir, owned_dir=None):
+        """
+        Put a cached export stage's files into output_dir. Files in owned_dir
+        (a directory the stage writes in full) that are not part of the entry
+        are removed. Returns the files restored, or None on a miss.
+        """
+        meta = self._read_meta(key)
+        if meta is None or 'files' not in meta:
+            return None
+        files_dir = os.path.join(self._entry(key), FILES_DIR)
+        if not all(os.path.exists(os.path.join(files_dir, name)) for name in meta['files']):
+            return None
+        for name in meta['files']:
+            source, target = os.path.join(files_dir, name), os.path.join(output_dir, name)
+            if os.path.exists(target) and os.path.samefile(source, target):
+                # Already in place (renaming a hard link over itself is a no-op)
+                continue
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            tmp_path = os.path.join(os.path.dirname(target), f'.tmp-{uuid.uuid4().hex[:8]}')
+            _link_or_copy(source, tmp_path)
+            os.replace(tmp_path, target)
+        if owned_dir is not None and os.path.isdir(os.path.join(output_dir, owned_dir)):
+            keep = set(meta['files'])
+            for name in os.listdir(os.path.join(output_dir, owned_dir)):
+                if f'{owned_dir}/{name}' not in keep and not name.startswith('.'):
+                    os.remove(os.path.join(output_dir, owned_dir, name))
+        return list(meta['files'])
+
+    def save_files(self, key, stage, output_dir, files):
+        def fill(path):
+            for name in files:
+                target = os.path.join(path, FILES_DIR, name)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                _link_or_copy(os.path.join(output_dir, name), target)
+        self._commit(key, stage, fill, files=list(files))
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits max_bytes; returns the number removed"""
+        if not os.path.isdir(self.root):
+            return 0
+        entries = []
+        total = 0
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if not os.path.isdir(path):
+                continue
+            if name.startswith('.tmp-'):
+                # Left behind by an interrupted run
+                shutil.rmtree(path, ignore_errors=True)
+                continue
+            size = sum(os.path.getsize(os.path.join(directory, file))
+                       for directory, _, files in os.walk(path) for file in files)
+            try:
+                used = os.path.getmtime(os.path.join(path, META_FILE))
+            except OSError:
+                used = 0
+            entries.append((used, size, path))
+            total += size
+
+        removed = 0
+        for used, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            removed += 1
+        return removed
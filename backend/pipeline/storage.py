@@ -0,0 +1,399 @@
+# pipeline/storage.py
+# Typed columnar copy of the gameweek CSV (Parquet), written once when the
+# CSV changes and read by every downstream consumer instead of re-parsing it.
+# Ingested gameweeks are added as their own part files next to it, so an
+# ingest never rewrites the season.
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+# Integral stats (no missing values): int32 instead of int64/float64
+INT32_COLUMNS = [
+    'id', 'element_type', 'gameweek', 'minutes', 'total_shots', 'shots_on_target', 'shots_in_box',
+    'goals', 'chances_created', 'assists', 'goals_conceded', 'clean_sheet',
+    'clearances_blocks_interceptions', 'recoveries', 'tackles', 'defensive_contribution', 'total_points'
+]
+
+# Integral stats that are often missing: float32 holds them (and NaN) exactly
+SPARSE_COLUMNS = ['non_penalty_goals', 'touches', 'touches_opp_box']
+
+# Few distinct values repeated on every row
+CATEGORICAL_COLUMNS = ['web_name', 'team_name', 'opponent_team_name']
+
+# Fractional stats (xG, cost, ownership, ...) stay float64: float32 would
+# change season sums and published values in the second decimal
+GAMEWEEK_DTYPES = {
+    **{column: 'int32' for column in INT32_COLUMNS},
+    **{column: 'float32' for column in SPARSE_COLUMNS},
+    'was_home': 'bool'
+}
+
+
+# Fractional stats: anything numeric (or empty)
+FLOAT_COLUMNS = [
+    'now_cost', 'selected_by_percent', 'expected_goals', 'non_penalty_expected_goals', 'expected_assists',
+    'expected_goals_conceded', 'expected_clean_sheet', 'expected_goal_involvements',
+    'non_penalty_expected_goal_involvements', 'expected_points', 'PvsxP'
+]
+
+# Columns the analysis reads; an upload without any of them is rejected up front
+REQUIRED_COLUMNS = [
+    column for column in [*INT32_COLUMNS, *SPARSE_COLUMNS, *CATEGORICAL_COLUMNS, 'was_home', *FLOAT_COLUMNS]
+    if column not in ('non_penalty_expected_goals', 'non_penalty_expected_goal_involvements', 'PvsxP')
+]
+
+BOOL_VALUES = {'true': True, 'false': False, '1': True, '0': False}
+
+INT32_LIMIT = 2 ** 31
+
+
+def columnar_path(csv_path):
+    """The Parquet file kept next to a gameweek CSV"""
+    return os.path.splitext(csv_path)[0] + '.parquet'
+
+
+def columnar_parts_dir(csv_path):
+    """Directory of the Parquet parts appended by gameweek ingests"""
+    return os.path.splitext(csv_path)[0] + '.parts'
+
+
+def columnar_parts(csv_path):
+    """Paths of the ingested Parquet parts of csv_path, in the order they were appended"""
+    directory = columnar_parts_dir(csv_path)
+    if not os.path.isdir(directory):
+        return []
+    return [os.path.join(directory, name) for name in sorted(os.listdir(directory))
+            if name.endswith('.parquet') and not name.startswith('.')]
+
+
+def remove_columnar_parts(csv_path):
+    """Drop the ingested parts (the base Parquet file is being replaced by a full copy)"""
+    directory = columnar_parts_dir(csv_path)
+    if os.path.isdir(directory):
+        shutil.rmtree(directory)
+
+
+def apply_gameweek_schema(df):
+    """
+    Cast gameweek rows to the storage schema.
+
+    Raises ValueError (or TypeError) if a column cannot hold its declared
+    type, e.g. missing or fractional values in an integral stat.
+    """
+    df = df.copy()
+    for column, dtype in GAMEWEEK_DTYPES.items():
+        if column in df.columns:
+            df[column] = df[column].astype(dtype)
+    for column in CATEGORICAL_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype('category')
+    return df
+
+
+def parse_gameweek_csv(source):
+    """Parse a gameweek CSV (path or file object) straight into the storage schema"""
+    header = pd.read_csv(source, nrows=0).columns
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    dtypes = {column: dtype for column, dtype in GAMEWEEK_DTYPES.items() if column in header}
+    return apply_gameweek_schema(pd.read_csv(source, dtype=dtypes))
+
+
+def write_gameweek_data(df, csv_path):
+    """Write the typed columnar copy for csv_path (atomically), replacing any parts"""
+    parquet_path = columnar_path(csv_path)
+    temp_path = f'{parquet_path}.tmp'
+    apply_gameweek_schema(df).to_parquet(temp_path, engine='pyarrow', index=False)
+    # Parts first: a crash in between leaves a stale copy that is rebuilt,
+    # never the new copy plus the old parts
+    remove_columnar_parts(csv_path)
+    os.replace(temp_path, parquet_path)
+    return parquet_path
+
+
+class CsvValidationError(ValueError):
+    """
+    An uploaded gameweek CSV that does not match the schema. `errors` holds
+    the first few bad cells ({'line', 'column', 'value', 'message'}, line 1
+    being the header); `error_count` counts all of them.
+    """
+
+    def __init__(self, message, errors=None, error_count=0):
+        super().__init__(message)
+        self.errors = errors or []
+        self.error_count = error_count
+
+
+def _arrow_type(column):
+    if column in INT32_COLUMNS:
+        return pa.int32()
+    if column in SPARSE_COLUMNS:
+        return pa.float32()
+    if column in FLOAT_COLUMNS:
+        return pa.float64()
+    if column == 'was_home':
+        return pa.bool_()
+    if column in CATEGORICAL_COLUMNS:
+        return pa.dictionary(pa.int32(), pa.string())
+    # Columns the analysis does not use are kept as text
+    return pa.string()
+
+
+def _type_chunk(chunk):
+    """
+    Typed columns for a chunk of raw (string) cells, plus {column: (bad cell
+    mask, message per bad cell)} for the cells that do not fit the schema.
+    """
+    typed = {}
+    problems = {}
+    for column in chunk.columns:
+        raw = chunk[column]
+        missing = raw.isna().to_numpy()
+        if column in INT32_COLUMNS or column in SPARSE_COLUMNS or column in FLOAT_COLUMNS:
+            values = pd.to_numeric(raw, errors='coerce').to_numpy(dtype='float64')
+            messages = np.where(~missing & np.isnan(values), 'not a number', '')
+            if column in INT32_COLUMNS:
+                fractional = ~np.isnan(values) & ((values % 1 != 0) | (np.abs(values) >= INT32_LIMIT))
+                messages = np.where(fractional, 'not a whole number', messages)
+                messages = np.where(missing, 'missing value', messages)
+                typed[column] = np.nan_to_num(values).astype('int32')
+            else:
+                typed[column] = values.astype('float32' if column in SPARSE_COLUMNS else 'float64')
+        elif column == 'was_home':
+            values = raw.str.strip().str.lower().map(BOOL_VALUES)
+            messages = np.where(values.isna().to_numpy(), 'expected True or False', '')
+            typed[column] = values.eq(True).to_numpy(dtype='bool')
+        else:
+            messages = np.where(missing, 'missing value', '') if column in CATEGORICAL_COLUMNS else np.full(len(raw), '')
+            typed[column] = raw.to_numpy(dtype=object)
+        bad = messages != ''
+        if bad.any():
+            problems[column] = (bad, messages)
+    return typed, problems
+
+
+class StagedGameweekData:
+    """
+    A validated upload written next to its destination (CSV plus typed
+    Parquet copy) but not yet in place. commit() swaps both in with
+    os.replace; discard() removes them.
+    """
+
+    def __init__(self, csv_path, staged_csv, staged_parquet, rows, columns):
+        self.csv_path = csv_path
+        self.staged_csv = staged_csv
+        self.staged_parquet = staged_parquet
+        self.rows = rows
+        self.columns = columns
+
+    def commit(self):
+        # The old season's parts go first, then the CSV: the Parquet copy
+        # ends up the newer file, so read_gameweek_data trusts it
+        remove_columnar_parts(self.csv_path)
+        os.replace(self.staged_csv, self.csv_path)
+        os.replace(self.staged_parquet, columnar_path(self.csv_path))
+
+    def discard(self):
+        for path in (self.staged_csv, self.staged_parquet):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def stage_gameweek_csv(stream, csv_path, chunk_rows=50_000, max_errors=50, copy_buffer=1024 * 1024):
+    """
+    Stream an uploaded gameweek CSV to a temporary file next to csv_path, then
+    validate it `chunk_rows` rows at a time against the storage schema while
+    writing the typed Parquet copy chunk by chunk, so memory use does not grow
+    with the file size. Returns a StagedGameweekData to commit.
+    Raises:
+        CsvValidationError: missing columns, bad cells or no rows
+    """
+    directory = os.path.dirname(os.path.abspath(csv_path))
+    fd, staged_csv = tempfile.mkstemp(dir=directory, prefix='.upload-', suffix='.csv')
+    staged_parquet = f'{staged_csv[:-4]}.parquet'
+    staged = StagedGameweekData(csv_path, staged_csv, staged_parquet, 0, 0)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            shutil.copyfileobj(stream, f, copy_buffer)
+
+        try:
+            header = list(pd.read_csv(staged_csv, nrows=0).columns)
+        except pd.errors.EmptyDataError:
+            raise CsvValidationError('Uploaded CSV file is empty')
+        missing = [column for column in REQUIRED_COLUMNS if column not in header]
+        if missing:
+            raise CsvValidationError(f"Missing required columns: {', '.join(missing)}")
+
+        schema = pa.schema([(column, _arrow_type(column)) for column in header])
+        errors = []
+        error_count = 0
+        rows = 0
+        writer = pq.ParquetWriter(staged_parquet, schema)
+        try:
+            for chunk in pd.read_csv(staged_csv, dtype=str, chunksize=chunk_rows):
+                typed, problems = _type_chunk(chunk)
+                chunk_errors = []
+                for column, (bad, messages) in problems.items():
+                    error_count += int(bad.sum())
+                    for position in np.flatnonzero(bad)[:max_errors]:
+                        value = chunk[column].iloc[position]
+                        chunk_errors.append({
+                            'line': rows + int(position) + 2,
+                            'column': column,
+                            'value': None if pd.isna(value) else value,
+                            'message': str(messages[position])
+                        })
+                if len(errors) < max_errors:
+                    errors.extend(sorted(chunk_errors, key=lambda error: error['line'])[:max_errors - len(errors)])
+                if not error_count:
+                    writer.write_table(pa.Table.from_pydict(typed, schema=schema))
+                rows += len(chunk)
+        except pd.errors.ParserError as e:
+            raise CsvValidationError(f'Invalid CSV format: {e}')
+        finally:
+            writer.close()
+
+        if error_count:
+            raise CsvValidationError(f'{error_count} invalid values in uploaded CSV', errors, error_count)
+        if not rows:
+            raise CsvValidationError('Uploaded CSV file is empty')
+        staged.rows, staged.columns = rows, len(header)
+        return staged
+    except BaseException:
+        staged.discard()
+        raise
+
+
+def _columnar_is_current(csv_path):
+    """Whether the Parquet copy (and its parts) is at least as new as the CSV"""
+    parquet_path = columnar_path(csv_path)
+    if not os.path.exists(parquet_path):
+        return False
+    newest = max(os.path.getmtime(path) for path in [parquet_path, *columnar_parts(csv_path)])
+    return newest >= os.path.getmtime(csv_path)
+
+
+def _read_columnar(paths):
+    """Gameweek rows of Parquet files, concatenated in order"""
+    frames = [pd.read_parquet(path, engine='pyarrow') for path in paths]
+    if len(frames) == 1:
+        return frames[0]
+    # Each part has its own categories: re-encode the names over all of them
+    return apply_gameweek_schema(pd.concat(frames, ignore_index=True))
+
+
+def read_gameweek_data(csv_path):
+    """
+    Typed gameweek rows for csv_path.
+
+    Reads the Parquet copy and its ingested parts when they are at least as
+    new as the CSV; otherwise (first use, or the CSV was replaced by hand)
+    parses the CSV once and rewrites the copy.
+    """
+    if _columnar_is_current(csv_path):
+        return _read_columnar([columnar_path(csv_path), *columnar_parts(csv_path)])
+
+    df = parse_gameweek_csv(csv_path)
+    try:
+        write_gameweek_data(df, csv_path)
+    except OSError as e:
+        logger.warning("⚠️ Could not write columnar copy", extra={'path': csv_path, 'error': str(e)})
+    return df
+
+
+class StagedGameweekAppend:
+    """
+    New gameweek rows written next to the season CSV but not yet added to
+    it: a CSV fragment to append and the rows' own Parquet part. commit()
+    adds both; it truncates the CSV to its staged size before appending, so
+    repeating an interrupted commit never duplicates rows. as_record() /
+    from_record() carry it through a commit record (JSON).
+    """
+
+    def __init__(self, csv_path, csv_size, staged_rows, staged_part, part_path, rows):
+        self.csv_path = csv_path
+        self.csv_size = csv_size
+        self.staged_rows = staged_rows
+        self.staged_part = staged_part
+        self.part_path = part_path
+        self.rows = rows
+
+    def as_record(self):
+        return {'csv_path': self.csv_path, 'csv_size': self.csv_size, 'staged_rows': self.staged_rows,
+                'staged_part': self.staged_part, 'part_path': self.part_path, 'rows': self.rows}
+
+    @classmethod
+    def from_record(cls, record):
+        return cls(**record)
+
+    def read(self):
+        """The season's typed rows with the new rows appended, before commit()"""
+        return _read_columnar([columnar_path(self.csv_path), *columnar_parts(self.csv_path), self.staged_part])
+
+    def commit(self):
+        if os.path.exists(self.staged_rows):
+            with open(self.csv_path, 'r+b') as csv_file, open(self.staged_rows, 'rb') as rows_file:
+                csv_file.truncate(self.csv_size)
+                csv_file.seek(self.csv_size)
+                shutil.copyfileobj(rows_file, csv_file)
+            os.remove(self.staged_rows)
+        if os.path.exists(self.staged_part):
+            os.replace(self.staged_part, self.part_path)
+        # Newer than the appended CSV, so read_gameweek_data trusts the copy
+        os.utime(self.part_path)
+
+    def discard(self):
+        for path in (self.staged_rows, self.staged_part):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def stage_gameweek_append(new_rows, csv_path):
+    """
+    Stage new_rows for the season CSV and its columnar copy: a CSV fragment
+    and a Parquet part holding only the new rows, so the cost scales with
+    one gameweek. Returns a StagedGameweekAppend to commit.
+    """
+    if not _columnar_is_current(csv_path):
+        # First use, or the CSV was replaced by hand: rebuild the copy once
+        read_gameweek_data(csv_path)
+    header = list(pd.read_csv(csv_path, nrows=0).columns)
+    new_rows = apply_gameweek_schema(new_rows.reindex(columns=header))
+
+    parts_dir = columnar_parts_dir(csv_path)
+    os.makedirs(parts_dir, exist_ok=True)
+    part_path = os.path.join(parts_dir, f'part-{len(columnar_parts(csv_path)) + 1:05d}.parquet')
+    fd, staged_rows = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(csv_path)), prefix='.ingest-',
+                                       suffix='.csv')
+    os.close(fd)
+    staged_part = os.path.join(parts_dir, os.path.basename(staged_rows)[:-4] + '.parquet')
+    csv_size = os.path.getsize(csv_path)
+    staged = StagedGameweekAppend(csv_path, csv_size, staged_rows, staged_part, part_path, len(new_rows))
+    try:
+        with open(csv_path, 'rb') as f:
+            f.seek(max(csv_size - 1, 0))
+            ends_with_newline = f.read(1) in (b'\n', b'')
+        with open(staged_rows, 'w', encoding='utf-8', newline='') as f:
+            if not ends_with_newline:
+                f.write('\n')
+            new_rows.to_csv(f, header=False, index=False)
+        new_rows.to_parquet(staged.staged_part, engine='pyarrow', index=False)
+    except BaseException:
+        staged.discard()
+        raise
+    return staged
+
+
+def plain_strings(df):
+    """Categorical name columns back to plain strings (for grouping and indexing in the analysis)"""
+    categorical = [column for column in CATEGORICAL_COLUMNS if column in df.columns and isinstance(df[column].dtype, pd.CategoricalDtype)]
+    if not categorical:
+        return df
+    return df.astype({column: object for column in categorical})
@@ -1,7 +1,11 @@
 # routes/admin.py
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from config.config import Config
-import pandas as pd
+from utils.data_loader import bump_data_version, get_cache_stats
+from utils.fixture_store import get_fixture_store, clear_gameweek as clear_fixture_gameweek
+from utils.jobs import JobRunner, get_job_runner
+from utils.metrics import observe_stages
+from utils.snapshots import data_lock, list_snapshots, resolve_root, rollback
 import os
 import json
 from datetime import datetime
@@ -9,13 +13,18 @@ from datetime import datetime
 admin_bp = Blueprint('admin', __name__)
 
 # Admin endpoints
+# pandas and the pipeline are imported by the endpoints that use them, so
+# workers that never handle an upload or a rebuild don't load them
 
 @admin_bp.route('/admin/upload', methods=['POST'])
 def upload_csv():
     """
     Upload and override the fpl-data-stats.csv file
     Expects a file in the request with key 'file'
+    Invalid files are rejected with row-level errors and leave the current data untouched
     """
+    from pipeline.aggregates import discard_state
+    from pipeline.storage import stage_gameweek_csv, CsvValidationError
     try:
         # Check if file is present in request
         if 'file' not in request.files:
@@ -40,41 +49,33 @@ def upload_csv():
                 'message': 'Invalid file format. Please upload a CSV file'
             }), 400
         
-        # Validate CSV content before saving
+        # Stream to disk and validate chunk by chunk (memory stays flat for any file size)
         try:
-            # Read the uploaded file to validate it's a proper CSV
-            df = pd.read_csv(file)
-            
-            # Check if dataframe is empty
-            if df.empty:
-                return jsonify({
-                    'success': False,
-                    'message': 'Uploaded CSV file is empty'
-                }), 400
-            
-            # Reset file pointer to beginning for saving
-            file.seek(0)
-            
-            # Save the file, overwriting the existing one
-            file.save(Config.FPL_DATA_CSV)
-            
-            return jsonify({
-                'success': True,
-                'message': f'Successfully uploaded and processed {len(df)} rows of data',
-                'rows': len(df),
-                'columns': len(df.columns)
-            }), 200
-            
-        except pd.errors.EmptyDataError:
+            staged = stage_gameweek_csv(file.stream, Config.FPL_DATA_CSV,
+                                        chunk_rows=Config.UPLOAD_CHUNK_ROWS, max_errors=Config.UPLOAD_MAX_ERRORS)
+        except CsvValidationError as e:
             return jsonify({
                 'success': False,
-                'message': 'Uploaded file is empty or invalid CSV format'
-            }), 400
-        except Exception as e:
-            return jsonify({
-                'success': False,
-                'message': f'Error validating CSV: {str(e)}'
+                'message': str(e),
+                'errors': e.errors,
+                'error_count': e.error_count
             }), 400
+        
+        try:
+            # Swap the CSV and its typed columnar copy in while no pipeline run reads them
+            with data_lock(Config.DATA_DIR):
+                staged.commit()
+                # The running aggregates describe the old CSV
+                discard_state(Config.DATA_DIR)
+        finally:
+            staged.discard()
+        
+        return jsonify({
+            'success': True,
+            'message': f'Successfully uploaded and processed {staged.rows} rows of data',
+            'rows': staged.rows,
+            'columns': staged.columns
+        }), 200
     
     except Exception as e:
         return jsonify({
@@ -87,40 +88,23 @@ def upload_csv():
 def get_gameweeks():
     """
     Get list of all available game weeks with fixture counts
-    Reads from fixtures.json in the data directory
+    Answered from the in-memory fixture store (gameweek index)
     """
     try:
-        fixtures_file = os.path.join(Config.DATA_DIR, 'fixture_analysis', 'fixtures.json')
+        store = get_fixture_store()
         
-        # Check if fixtures file exists
-        if not os.path.exists(fixtures_file):
+        if not store.gameweeks:
             return jsonify({
                 'success': True,
                 'gameweeks': [],
                 'message': 'No fixture data found'
             }), 200
         
-        # Read fixtures data
-        with open(fixtures_file, 'r') as f:
-            fixtures_data = json.load(f)
-        
-        # Count fixtures per gameweek
-        gameweek_counts = {}
-        
-        # Check if fixtures_data is a dict with 'fixtures' key or a list
-        fixtures_list = fixtures_data.get('fixtures', fixtures_data) if isinstance(fixtures_data, dict) else fixtures_data
-        
-        for fixture in fixtures_list:
-            gw = fixture.get('gameweek', fixture.get('GW'))
-            if gw:
-                gameweek_counts[gw] = gameweek_counts.get(gw, 0) + 1
-        
-        # Convert to list and sort by gameweek (descending)
+        # Sorted by gameweek (descending)
         gameweeks = [
             {'gameweek': gw, 'count': count}
-            for gw, count in gameweek_counts.items()
+            for gw, count in sorted(store.counts().items(), reverse=True)
         ]
-        gameweeks.sort(key=lambda x: x['gameweek'], reverse=True)
         
         return jsonify({
             'success': True,
@@ -128,11 +112,6 @@ def get_gameweeks():
             'total_gameweeks': len(gameweeks)
         }), 200
     
-    except json.JSONDecodeError:
-        return jsonify({
-            'success': False,
-            'message': 'Error reading fixtures data: Invalid JSON format'
-        }), 500
     except Exception as e:
         return jsonify({
             'success': False,
@@ -145,6 +124,8 @@ def clear_gameweek():
     """
     Clear all fixtures for a specific game week
     Expects JSON body with 'gameweek' field
+    Published as a new data snapshot without that gameweek's partition;
+    other gameweeks are not rewritten
     """
     try:
         # Get gameweek from request
@@ -167,33 +148,14 @@ def clear_gameweek():
                 'message': 'Invalid gameweek number'
             }), 400
         
-        fixtures_file = os.path.join(Config.DATA_DIR, 'fixture_analysis', 'fixtures.json')
-        
-        # Check if fixtures file exists
-        if not os.path.exists(fixtures_file):
+        fixture_count = sum(get_fixture_store().counts().values())
+        if not fixture_count:
             return jsonify({
                 'success': False,
                 'message': 'No fixture data found'
             }), 404
         
-        # Read fixtures data
-        with open(fixtures_file, 'r') as f:
-            fixtures_data = json.load(f)
-        
-        # Check if fixtures_data is a dict with 'fixtures' key or a list
-        is_dict_format = isinstance(fixtures_data, dict) and 'fixtures' in fixtures_data
-        fixtures_list = fixtures_data.get('fixtures', fixtures_data) if is_dict_format else fixtures_data
-        
-        # Count fixtures before deletion
-        original_count = len(fixtures_list)
-        
-        # Filter out fixtures for the specified gameweek
-        filtered_fixtures = [
-            fixture for fixture in fixtures_list
-            if fixture.get('gameweek', fixture.get('GW')) != gameweek
-        ]
-        
-        deleted_count = original_count - len(filtered_fixtures)
+        deleted_count = clear_fixture_gameweek(gameweek)
         
         if deleted_count == 0:
             return jsonify({
@@ -201,28 +163,15 @@ def clear_gameweek():
                 'message': f'No fixtures found for Game Week {gameweek}'
             }), 404
         
-        # Save the filtered fixtures back to file
-        if is_dict_format:
-            fixtures_data['fixtures'] = filtered_fixtures
-            save_data = fixtures_data
-        else:
-            save_data = filtered_fixtures
-        
-        with open(fixtures_file, 'w') as f:
-            json.dump(save_data, f, indent=2)
+        remaining = fixture_count - deleted_count
         
         return jsonify({
             'success': True,
             'message': f'Successfully deleted {deleted_count} fixture(s) from Game Week {gameweek}. Run "Process Data" to update analytics.',
             'deleted_count': deleted_count,
-            'remaining_fixtures': len(filtered_fixtures)
+            'remaining_fixtures': remaining
         }), 200
     
-    except json.JSONDecodeError:
-        return jsonify({
-            'success': False,
-            'message': 'Error reading fixtures data: Invalid JSON format'
-        }), 500
     except Exception as e:
         return jsonify({
             'success': False,
@@ -233,70 +182,269 @@ def clear_gameweek():
 @admin_bp.route('/admin/process-notebook', methods=['POST'])
 def process_notebook():
     """
-    Execute the Jupyter notebook to process CSV data and generate JSON files
-    This runs the fpl.ipynb notebook which reads CSV and outputs analytics JSON
+    Run the analytics pipeline to process CSV data and generate JSON files
+    (in-process replacement for executing fpl.ipynb; the URL is kept for the frontend)
+    The run is submitted as a background job and answered with 202 and its id;
+    follow it via /admin/jobs/<job_id> or the /events progress stream.
+    Submitting while the same run is in progress returns the running job.
+    Optional JSON body: {"targets": [...]} to rebuild only some output groups,
+    {"wait": true} to block until the job has finished (previous behaviour)
     """
+    from pipeline import TARGETS
     try:
-        import subprocess
-        import sys
+        # Check if CSV file exists
+        if not os.path.exists(Config.FPL_DATA_CSV):
+            return jsonify({
+                'success': False,
+                'message': 'CSV file not found. Please upload fpl-data-stats.csv first.'
+            }), 404
         
-        # Get the project root directory (where fpl.ipynb is located)
-        notebook_path = os.path.join(Config.PROJECT_ROOT, 'fpl.ipynb')
+        body = request.get_json(silent=True) or {}
+        targets = body.get('targets')
         
-        # Check if notebook exists
-        if not os.path.exists(notebook_path):
+        unknown = [target for target in targets or [] if target not in TARGETS]
+        if unknown:
             return jsonify({
                 'success': False,
-                'message': f'Notebook not found at {notebook_path}'
-            }), 404
+                'message': f"Unknown pipeline target(s): {', '.join(map(str, unknown))}"
+            }), 400
+        
+        runner = get_job_runner()
+        job, coalesced = runner.submit_pipeline(targets)
+        
+        if body.get('wait'):
+            after = 0
+            finished = False
+            while not finished:
+                events, finished = runner.wait_for_events(job['id'], after, Config.JOB_STREAM_HEARTBEAT)
+                after += len(events)
+            job = runner.get(job['id'])
+            if job['status'] != 'succeeded':
+                return jsonify({
+                    'success': False,
+                    'message': f"Error processing data: {job['error']}",
+                    'output': '\n'.join(job['output'])
+                }), 500
+            return jsonify({
+                'success': True,
+                **job['result'],
+                'output': '\n'.join(job['output']),
+                'job_id': job['id']
+            }), 200
+        
+        return jsonify({
+            'success': True,
+            'message': 'Processing already in progress' if coalesced else 'Processing started',
+            'job_id': job['id'],
+            'status': job['status'],
+            'coalesced': coalesced,
+            'status_url': f"/api/admin/jobs/{job['id']}",
+            'events_url': f"/api/admin/jobs/{job['id']}/events"
+        }), 202
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error processing data: {str(e)}'
+        }), 500
+
+
+@admin_bp.route('/admin/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Status of a background job: status (queued, running, succeeded, failed),
+    per-stage timings so far, output lines and, when finished, the result or error
+    """
+    job = get_job_runner().get(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'message': f'Job {job_id} not found'
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'job': {**JobRunner.summarize(job), 'output': '\n'.join(job['output'])}
+    }), 200
+
+
+@admin_bp.route('/admin/jobs/<job_id>/events', methods=['GET'])
+def stream_job_events(job_id):
+    """
+    Server-sent events for a background job: `status`, `log` and `stage`
+    ({"stage", "seconds"}) events as they happen, then one `done` event with
+    the final job record. Reconnecting clients resume after Last-Event-ID.
+    """
+    runner = get_job_runner()
+    if runner.get(job_id) is None:
+        return jsonify({
+            'success': False,
+            'message': f'Job {job_id} not found'
+        }), 404
+    
+    try:
+        after = int(request.headers.get('Last-Event-ID', request.args.get('after', 0)))
+    except ValueError:
+        after = 0
+    
+    def generate():
+        position = after
+        finished = False
+        while not finished:
+            events, finished = runner.wait_for_events(job_id, position, Config.JOB_STREAM_HEARTBEAT)
+            if not events and not finished:
+                yield ': keep-alive\n\n'
+            for event in events:
+                position = event['id']
+                yield f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
+@admin_bp.route('/admin/ingest-gameweek', methods=['POST'])
+def ingest_gameweek():
+    """
+    Add only a new gameweek's rows instead of re-uploading the whole season
+    Expects a CSV file with key 'file' (same columns as fpl-data-stats.csv)
+    The rows are appended to the season CSV and folded into the running
+    aggregates; every output derived from the gameweek rows is refreshed
+    """
+    import pandas as pd
+    from pipeline import ingest_gameweeks
+    from pipeline.aggregates import GameweekAlreadyIngested
+    from pipeline.storage import parse_gameweek_csv
+    try:
+        if 'file' not in request.files or request.files['file'].filename == '':
+            return jsonify({
+                'success': False,
+                'message': 'No file provided'
+            }), 400
+        
+        file = request.files['file']
+        if not file.filename.endswith('.csv'):
+            return jsonify({
+                'success': False,
+                'message': 'Invalid file format. Please upload a CSV file'
+            }), 400
         
-        # Check if CSV file exists
         if not os.path.exists(Config.FPL_DATA_CSV):
             return jsonify({
                 'success': False,
                 'message': 'CSV file not found. Please upload fpl-data-stats.csv first.'
             }), 404
         
-        # Execute the notebook using nbconvert
-        # This runs the notebook and generates all JSON outputs
-        result = subprocess.run(
-            [
-                sys.executable, '-m', 'jupyter', 'nbconvert',
-                '--to', 'notebook',
-                '--execute',
-                '--inplace',
-                notebook_path
-            ],
-            capture_output=True,
-            text=True,
-            timeout=300  # 5 minute timeout
-        )
+        try:
+            new_rows = parse_gameweek_csv(file)
+        except pd.errors.EmptyDataError:
+            return jsonify({
+                'success': False,
+                'message': 'Uploaded file is empty or invalid CSV format'
+            }), 400
+        except (ValueError, TypeError) as e:
+            return jsonify({
+                'success': False,
+                'message': f'Error validating CSV: {str(e)}'
+            }), 400
+        
+        if new_rows.empty:
+            return jsonify({
+                'success': False,
+                'message': 'Uploaded CSV file is empty'
+            }), 400
+        
+        season_columns = pd.read_csv(Config.FPL_DATA_CSV, nrows=0).columns
+        missing_columns = [col for col in season_columns if col not in new_rows.columns]
+        if missing_columns:
+            return jsonify({
+                'success': False,
+                'message': f"Missing columns: {', '.join(missing_columns)}"
+            }), 400
         
-        if result.returncode != 0:
-            error_message = result.stderr if result.stderr else 'Unknown error during notebook execution'
+        try:
+            output_lines = []
+            # Waits for a background rebuild writing the same files
+            with data_lock(Config.DATA_DIR):
+                report = ingest_gameweeks(new_rows, log=output_lines.append)
+        except GameweekAlreadyIngested as e:
             return jsonify({
                 'success': False,
-                'message': f'Notebook execution failed: {error_message}'
-            }), 500
+                'message': str(e)
+            }), 409
+        
+        bump_data_version()
+        observe_stages(report['stages'])
         
+        gameweeks = ', '.join(map(str, report['gameweeks']))
         return jsonify({
             'success': True,
-            'message': 'Successfully processed data and updated all analytics files',
-            'output': result.stdout if result.stdout else 'Notebook executed successfully'
+            'message': f"Ingested {report['rows']} rows for gameweek {gameweeks} in {report['total_seconds']:.1f}s",
+            'gameweeks': report['gameweeks'],
+            'rows': report['rows'],
+            'output': '\n'.join(output_lines),
+            'timings': report['stages']
         }), 200
     
-    except subprocess.TimeoutExpired:
-        return jsonify({
-            'success': False,
-            'message': 'Notebook execution timed out (exceeded 5 minutes)'
-        }), 500
-    except FileNotFoundError:
+    except Exception as e:
         return jsonify({
             'success': False,
-            'message': 'Jupyter is not installed. Please install it with: pip install jupyter nbconvert'
+            'message': f'Error ingesting gameweek: {str(e)}'
         }), 500
-    except Exception as e:
+
+
+@admin_bp.route('/admin/refresh-cache', methods=['POST'])
+def refresh_cache():
+    """
+    Invalidate the in-process JSON cache so every data file is re-read
+    Use after data files were changed outside the admin endpoints
+    """
+    data_version = bump_data_version()
+    return jsonify({
+        'success': True,
+        'message': 'Data cache cleared',
+        'data_version': data_version,
+        'cache': get_cache_stats()
+    }), 200
+
+
+@admin_bp.route('/admin/snapshots', methods=['GET'])
+def get_snapshots():
+    """
+    List the published data snapshots (oldest first) and the one being served
+    """
+    current, _ = resolve_root(Config.DATA_DIR)
+    return jsonify({
+        'success': True,
+        'current': current,
+        'snapshots': list_snapshots(Config.DATA_DIR)
+    }), 200
+
+
+@admin_bp.route('/admin/rollback', methods=['POST'])
+def rollback_snapshot():
+    """
+    Serve an earlier data snapshot (instant; no output files are rewritten)
+    Optional JSON body: {"version": "..."} (default: the previous snapshot)
+    The running aggregates describe the newer data, so they are discarded
+    and the next ingest rebuilds them from the season CSV
+    """
+    from pipeline.aggregates import discard_state
+    body = request.get_json(silent=True) or {}
+    try:
+        with data_lock(Config.DATA_DIR):
+            version = rollback(Config.DATA_DIR, body.get('version'))
+            discard_state(Config.DATA_DIR)
+    except ValueError as e:
         return jsonify({
             'success': False,
-            'message': f'Error executing notebook: {str(e)}'
-        }), 500
+            'message': str(e)
+        }), 400
+    
+    bump_data_version()
+    return jsonify({
+        'success': True,
+        'message': f'Now serving snapshot {version}',
+        'current': version
+    }), 200
@@ -0,0 +1,23 @@
+# routes/bulk.py
+from flask import Blueprint, jsonify, request
+from utils.bulk import BULK_RESOURCES, bulk_response, parse_bulk_args, parse_bulk_body
+from utils.record_query import QueryError
+
+bulk_bp = Blueprint('bulk', __name__)
+
+@bulk_bp.route('/bulk', methods=['GET', 'POST'])
+def get_bulk():
+    """
+    Several resources in one response, all from the same data snapshot.
+    GET: ?resources=layout,overall_rankings,top-attacking_qp with per-resource
+    filters as <resource>.<param> (top-attacking_qp.position=MID).
+    POST: {"resources": {"top-attacking_qp": {"position": "MID"}, "layout": {}}}
+    """
+    try:
+        if request.method == 'POST':
+            resources = parse_bulk_body(request.get_json(silent=True))
+        else:
+            resources = parse_bulk_args(request.args)
+        return bulk_response(resources)
+    except QueryError as e:
+        return jsonify({"error": str(e), "available": list(BULK_RESOURCES)}), 400
@@ -0,0 +1,59 @@
+# routes/changes.py
+from flask import Blueprint, jsonify, request
+from config.config import Config
+from utils.data_loader import cached_json_response, current_snapshot, file_version
+from utils.deltas import DELTA_RESOURCES, FULL, change_chain, compose, read_changes
+from utils.snapshots import snapshot_path
+
+changes_bp = Blueprint('changes', __name__)
+
+@changes_bp.route('/changes')
+def get_changes():
+    """
+    What changed since the data version a client has (the "snapshot" of a
+    bulk response). Query params:
+    - since: the client's version (optional; without it every resource is sent in full)
+    - resources: comma-separated resource names (optional, default all)
+    Each resource is either {"mode": "delta", "key", "added", "changed",
+    "removed", "order", "fields"} or {"mode": "full", "data"}; unchanged
+    resources are left out of a delta response.
+    """
+    since = request.args.get('since', '').strip() or None
+    names = [name.strip() for name in request.args.get('resources', '').split(',') if name.strip()]
+    names = names or list(DELTA_RESOURCES)
+    unknown = [name for name in names if name not in DELTA_RESOURCES]
+    if unknown:
+        return jsonify({"error": f"Unknown resource(s): {', '.join(unknown)}",
+                        "available": list(DELTA_RESOURCES)}), 400
+
+    current, _ = current_snapshot()
+    if current is not None and since == current:
+        chain = []
+    elif current is not None and since is not None:
+        chain = change_chain(since, current, lambda version: read_changes(snapshot_path(Config.DATA_DIR, version)),
+                             Config.DELTA_MAX_VERSIONS)
+    else:
+        chain = None
+
+    def full(name):
+        return {'mode': 'full', 'data': file_version(DELTA_RESOURCES[name][0])[0]}
+
+    def build():
+        payload = {'version': current, 'since': since, 'mode': 'full' if chain is None else 'delta', 'resources': {}}
+        for name in names:
+            if chain is None:
+                payload['resources'][name] = full(name)
+                continue
+            _, _, key = DELTA_RESOURCES[name]
+            change = compose([changes['resources'].get(name) for changes in chain], key)
+            if change is None:
+                continue
+            if change is FULL or len(change['added']) + len(change['changed']) > Config.DELTA_FULL_RATIO * len(change['order']):
+                payload['resources'][name] = full(name)
+            else:
+                payload['resources'][name] = {'mode': 'delta', 'key': key, **change}
+        return payload
+
+    # Flat data (no snapshots) changes in place: version by the files too
+    versions = tuple(file_version(DELTA_RESOURCES[name][0])[1] for name in names)
+    return cached_json_response(('changes', since, tuple(names)), (current, versions), build)
@@ -1,6 +1,8 @@
 # routes/fixtures.py
 from flask import Blueprint, jsonify, request
-from utils.data_loader import load_json_data
+from utils.data_loader import json_response, cached_json_response
+from utils.fixture_store import get_fixture_store
+from utils.fixture_matrix import METRICS, get_fixture_matrix
 from datetime import datetime
 
 fixtures_bp = Blueprint('fixtures', __name__)
@@ -19,37 +21,105 @@ def home():
 
 @fixtures_bp.route('/layout')
 def get_layout():
-    data = load_json_data('layout.json')
-    if isinstance(data, dict) and "error" in data:
-        return jsonify(data), 404
-    return jsonify(data)
+    return json_response('layout.json')
 
 @fixtures_bp.route('/fixtures')
 def get_fixtures():
-    print("📊 Fetching fixtures data...")
-    data = load_json_data('fixture_analysis/fixtures.json')
-    if isinstance(data, dict) and "error" in data:
-        return jsonify(data), 404
+    """
+    All fixtures, or a slice of them:
+    ?gameweek= (or ?gw=) one gameweek, ?from= / ?to= a gameweek range,
+    ?team= one team's fixtures (name or short name), with ?next=N for the
+    N gameweeks starting at ?from= (default: the first upcoming gameweek)
+    """
     gameweek_param = request.args.get('gameweek', type=int)
     gw_param = request.args.get('gw', type=int)
     target_gw = gameweek_param or gw_param
+    team = request.args.get('team', '').strip()
+    start = request.args.get('from', type=int)
+    end = request.args.get('to', type=int)
+    next_gws = request.args.get('next', type=int)
+
+    if next_gws is not None and (not team or next_gws < 1):
+        return jsonify({"error": "next requires a team and a positive number of gameweeks"}), 400
+
+    store = get_fixture_store()
+    if not store.available:
+        return jsonify({"error": "No fixture data found"}), 404
+
     if target_gw is not None:
-        filtered = []
-        for fixture in data:
-            fixture_gw = fixture.get('gameweek') or fixture.get('gw')
-            if fixture_gw and int(fixture_gw) == target_gw:
-                filtered.append(fixture)
-        if filtered:
-            return jsonify(filtered)
+        key = ('gameweek', target_gw)
+        build = lambda: store.for_gameweek(target_gw) or None
+        not_found = f"No fixtures found for gameweek {target_gw}"
+    elif team:
+        key = ('team', team.lower(), start, end, next_gws)
+        if next_gws is not None:
+            build = lambda: store.next_gameweeks(team, next_gws, start)
         else:
-            return jsonify({"error": f"No fixtures found for gameweek {target_gw}"}), 404
-    return jsonify(data)
+            build = lambda: store.for_team(team, start, end)
+        not_found = f"No fixtures found for team {team}"
+    elif start is not None or end is not None:
+        key = ('range', start, end)
+        build = lambda: store.between(start, end)
+        not_found = None
+    else:
+        key = ('all',)
+        build = store.all
+        not_found = None
+
+    response = cached_json_response(('fixtures',) + key, store.signature, build, store.last_modified)
+    if response is None:
+        return jsonify({"error": not_found}), 404
+    return response
+
+
+@fixtures_bp.route('/fixtures/horizon')
+def get_fixture_horizon():
+    """
+    Fixture difficulty over a horizon, for every team (or ?team=):
+    ?length=N each team's easiest run of N consecutive fixtures (default 3),
+    ?window=W mean FDR of each window of W gameweeks;
+    ?metric=attack|defense|overall (default overall), ?from= / ?to= gameweek
+    range, ?limit= number of runs
+    """
+    metric = request.args.get('metric', 'overall').lower()
+    length = request.args.get('length', type=int)
+    window = request.args.get('window', type=int)
+    start = request.args.get('from', type=int)
+    end = request.args.get('to', type=int)
+    limit = request.args.get('limit', type=int)
+    team = request.args.get('team', '').strip()
+
+    if metric not in METRICS:
+        return jsonify({"error": f"metric must be one of: {', '.join(METRICS)}"}), 400
+    if any(value is not None and value < 1 for value in (length, window, limit)):
+        return jsonify({"error": "length, window and limit must be positive"}), 400
+    if length is None and window is None:
+        length = 3
+
+    matrix, store = get_fixture_matrix()
+    if not store.available:
+        return jsonify({"error": "No fixture data found"}), 404
+    teams = None
+    if team:
+        index = matrix.team_index(team)
+        if index is None:
+            return jsonify({"error": f"No fixtures found for team {team}"}), 404
+        teams = [index]
+
+    def build():
+        horizon = matrix.between(start, end)
+        result = {'metric': metric, 'gameweeks': horizon.gameweeks.tolist()}
+        if length is not None:
+            result['length'] = length
+            result['runs'] = horizon.best_runs(length, metric, teams)[:limit]
+        if window is not None:
+            result['rolling'] = horizon.rolling(window, metric, teams)
+        return result
+
+    key = ('fixture_horizon', metric, length, window, start, end, limit, teams and teams[0])
+    return cached_json_response(key, store.signature, build, store.last_modified)
 
 
 @fixtures_bp.route('/team_fixtures')
 def get_team_fixtures():
-    print("📊 Fetching team fixtures data...")
-    data = load_json_data('fixture_analysis/team_fixture_summary.json')
-    if isinstance(data, dict) and "error" in data:
-        return jsonify(data), 404
-    return jsonify(data)
\ No newline at end of file
+    return json_response('fixture_analysis/team_fixture_summary.json')
\ No newline at end of file
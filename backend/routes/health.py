@@ -1,41 +1,65 @@
 # routes/health.py
 from flask import Blueprint, jsonify
 from datetime import datetime
-import os
 from config.config import Config
+from utils.data_loader import current_manifest, get_cache_stats
+from utils.manifest import readiness
 
 health_bp = Blueprint('health', __name__)
 
+# Health and readiness are answered from the data manifest loaded in memory
+# (see utils.manifest): probes never touch the data files
+
 @health_bp.route('/test')
 def test_endpoint():
+    manifest = current_manifest()
     return jsonify({
         "status": "API is working!",
         "timestamp": datetime.now().isoformat(),
         "data_dir": Config.DATA_DIR,
-        "data_dir_exists": os.path.exists(Config.DATA_DIR)
+        "data_dir_exists": manifest['file_count'] > 0,
+        "snapshot": manifest['version']
     })
 
 @health_bp.route('/health')
 def health_check():
+    manifest = current_manifest()
+    ready, data_files = readiness(manifest)
     return jsonify({
         "status": "healthy",
+        "ready": ready,
         "timestamp": datetime.now().isoformat(),
-        "data_files": {
-            "fixtures": os.path.exists(os.path.join(Config.DATA_DIR, 'fixture_analysis/fixtures.json')),
-            "fixture_opportunities": os.path.exists(os.path.join(Config.DATA_DIR, 'fixture_analysis/fixture_opportunities.json')),
-            "team_fixtures": os.path.exists(os.path.join(Config.DATA_DIR, 'fixture_analysis/team_fixture_summary.json')),
-            "attacking_qp": os.path.exists(os.path.join(Config.DATA_DIR, 'quick_picks/attackingpicks.json')),
-            "defensive_qp": os.path.exists(os.path.join(Config.DATA_DIR, 'quick_picks/defensivepicks.json')),
-            "attack_rankings": os.path.exists(os.path.join(Config.DATA_DIR, 'rankings/attack_rankings.json')),
-            "defense_rankings": os.path.exists(os.path.join(Config.DATA_DIR, 'rankings/defense_rankings.json')),
-            "overall_rankings": os.path.exists(os.path.join(Config.DATA_DIR, 'rankings/overall_rankings.json')),
-            "assist_providers": os.path.exists(os.path.join(Config.DATA_DIR, 'top_performers/assist_providers.json')),
-            "defensive_leaders": os.path.exists(os.path.join(Config.DATA_DIR, 'top_performers/defensive_leaders.json')),
-            "goal_scorer_picks": os.path.exists(os.path.join(Config.DATA_DIR, 'top_performers/goal_scorer_picks.json')),
-            "hidden_gems": os.path.exists(os.path.join(Config.DATA_DIR, 'top_performers/hidden_gems.json')),
-            "overperformers": os.path.exists(os.path.join(Config.DATA_DIR, 'top_performers/overperformers.json')),
-            "season_performers": os.path.exists(os.path.join(Config.DATA_DIR, 'top_performers/season_performers.json')),
-            "sustainable_scorers": os.path.exists(os.path.join(Config.DATA_DIR, 'top_performers/sustainable_scorers.json')),
-            "value_players": os.path.exists(os.path.join(Config.DATA_DIR, 'top_performers/value_players.json'))
-        }
-    })
\ No newline at end of file
+        "cache": get_cache_stats(),
+        "data": {
+            "snapshot": manifest['version'],
+            "built_at": manifest['built_at'],
+            "files": manifest['file_count'],
+            "bytes": manifest['total_bytes'],
+            "manifest": manifest['source']
+        },
+        "data_files": data_files
+    })
+
+@health_bp.route('/ready')
+def readiness_check():
+    """
+    Readiness probe: 200 once every required data file is published, 503
+    before (route traffic to the instance only when ready)
+    """
+    manifest = current_manifest()
+    ready, data_files = readiness(manifest)
+    missing = [name for name, present in data_files.items() if not present]
+    return jsonify({
+        "ready": ready,
+        "snapshot": manifest['version'],
+        "missing": missing
+    }), 200 if ready else 503
+
+@health_bp.route('/manifest')
+def get_manifest():
+    """
+    The manifest of the data being served: every file with its size, row
+    count and checksum, the data version and the timings of the run that
+    built it
+    """
+    return jsonify(current_manifest())
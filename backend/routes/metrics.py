@@ -0,0 +1,13 @@
+# routes/metrics.py
+from flask import Blueprint, Response, current_app, jsonify
+from utils.metrics import render
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('/metrics')
+def get_metrics():
+    """Request, cache, data file and pipeline stage metrics (Prometheus text format)"""
+    if not current_app.config.get('METRICS_ENABLED'):
+        return jsonify({"error": "Metrics are disabled (METRICS_ENABLED=0)"}), 404
+    return Response(render(), headers={'Cache-Control': 'no-store'},
+                    content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,43 @@
+# routes/planner.py
+from flask import Blueprint, jsonify, request
+from utils.data_loader import json_response
+from utils.record_query import get_index
+from utils.squad_planner import (
+    PLAYER_SCORES_FILE, MIN_BUDGET, MAX_BUDGET, PlannerError, ScoreMatrix, SolverUnavailable,
+    load_solver, parse_formation
+)
+
+planner_bp = Blueprint('planner', __name__)
+
+@planner_bp.route('/squad-planner')
+def get_squad_planner():
+    """
+    Optimal 15-man squad and starting XI for ?budget= (£m, default 100),
+    ?formation= (default 3-4-3) and ?horizon= gameweeks (default 5)
+    starting at ?from= (default: the next gameweek)
+    """
+    try:
+        load_solver()
+    except SolverUnavailable:
+        return jsonify({"error": "The squad planner is not available (scipy is not installed)"}), 503
+    try:
+        budget = request.args.get('budget', 100.0, type=float)
+        horizon = request.args.get('horizon', 5, type=int)
+        start = request.args.get('from', type=int)
+        formation = request.args.get('formation', '3-4-3')
+        starters = parse_formation(formation)
+        if not MIN_BUDGET <= budget <= MAX_BUDGET:
+            raise PlannerError(f"budget must be between {MIN_BUDGET:g} and {MAX_BUDGET:g}")
+        if horizon < 1:
+            raise PlannerError("horizon must be positive")
+    except PlannerError as e:
+        return jsonify({"error": str(e)}), 400
+
+    def build(data):
+        result = get_index(PLAYER_SCORES_FILE, data, ScoreMatrix).solve(budget, starters, horizon, start)
+        return {'budget': budget, 'formation': formation, 'horizon': horizon, **result}
+
+    try:
+        return json_response(PLAYER_SCORES_FILE, variant=('squad', budget, formation, horizon, start), build=build)
+    except PlannerError as e:
+        return jsonify({"error": str(e)}), 400
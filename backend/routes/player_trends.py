@@ -1,79 +1,167 @@
 # routes/player_trends.py
 from flask import Blueprint, jsonify, request
-import json
-import os
+from utils.data_loader import cached_json_response, data_response, load_json_data, json_response
+from utils.log import get_logger
+from utils.player_index import get_player_index, get_search_index, normalize_name
+from utils.player_similarity import (
+    MAX_RESULTS, PLAYER_FEATURES_FILE, PlayerNotFound, SimilarityError, SimilarityIndex, parse_position
+)
+from utils.record_query import get_index
 
 player_trends_bp = Blueprint('player_trends', __name__)
+logger = get_logger(__name__)
 
-def load_json_data(filename):
-    """Helper function to load JSON data"""
-    try:
-        with open(filename, 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return None
+def _is_error(data):
+    return isinstance(data, dict) and "error" in data
 
 @player_trends_bp.route('/player-search')
 def get_player_search():
-    """Get list of all players for search"""
-    data = load_json_data('data/player_trends/all_players.json')
-    if data is None:
+    """
+    Get list of all players for search
+    Query params:
+    - q: search text (optional); matches name prefixes (any word) first, then close spellings
+    - limit: maximum number of matches for q (optional, default 10, max 50)
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
+        return json_response('player_trends/all_players.json')
+
+    data = load_json_data('player_trends/all_players.json')
+    if _is_error(data):
         return jsonify({"error": "Player data not found"}), 404
-    return jsonify(data)
+
+    limit = request.args.get('limit', 10, type=int)
+    limit = max(1, min(limit, 50))
+    players = get_search_index(data).search(query, limit)
+    return data_response({
+        "query": query,
+        "players": players,
+        "count": len(players)
+    })
 
 @player_trends_bp.route('/player-trends')
 def get_player_trends():
     """
     Get gameweek-by-gameweek trends for player(s)
     Query params:
-    - players: comma-separated player names (optional, if empty returns list of all players)
+    - players: comma-separated player names (optional, if empty returns list of all players);
+      case and accents are ignored
+    - ids: comma-separated player ids (optional, alternative to players)
     - limit_gws: number of recent gameweeks to return (optional, default all)
     """
     try:
         # Get query parameters
         players_param = request.args.get('players', '')
+        ids_param = request.args.get('ids', '')
         limit_gws = request.args.get('limit_gws', None)
         
+        if ids_param and not players_param:
+            index = get_player_index()
+            if index is None:
+                return jsonify({"error": "Player index not found. Run \"Process Data\" to build it."}), 404
+            ids = [int(player_id) for player_id in ids_param.split(',') if player_id.strip().isdigit()]
+            players_param = ','.join(index.by_id[player_id] for player_id in ids if player_id in index.by_id)
+            if not players_param:
+                return jsonify({"error": "No data found for specified players"}), 404
+        
         # If no players specified, return list of unique players from all_players.json
         if not players_param:
-            data = load_json_data('data/player_trends/all_players.json')
-            if data is None:
+            data = load_json_data('player_trends/all_players.json')
+            if _is_error(data):
                 return jsonify({"error": "Player data not found"}), 404
             
             # Return just the player names list for backwards compatibility
-            return jsonify({
+            return data_response({
                 "players": [player["name"] for player in data["players"]],
                 "total_count": data["count"]
             })
         
-        # Load detailed player data
-        all_player_data = load_json_data('data/player_trends/player_data.json')
-        if all_player_data is None:
-            return jsonify({"error": "Player data not found"}), 404
-        
         # Parse player names
         player_names = [p.strip() for p in players_param.split(',')]
         
-        # Get data for requested players
-        result = {}
-        for player_name in player_names:
-            if player_name in all_player_data:
-                player_data = all_player_data[player_name]
-                
-                # Apply gameweek limit if specified
-                if limit_gws:
-                    gameweeks = player_data["gameweeks"]
-                    limited_gameweeks = gameweeks[-int(limit_gws):] if len(gameweeks) > int(limit_gws) else gameweeks
-                    player_data = player_data.copy()
-                    player_data["gameweeks"] = limited_gameweeks
-                
-                result[player_name] = player_data
+        index = get_player_index()
+        if index is None:
+            # Data written before the player index existed
+            return _player_trends_from_file(player_names, limit_gws)
         
-        if not result:
+        # Read only the requested players' records
+        names = [index.resolve(name) for name in player_names]
+        names = [name for name in dict.fromkeys(names) if name is not None]
+        if not names:
             return jsonify({"error": "No data found for specified players"}), 404
-            
-        return jsonify(result)
+
+        def build():
+            result = index.read(names)
+            # Apply gameweek limit if specified (records are freshly parsed, so slice in place)
+            if limit_gws:
+                for player_data in result.values():
+                    player_data["gameweeks"] = player_data["gameweeks"][-int(limit_gws):]
+            return result
+
+        # Serialized once per data version (in every representation asked for)
+        key = ('player-trends', tuple(names), limit_gws)
+        return cached_json_response(key, (index.index_path, index.mtime, index.version), build)
     
     except Exception as e:
-        print(f"Error in get_player_trends: {str(e)}")
+        logger.exception("Error in get_player_trends")
         return jsonify({"error": str(e)}), 500
+
+
+def _player_trends_from_file(player_names, limit_gws):
+    """Player trends from the full player_data.json (used when no player index exists)"""
+    all_player_data = load_json_data('player_trends/player_data.json')
+    if _is_error(all_player_data):
+        return jsonify({"error": "Player data not found"}), 404
+    
+    result = {}
+    for player_name in player_names:
+        if player_name in all_player_data:
+            player_data = all_player_data[player_name]
+            if limit_gws:
+                player_data = {**player_data, "gameweeks": player_data["gameweeks"][-int(limit_gws):]}
+            result[player_name] = player_data
+    
+    if not result:
+        return jsonify({"error": "No data found for specified players"}), 404
+    return data_response(result)
+
+
+@player_trends_bp.route('/similar-players')
+def get_similar_players():
+    """
+    Players most similar to one player by per-90 output, cost and form
+    Query params:
+    - id or player: the reference player (id, or name with case and accents ignored)
+    - k: number of similar players (optional, default 10, max 50)
+    - position: GK, DEF, MID, FWD or any (optional, default the player's own position)
+    - min_price, max_price: price range in £m (optional)
+    - features: comma-separated features to compare on (optional, default all)
+    """
+    player_id = request.args.get('id', type=int)
+    name = request.args.get('player', '').strip()
+    if player_id is None and not name:
+        return jsonify({"error": "id or player is required"}), 400
+    try:
+        k = max(1, min(request.args.get('k', 10, type=int), MAX_RESULTS))
+        position = request.args.get('position')
+        element_type = parse_position(position) if position else False
+        min_price = request.args.get('min_price', type=float)
+        max_price = request.args.get('max_price', type=float)
+        features = [feature.strip() for feature in request.args.get('features', '').split(',') if feature.strip()]
+    except SimilarityError as e:
+        return jsonify({"error": str(e)}), 400
+
+    def build(data):
+        index = get_index(PLAYER_FEATURES_FILE, data, SimilarityIndex)
+        row = index.find(player_id, name)
+        # Same position as the reference player unless ?position= says otherwise
+        player_type = int(index.element_type[row]) if element_type is False else element_type
+        return index.similar(row, k, player_type, min_price, max_price, features)
+
+    try:
+        variant = ('similar', player_id, normalize_name(name), k, element_type, min_price, max_price, tuple(features))
+        return json_response(PLAYER_FEATURES_FILE, variant=variant, build=build)
+    except PlayerNotFound as e:
+        return jsonify({"error": str(e)}), 404
+    except SimilarityError as e:
+        return jsonify({"error": str(e)}), 400
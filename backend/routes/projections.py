@@ -0,0 +1,30 @@
+# routes/projections.py
+from flask import Blueprint, jsonify
+from pipeline.projections import PLAYER_PROJECTIONS_FILE
+from utils.data_loader import json_response
+from utils.record_query import PlayersIndex, get_index, query_response
+
+projections_bp = Blueprint('projections', __name__)
+
+@projections_bp.route('/projections')
+def get_projections():
+    """
+    Simulated points distributions of every current player over the next
+    gameweeks (expected points, spread, percentiles, haul/blank chances);
+    filter with ?team=, ?position=, ?max_cost=, order with ?sort=-expected_points
+    """
+    return query_response(PLAYER_PROJECTIONS_FILE, PlayersIndex)
+
+@projections_bp.route('/projections/<int:player_id>')
+def get_player_projection(player_id):
+    """Simulated points distribution of one player"""
+    def build(data):
+        player = get_index(PLAYER_PROJECTIONS_FILE, data, PlayersIndex).by_id.get(player_id)
+        if player is None:
+            return None
+        return {**{key: value for key, value in data.items() if key != 'players'}, 'player': player}
+
+    response = json_response(PLAYER_PROJECTIONS_FILE, variant=('player', player_id), build=build)
+    if response is None:
+        return jsonify({"error": f"No projection for player {player_id}"}), 404
+    return response
@@ -1,15 +1,23 @@
 # routes/quick_picks.py
-from flask import Blueprint, jsonify
-from utils.data_loader import load_json_data
+from flask import Blueprint
+from utils.record_query import query_response, PicksIndex
 
 quick_picks_bp = Blueprint('quick_picks', __name__)
 
 @quick_picks_bp.route('/top-attacking_qp')
 def get_top_attacking_qp():
-    data = load_json_data('quick_picks/attackingpicks.json')
-    return jsonify(data)
+    """
+    Attacking quick picks: team groups, each with its players. Player
+    filters keep the groups that still have players; sort, limit and offset
+    apply to the groups (X-Total-Count counts groups, not players)
+    """
+    return query_response('quick_picks/attackingpicks.json', PicksIndex)
 
 @quick_picks_bp.route('/top-defensive_qp')
 def get_top_defensive_qp():
-    data = load_json_data('quick_picks/defensivepicks.json')
-    return jsonify(data)
\ No newline at end of file
+    """
+    Defensive quick picks: team groups, each with its players. Player
+    filters keep the groups that still have players; sort, limit and offset
+    apply to the groups (X-Total-Count counts groups, not players)
+    """
+    return query_response('quick_picks/defensivepicks.json', PicksIndex)
\ No newline at end of file
@@ -1,20 +1,17 @@
 # routes/rankings.py
-from flask import Blueprint, jsonify
-from utils.data_loader import load_json_data
+from flask import Blueprint
+from utils.record_query import query_response, RankingsIndex
 
 rankings_bp = Blueprint('rankings', __name__)
 
 @rankings_bp.route('/attack_rankings')
 def get_attack_rankings():
-    data = load_json_data('rankings/attack_rankings.json')
-    return jsonify(data)
+    return query_response('rankings/attack_rankings.json', RankingsIndex)
 
 @rankings_bp.route('/defense_rankings')
 def get_defense_rankings():
-    data = load_json_data('rankings/defense_rankings.json')
-    return jsonify(data)
+    return query_response('rankings/defense_rankings.json', RankingsIndex)
 
 @rankings_bp.route('/overall_rankings')
 def get_overall_rankings():
-    data = load_json_data('rankings/overall_rankings.json')
-    return jsonify(data)
\ No newline at end of file
+    return query_response('rankings/overall_rankings.json', RankingsIndex)
\ No newline at end of file
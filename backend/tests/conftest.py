@@ -0,0 +1,6 @@
+# tests/conftest.py
+# Backend modules import each other from the backend directory (as app.py runs)
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
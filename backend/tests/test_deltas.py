@@ -0,0 +1,130 @@
+# tests/test_deltas.py
+# Composing the changes of several snapshots must give what a client would
+# get from diffing the first and last version directly
+import copy
+import random
+import pytest
+from utils.deltas import FULL, change_chain, compose, diff_resource
+
+
+def apply(data, change, records_key, key):
+    """A client's copy of `data` updated with a delta (as the frontend applies it)"""
+    records = data[records_key] if records_key is not None else data
+    by_key = {record[key]: record for record in records}
+    for record_key in change['removed']:
+        del by_key[record_key]
+    for record in change['added'] + change['changed']:
+        by_key[record[key]] = record
+    updated = [by_key[record_key] for record_key in change['order']]
+    if records_key is None:
+        return updated
+    return {**{name: value for name, value in data.items() if name != records_key},
+            **change['fields'], records_key: updated}
+
+
+def random_version(rng, previous, next_key):
+    """A new version of a {'gameweek', 'players'} file: records added, removed, changed and reordered"""
+    players = copy.deepcopy(previous['players'])
+    for _ in range(rng.randint(0, 3)):
+        if players:
+            players.pop(rng.randrange(len(players)))
+    for _ in range(rng.randint(0, 3)):
+        players.insert(rng.randint(0, len(players)), {'id': next_key(), 'points': rng.randint(0, 9)})
+    for player in players:
+        if rng.random() < 0.3:
+            player['points'] = rng.randint(0, 9)
+    if rng.random() < 0.3:
+        rng.shuffle(players)
+    gameweek = previous['gameweek'] + 1 if rng.random() < 0.5 else previous['gameweek']
+    return {'gameweek': gameweek, 'players': players}
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_composed_chain_matches_direct_diff(seed):
+    rng = random.Random(seed)
+    keys = iter(range(1000))
+    versions = [{'gameweek': 1, 'players': [{'id': next(keys), 'points': 0} for _ in range(8)]}]
+    for _ in range(rng.randint(1, 6)):
+        versions.append(random_version(rng, versions[-1], lambda: next(keys)))
+    # Keys removed and added back in a later version
+    if len(versions) > 2:
+        removed = [player for player in versions[0]['players']
+                   if player['id'] not in {p['id'] for p in versions[1]['players']}]
+        versions[-1]['players'].extend(copy.deepcopy(removed[:1]))
+
+    steps = [diff_resource(old, new, 'players', 'id') for old, new in zip(versions, versions[1:])]
+    composed = compose(steps, 'id')
+    direct = diff_resource(versions[0], versions[-1], 'players', 'id')
+
+    if direct is None:
+        if composed is not None:
+            assert apply(versions[0], composed, 'players', 'id') == versions[-1]
+        return
+    assert apply(versions[0], composed, 'players', 'id') == versions[-1]
+    assert sorted(record['id'] for record in composed['added']) == sorted(record['id'] for record in direct['added'])
+    assert sorted(composed['removed']) == sorted(direct['removed'])
+    assert composed['order'] == direct['order']
+    # Records changed back to their first value may still be sent, never the reverse
+    assert {record['id'] for record in direct['changed']} <= {record['id'] for record in composed['changed']}
+
+
+def test_removed_then_added_back_is_a_change():
+    v1 = [{'team': 'ARS', 'rank': 1}, {'team': 'CHE', 'rank': 2}]
+    v2 = [{'team': 'ARS', 'rank': 1}]
+    v3 = [{'team': 'CHE', 'rank': 1}, {'team': 'ARS', 'rank': 2}]
+    composed = compose([diff_resource(v1, v2, None, 'team'), diff_resource(v2, v3, None, 'team')], 'team')
+    assert composed['added'] == []
+    assert composed['removed'] == []
+    assert sorted(record['team'] for record in composed['changed']) == ['ARS', 'CHE']
+    assert apply(v1, composed, None, 'team') == v3
+
+
+def test_added_then_removed_is_not_sent():
+    v1 = [{'team': 'ARS', 'rank': 1}]
+    v2 = [{'team': 'ARS', 'rank': 1}, {'team': 'CHE', 'rank': 2}]
+    v3 = [{'team': 'ARS', 'rank': 1}]
+    composed = compose([diff_resource(v1, v2, None, 'team'), diff_resource(v2, v3, None, 'team')], 'team')
+    assert composed == {'added': [], 'changed': [], 'removed': [], 'order': ['ARS'], 'fields': {}}
+
+
+def test_fields_take_the_latest_value():
+    v1 = {'gameweek': 1, 'draws': 10, 'players': [{'id': 1}]}
+    v2 = {'gameweek': 2, 'draws': 10, 'players': [{'id': 1}]}
+    v3 = {'gameweek': 3, 'draws': 20, 'players': [{'id': 1}]}
+    composed = compose([diff_resource(v1, v2, 'players', 'id'), diff_resource(v2, v3, 'players', 'id')], 'id')
+    assert composed['fields'] == {'gameweek': 3, 'draws': 20}
+    assert apply(v1, composed, 'players', 'id') == v3
+
+
+def test_unchanged_and_full_steps():
+    assert compose([None, None], 'id') is None
+    step = diff_resource([{'id': 1}], [{'id': 2}], None, 'id')
+    assert compose([step, FULL, None], 'id') is FULL
+    # Records without their key cannot be diffed record by record
+    assert diff_resource([{'id': 1}], [{'name': 'x'}], None, 'id') is FULL
+
+
+def linear_history(count):
+    """changes.json of versions v1..v<count> (v0 has none: it was the first publish)"""
+    return {f'v{i}': {'previous': f'v{i - 1}', 'resources': {}} for i in range(1, count + 1)}
+
+
+def test_change_chain_follows_previous_links():
+    history = linear_history(5)
+    chain = change_chain('v2', 'v5', history.get, max_versions=4)
+    assert [changes['previous'] for changes in chain] == ['v2', 'v3', 'v4']
+
+
+def test_change_chain_stops_at_max_versions():
+    history = linear_history(5)
+    assert len(change_chain('v1', 'v5', history.get, max_versions=4)) == 4
+    assert change_chain('v0', 'v5', history.get, max_versions=4) is None
+
+
+def test_change_chain_unknown_or_missing_versions():
+    history = linear_history(3)
+    # Not in the history: the client needs full data
+    assert change_chain('other', 'v3', history.get, max_versions=10) is None
+    # A version without changes.json (published before deltas, or pruned)
+    del history['v2']
+    assert change_chain('v0', 'v3', history.get, max_versions=10) is None
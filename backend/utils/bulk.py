@@ -0,0 +1,110 @@
+# utils/bulk.py
+# Several data resources in one response (GET/POST /api/bulk): each
+# resource is read from the same snapshot, optionally filtered with the list
+# query parameters, and the whole response is serialized once and cached
+from pipeline.projections import PLAYER_PROJECTIONS_FILE
+from utils.data_loader import cached_json_response, current_snapshot, file_version
+from utils.record_query import PicksIndex, PlayersIndex, QueryError, RankingsIndex, get_index, parse_query, query_key
+
+# Resource name (the route's path below /api) -> (data file, index for ?filters or None)
+BULK_RESOURCES = {
+    'layout': ('layout.json', None),
+    'team_fixtures': ('fixture_analysis/team_fixture_summary.json', None),
+    'attack_rankings': ('rankings/attack_rankings.json', RankingsIndex),
+    'defense_rankings': ('rankings/defense_rankings.json', RankingsIndex),
+    'overall_rankings': ('rankings/overall_rankings.json', RankingsIndex),
+    'top-attacking_qp': ('quick_picks/attackingpicks.json', PicksIndex),
+    'top-defensive_qp': ('quick_picks/defensivepicks.json', PicksIndex),
+    'assist-gems': ('top_performers/assist_providers.json', None),
+    'def_lead': ('top_performers/defensive_leaders.json', None),
+    'goal_scorer-picks': ('top_performers/goal_scorers.json', None),
+    'hidden-gems': ('top_performers/hidden_gems.json', None),
+    'season-performers': ('top_performers/season_performers.json', None),
+    'value-players': ('top_performers/value_players.json', None),
+    'overperformers': ('performance_analysis/overperformers.json', None),
+    'underperformers': ('performance_analysis/underperformers.json', None),
+    'sustainable-scorers': ('performance_analysis/sustainable_scorers.json', None),
+    'all-players': ('player_trends/all_players.json', None),
+    'projections': (PLAYER_PROJECTIONS_FILE, PlayersIndex),
+}
+
+
+def parse_bulk_args(args):
+    """
+    ?resources=layout,top-attacking_qp&top-attacking_qp.position=MID&top-attacking_qp.limit=5
+    -> {'layout': {}, 'top-attacking_qp': {'position': 'MID', 'limit': '5'}}
+    """
+    names = [name.strip() for name in args.get('resources', '').split(',') if name.strip()]
+    resources = {name: {} for name in names}
+    for key, value in args.items():
+        name, separator, param = key.rpartition('.')
+        if separator and name in resources:
+            resources[name][param] = value
+        elif separator:
+            raise QueryError(f"Filter {key} is for a resource that was not requested")
+    return resources
+
+
+def parse_bulk_body(body):
+    """{"resources": {"layout": {}, "top-attacking_qp": {"position": "MID"}}} (or a list of names)"""
+    resources = body.get('resources') if isinstance(body, dict) else None
+    if isinstance(resources, list):
+        resources = {name: {} for name in resources}
+    if not isinstance(resources, dict) or not all(
+            isinstance(name, str) and isinstance(params, dict) for name, params in resources.items()):
+        raise QueryError('Expected {"resources": {name: {param: value}}} or {"resources": [name, ...]}')
+    return {name: {param: str(value) for param, value in params.items()} for name, params in resources.items()}
+
+
+def _normalize(resources):
+    """{name: normalized query or None}, validating names and filters"""
+    if not resources:
+        raise QueryError(f"No resources requested. Available: {', '.join(BULK_RESOURCES)}")
+    unknown = [name for name in resources if name not in BULK_RESOURCES]
+    if unknown:
+        raise QueryError(f"Unknown resource(s): {', '.join(unknown)}. Available: {', '.join(BULK_RESOURCES)}")
+    queries = {}
+    for name, params in resources.items():
+        query = parse_query(params)
+        unused = [param for param in params if query is None or param not in query]
+        if unused or (query is not None and BULK_RESOURCES[name][1] is None):
+            raise QueryError(f"Invalid filter(s) for {name}: {', '.join(params)}")
+        queries[name] = query
+    return queries
+
+
+def bulk_response(resources):
+    """
+    One response with every requested resource: {"snapshot", "resources":
+    {name: data}, "totals": {name: matches before pagination}} (totals for
+    filtered resources only). A resource whose file cannot be read is
+    returned as its {"error": ...}. Raises QueryError for invalid requests.
+    """
+    queries = _normalize(resources)
+    snapshot = current_snapshot()[0]
+    loaded = {}
+    versions = []
+    last_modified = None
+    for name in queries:
+        filename, _ = BULK_RESOURCES[name]
+        data, version, modified = file_version(filename)
+        loaded[name] = (data, version)
+        versions.append(version)
+        if modified is not None and (last_modified is None or modified > last_modified):
+            last_modified = modified
+
+    def build():
+        payload = {'snapshot': snapshot, 'resources': {}, 'totals': {}}
+        for name, query in queries.items():
+            data, version = loaded[name]
+            filename, index_class = BULK_RESOURCES[name]
+            if query is None or version is None:
+                payload['resources'][name] = data
+            else:
+                items, total = get_index(filename, data, index_class).query(query)
+                payload['resources'][name] = items
+                payload['totals'][name] = total
+        return payload
+
+    key = ('bulk', tuple((name, None if query is None else query_key(query)) for name, query in queries.items()))
+    return cached_json_response(key, (snapshot, tuple(versions)), build, last_modified)
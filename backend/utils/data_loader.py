@@ -1,23 +1,411 @@
 # utils/data_loader.py
+import gzip
+import hashlib
 import json
 import os
+import threading
+import time
+from datetime import datetime, timezone
+from flask import Response, g, has_request_context, jsonify, request
 from config.config import Config
+from utils.encodings import JSON_MIMETYPE, encode, negotiate_mimetype
+from utils.log import get_logger
+from utils.manifest import load_manifest
+from utils.metrics import FILE_LOAD_SECONDS, RESPONSE_CACHE, Gauge, register
+from utils.snapshots import resolve_root
 
-def load_json_data(filename):
-    """Load JSON data from the data directory"""
-    filepath = os.path.join(Config.DATA_DIR, filename)
-    print(f"🔍 Attempting to load: {filepath}")
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+logger = get_logger(__name__)
+
+
+class _Payload:
+    """One serialized response body plus its ETag, compressed variants and extra headers"""
+    __slots__ = ('body', 'etag', 'encoded', 'headers')
+
+    def __init__(self, body, headers=None):
+        self.body = body
+        self.etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        self.encoded = {}
+        self.headers = headers or {}
+
+    def encode(self, encoding):
+        """Return the body compressed with `encoding`, computing it only once"""
+        encoded = self.encoded.get(encoding)
+        if encoded is None:
+            if encoding == 'br':
+                encoded = brotli.compress(self.body, quality=Config.BROTLI_QUALITY)
+            else:
+                encoded = gzip.compress(self.body, compresslevel=Config.GZIP_LEVEL, mtime=0)
+            self.encoded[encoding] = encoded
+        return encoded
+
+
+class _CacheEntry:
+    """Parsed data and serialized response payloads for one data file"""
+    __slots__ = ('data', 'payloads', 'mtime', 'size', 'checked_at', 'version')
+
+    def __init__(self, data, mtime, size, version):
+        self.data = data
+        # Response payloads keyed by variant (None = the whole file)
+        self.payloads = {}
+        self.mtime = mtime
+        self.size = size
+        self.checked_at = time.monotonic()
+        self.version = version
+
+    @property
+    def last_modified(self):
+        if self.mtime is None:
+            return None
+        return datetime.fromtimestamp(int(self.mtime), tz=timezone.utc)
+
+
+# Process-wide cache keyed by absolute file path
+_cache = {}
+_cache_lock = threading.Lock()
+_cache_stats = {'hits': 0, 'misses': 0, 'reloads': 0, 'errors': 0}
+
+# Bumped by the admin routes whenever the data files are rewritten
+_data_version = 0
+
+# Snapshot being served: (version, root directory, monotonic time the pointer was read, data version)
+_snapshot = None
+
+
+def _active_snapshot():
+    """The published snapshot, re-reading the CURRENT pointer at most once per check interval"""
+    global _snapshot
+    now = time.monotonic()
+    snapshot = _snapshot
+    if (snapshot is None or snapshot[3] != _data_version
+            or now - snapshot[2] >= Config.DATA_CACHE_CHECK_INTERVAL):
+        version, root = resolve_root(Config.DATA_DIR)
+        if snapshot is not None and (version, root) != snapshot[:2]:
+            # Everything cached belongs to the previous snapshot
+            with _cache_lock:
+                _cache.clear()
+                _derived.clear()
+            logger.info("🔀 Serving data snapshot", extra={'snapshot': version})
+        snapshot = (version, root, now, _data_version)
+        _snapshot = snapshot
+    return snapshot
+
+
+def current_snapshot():
+    """
+    (version, root directory) of the data served to the current request.
+    A request keeps the snapshot it first saw, so every file it reads comes
+    from the same version even if a new one is published meanwhile.
+    version is None for data written before snapshots existed.
+    """
+    if has_request_context():
+        bound = g.get('data_snapshot')
+        if bound is None:
+            bound = g.data_snapshot = _active_snapshot()[:2]
+        return bound
+    return _active_snapshot()[:2]
+
+
+def current_manifest():
+    """
+    Manifest of the snapshot being served (files, sizes, row counts,
+    checksums, build timings), read once per version (see utils.manifest)
+    """
+    version, root = current_snapshot()
+    return load_manifest(root, version, _data_version)
+
+
+def data_path(filename):
+    """Absolute path of a data file in the snapshot being served"""
+    return os.path.join(current_snapshot()[1], filename)
+
+
+def _read_json_file(filepath, filename):
+    """Read and parse a JSON file, returning (data, error)"""
     try:
         with open(filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            print(f"✅ Successfully loaded {filename} with {len(data) if isinstance(data, list) else 'N/A'} items")
-            return data
+            return json.load(f), None
     except FileNotFoundError:
-        print(f"❌ File not found: {filepath}")
-        return {"error": f"Data file {filename} not found at {filepath}"}
+        logger.error("❌ Data file not found", extra={'path': filepath})
+        return None, {"error": f"Data file {filename} not found at {filepath}"}
     except json.JSONDecodeError as e:
-        print(f"❌ JSON decode error in {filename}: {e}")
-        return {"error": f"Invalid JSON in {filename}: {str(e)}"}
+        logger.error("❌ JSON decode error", extra={'file': filename, 'error': str(e)})
+        return None, {"error": f"Invalid JSON in {filename}: {str(e)}"}
     except UnicodeDecodeError as e:
-        print(f"❌ Encoding error in {filename}: {e}")
-        return {"error": f"Encoding error in {filename}: {str(e)}"}
\ No newline at end of file
+        logger.error("❌ Encoding error", extra={'file': filename, 'error': str(e)})
+        return None, {"error": f"Encoding error in {filename}: {str(e)}"}
+
+
+def _get_entry(filename):
+    """
+    Return (entry, error) for a data file, reading it from disk only when
+    it is not cached, the data version was bumped, or the file's mtime/size
+    changed since it was last stat'ed. Files of a published snapshot never
+    change, so they are not stat'ed again once cached.
+    """
+    snapshot_version, root = current_snapshot()
+    filepath = os.path.join(root, filename)
+    now = time.monotonic()
+
+    entry = _cache.get(filepath)
+    if entry is not None and entry.version == _data_version:
+        if snapshot_version is not None:
+            _cache_stats['hits'] += 1
+            return entry, None
+        # Only stat the file once per check interval so steady-state hits
+        # touch neither the disk nor the JSON decoder
+        if now - entry.checked_at < Config.DATA_CACHE_CHECK_INTERVAL:
+            _cache_stats['hits'] += 1
+            return entry, None
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            stat = None
+        if stat is not None and stat.st_mtime == entry.mtime and stat.st_size == entry.size:
+            entry.checked_at = now
+            _cache_stats['hits'] += 1
+            return entry, None
+
+    with _cache_lock:
+        # Another thread may have reloaded the file while we waited
+        current = _cache.get(filepath)
+        if current is not None and current is not entry and current.version == _data_version:
+            _cache_stats['hits'] += 1
+            return current, None
+
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            stat = None
+
+        start = time.perf_counter()
+        data, error = _read_json_file(filepath, filename)
+        FILE_LOAD_SECONDS.observe(time.perf_counter() - start, filename)
+        if error is not None:
+            _cache_stats['errors'] += 1
+            _cache.pop(filepath, None)
+            return None, error
+
+        if entry is None:
+            _cache_stats['misses'] += 1
+        else:
+            _cache_stats['reloads'] += 1
+            logger.info("🔄 Reloaded data file (changed on disk)", extra={'file': filename})
+
+        new_entry = _CacheEntry(
+            data,
+            stat.st_mtime if stat else None,
+            stat.st_size if stat else None,
+            _data_version
+        )
+        _cache[filepath] = new_entry
+        return new_entry, None
+
+
+def load_json_data(filename):
+    """Load JSON data from the data directory (served from the in-process cache)"""
+    entry, error = _get_entry(filename)
+    if error is not None:
+        return error
+    return entry.data
+
+
+def file_version(filename):
+    """
+    (parsed data, version key, Last-Modified) of a data file, loading it if
+    needed. The key changes whenever the cached copy is reloaded, so it can
+    version responses assembled from several files. Returns (error, None,
+    None) if the file cannot be read.
+    """
+    entry, error = _get_entry(filename)
+    if error is not None:
+        return error, None, None
+    return entry.data, (entry.version, entry.mtime, entry.size), entry.last_modified
+
+
+def _serialize(data, mimetype=JSON_MIMETYPE):
+    """Serialize as `mimetype` (JSON, MessagePack or columnar JSON; see utils.encodings.encode)"""
+    return encode(data, mimetype)
+
+
+def _payload_key(key, mimetype):
+    # JSON payloads keep the plain key; other representations are cached beside them
+    return key if mimetype == JSON_MIMETYPE else (mimetype, key)
+
+
+def _negotiate_encoding(payload):
+    """Pick the best compression the client accepts for this payload"""
+    if len(payload.body) < Config.COMPRESSION_MIN_SIZE:
+        return None
+    offered = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return request.accept_encodings.best_match(offered)
+
+
+def _conditional_response(payload, last_modified, mimetype=JSON_MIMETYPE):
+    """
+    Build a response for a payload with a strong ETag and Last-Modified,
+    answering If-None-Match / If-Modified-Since with 304 Not Modified.
+    """
+    encoding = _negotiate_encoding(payload)
+    if encoding is None:
+        body = payload.body
+        etag = payload.etag
+    else:
+        body = payload.encode(encoding)
+        # Each encoding is a different representation and needs its own strong ETag
+        etag = f"{payload.etag}-{encoding}"
+
+    response = Response(body, mimetype=mimetype)
+    response.headers.update(payload.headers)
+    if encoding is not None:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept')
+    response.vary.add('Accept-Encoding')
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = Config.DATA_CACHE_CONTROL
+    return response.make_conditional(request)
+
+
+def json_response(filename, variant=None, build=None):
+    """
+    Build a JSON response for a data file from its cached, pre-serialized body.
+
+    `build` derives the response data from the file's parsed data (e.g. a
+    filtered subset); its serialized result is cached under `variant` until
+    the file changes. `build` may also return (data, headers) to attach extra
+    response headers to that variant. If `build` returns None, json_response
+    returns None so the route can answer with its own "not found" message.
+    File errors are returned as {"error": "..."} with a 404 status.
+
+    The body is JSON, or the compact representation the Accept header asks
+    for (MessagePack, columnar JSON), each serialized once per data version.
+    """
+    entry, error = _get_entry(filename)
+    if error is not None:
+        return jsonify(error), 404
+
+    mimetype = negotiate_mimetype()
+    payload_key = _payload_key(variant, mimetype)
+    payload = entry.payloads.get(payload_key)
+    if payload is not None:
+        RESPONSE_CACHE.inc('hit')
+    else:
+        RESPONSE_CACHE.inc('miss')
+        data = entry.data if build is None else build(entry.data)
+        if data is None:
+            return None
+        headers = None
+        if isinstance(data, tuple):
+            data, headers = data
+        if len(entry.payloads) >= Config.DATA_CACHE_MAX_VARIANTS:
+            entry.payloads.clear()
+        payload = _Payload(_serialize(data, mimetype), headers)
+        entry.payloads[payload_key] = payload
+    return _conditional_response(payload, entry.last_modified, mimetype)
+
+
+# Payloads for data not backed by a single file, keyed by caller key: (version, payload)
+_derived = {}
+
+
+def cached_json_response(key, version, build, last_modified=None):
+    """
+    Build a JSON response for data assembled in memory (e.g. from several
+    files). The serialized result of `build()` is cached under `key` and
+    reused while `version` is unchanged. Like json_response, `build` may
+    return (data, headers), a None result is returned as None, and the
+    representation follows the Accept header.
+    """
+    mimetype = negotiate_mimetype()
+    key = _payload_key(key, mimetype)
+    cached = _derived.get(key)
+    if cached is not None and cached[0] == version:
+        RESPONSE_CACHE.inc('hit')
+    else:
+        RESPONSE_CACHE.inc('miss')
+        data = build()
+        if data is None:
+            return None
+        headers = None
+        if isinstance(data, tuple):
+            data, headers = data
+        if len(_derived) >= Config.DATA_CACHE_MAX_VARIANTS:
+            _derived.clear()
+        cached = (version, _Payload(_serialize(data, mimetype), headers))
+        _derived[key] = cached
+    return _conditional_response(cached[1], last_modified, mimetype)
+
+
+def data_response(data):
+    """
+    Response for data built per request (not cached): in the representation
+    the Accept header asks for, compressed and with an ETag like the cached
+    responses
+    """
+    mimetype = negotiate_mimetype()
+    return _conditional_response(_Payload(_serialize(data, mimetype)), None, mimetype)
+
+
+def warm_cache(filenames, encodings=('br', 'gzip')):
+    """
+    Load data files into the cache together with their whole-file response
+    payloads, compressed with every available `encoding` (needs an app
+    context). Used to preload the data once before the server forks its
+    workers. Returns the number of body bytes cached (uncompressed).
+    """
+    available = [encoding for encoding in encodings if encoding != 'br' or brotli is not None]
+    cached_bytes = 0
+    for filename in filenames:
+        entry, error = _get_entry(filename)
+        if error is not None:
+            continue
+        payload = entry.payloads.get(None)
+        if payload is None:
+            payload = entry.payloads[None] = _Payload(_serialize(entry.data))
+        if len(payload.body) >= Config.COMPRESSION_MIN_SIZE:
+            for encoding in available:
+                payload.encode(encoding)
+        cached_bytes += len(payload.body)
+    return cached_bytes
+
+
+def bump_data_version():
+    """Invalidate every cached data file (call after the data files are rewritten)"""
+    global _data_version
+    with _cache_lock:
+        _data_version += 1
+        _cache.clear()
+        _derived.clear()
+    return _data_version
+
+
+def get_data_version():
+    """Current data version (incremented on every explicit bump)"""
+    return _data_version
+
+
+def get_cache_stats():
+    """Hit/miss/reload counters and the files currently cached"""
+    return {
+        **_cache_stats,
+        'data_version': _data_version,
+        'snapshot': _active_snapshot()[0],
+        'cached_files': len(_cache)
+    }
+
+
+def _collect_cache_stats():
+    stats = dict(_cache_stats)
+    lookups = stats['hits'] + stats['misses'] + stats['reloads']
+    return [(('hit_ratio',), stats['hits'] / lookups if lookups else 0.0),
+            (('cached_files',), len(_cache))] + [((name,), value) for name, value in stats.items()]
+
+
+register(Gauge('fpl_data_cache', 'Data file cache counters (hits, misses, reloads, errors), hit ratio and size',
+               ('stat',), _collect_cache_stats))
@@ -0,0 +1,203 @@
+# utils/deltas.py
+# Per-resource changes between consecutive data snapshots. Publishing a
+# snapshot writes changes.json next to its outputs: for every resource, the
+# records added, changed and removed since the previous version, keyed by
+# team, player or id. GET /api/changes composes the changes of the versions
+# a client missed, so it can update its copies instead of re-downloading them.
+import json
+import os
+import threading
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+CHANGES_FILE = 'changes.json'
+
+# Resource name (the route's path below /api) -> (data file, key of the
+# record list in the file or None for a list file, record key field)
+DELTA_RESOURCES = {
+    'attack_rankings': ('rankings/attack_rankings.json', None, 'team'),
+    'defense_rankings': ('rankings/defense_rankings.json', None, 'team'),
+    'overall_rankings': ('rankings/overall_rankings.json', None, 'team'),
+    'top-attacking_qp': ('quick_picks/attackingpicks.json', None, 'team'),
+    'top-defensive_qp': ('quick_picks/defensivepicks.json', None, 'team'),
+    'team_fixtures': ('fixture_analysis/team_fixture_summary.json', None, 'team'),
+    'assist-gems': ('top_performers/assist_providers.json', None, 'player'),
+    'def_lead': ('top_performers/defensive_leaders.json', None, 'player'),
+    'goal_scorer-picks': ('top_performers/goal_scorers.json', None, 'player'),
+    'hidden-gems': ('top_performers/hidden_gems.json', None, 'player'),
+    'season-performers': ('top_performers/season_performers.json', None, 'player'),
+    'value-players': ('top_performers/value_players.json', None, 'player'),
+    'overperformers': ('performance_analysis/overperformers.json', None, 'player'),
+    'underperformers': ('performance_analysis/underperformers.json', None, 'player'),
+    'sustainable-scorers': ('performance_analysis/sustainable_scorers.json', None, 'player'),
+    'all-players': ('player_trends/all_players.json', 'players', 'id'),
+    'projections': ('projections/player_projections.json', 'players', 'id'),
+}
+
+# A resource whose changes cannot be expressed record by record
+FULL = {'full': True}
+
+
+def _records(data, records_key, key):
+    """(records by key in file order, other top-level fields) or None if the shape does not fit"""
+    records = data.get(records_key) if records_key is not None and isinstance(data, dict) else data
+    if not isinstance(records, list) or not all(isinstance(record, dict) and key in record for record in records):
+        return None
+    by_key = {record[key]: record for record in records}
+    if len(by_key) != len(records):
+        return None
+    fields = {name: value for name, value in data.items() if name != records_key} if records_key is not None else {}
+    return by_key, fields
+
+
+def diff_resource(old, new, records_key, key):
+    """
+    Changes from `old` to `new` parsed data: {"added": [records], "changed":
+    [records], "removed": [keys], "order": [keys in new order], "fields":
+    {changed top-level fields}}, None when nothing changed, FULL when the
+    data is not a list of uniquely keyed records
+    """
+    old_records, new_records = _records(old, records_key, key), _records(new, records_key, key)
+    if old_records is None or new_records is None:
+        return FULL
+    (old_by_key, old_fields), (new_by_key, new_fields) = old_records, new_records
+    added = [record for record_key, record in new_by_key.items() if record_key not in old_by_key]
+    changed = [record for record_key, record in new_by_key.items()
+               if record_key in old_by_key and old_by_key[record_key] != record]
+    removed = [record_key for record_key in old_by_key if record_key not in new_by_key]
+    fields = {name: new_fields.get(name) for name in old_fields.keys() | new_fields.keys()
+              if old_fields.get(name) != new_fields.get(name)}
+    if not (added or changed or removed or fields) and list(old_by_key) == list(new_by_key):
+        return None
+    return {'added': added, 'changed': changed, 'removed': removed, 'order': list(new_by_key), 'fields': fields}
+
+
+def _load(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def build_changes(previous_root, new_root, previous_version):
+    """changes.json content for a snapshot in new_root published after previous_root"""
+    resources = {}
+    for name, (filename, records_key, key) in DELTA_RESOURCES.items():
+        old_path, new_path = os.path.join(previous_root, filename), os.path.join(new_root, filename)
+        old_exists, new_exists = os.path.exists(old_path), os.path.exists(new_path)
+        if not old_exists and not new_exists:
+            continue
+        if old_exists and new_exists and os.path.samefile(old_path, new_path):
+            # Hard-linked from the previous snapshot: not rewritten
+            continue
+        old, new = _load(old_path) if old_exists else None, _load(new_path) if new_exists else None
+        change = FULL if old is None or new is None else diff_resource(old, new, records_key, key)
+        if change is not None:
+            resources[name] = change
+    return {'previous': previous_version, 'resources': resources}
+
+
+def write_changes(staging, previous_root, previous_version):
+    """
+    Write changes.json into a staged snapshot (replacing the copy seeded
+    from the previous one). Without a previous version, or if the diff
+    fails, no file is written and clients of older versions get full data.
+    """
+    path = os.path.join(staging, CHANGES_FILE)
+    if os.path.exists(path):
+        os.remove(path)
+    if previous_version is None:
+        return None
+    try:
+        changes = build_changes(previous_root, staging, previous_version)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(changes, f, ensure_ascii=False)
+    except Exception:
+        logger.exception("❌ Could not compute data changes", extra={'previous': previous_version})
+        if os.path.exists(path):
+            os.remove(path)
+        return None
+    return changes
+
+
+# changes.json of published snapshots (immutable once published), by path
+_changes = {}
+_changes_lock = threading.Lock()
+_MAX_CACHED_CHANGES = 32
+
+
+def read_changes(snapshot_root):
+    """The parsed changes.json of a snapshot directory, or None"""
+    path = os.path.join(snapshot_root, CHANGES_FILE)
+    if path not in _changes:
+        changes = _load(path)
+        with _changes_lock:
+            if len(_changes) >= _MAX_CACHED_CHANGES:
+                _changes.clear()
+            _changes[path] = changes
+    return _changes[path]
+
+
+def compose(steps, key):
+    """
+    One resource's changes over several versions (oldest first; None for a
+    version that did not change it), as if diffed in one step
+    """
+    records = {}
+    added = set()
+    removed = {}
+    order = None
+    fields = {}
+    for step in steps:
+        if step is None:
+            continue
+        if step.get('full'):
+            return FULL
+        for record in step['added']:
+            # Removed and added back: changed since the first version
+            if removed.pop(record[key], None) is None:
+                added.add(record[key])
+            records[record[key]] = record
+        for record in step['changed']:
+            records[record[key]] = record
+        for record_key in step['removed']:
+            records.pop(record_key, None)
+            if record_key in added:
+                added.discard(record_key)
+            else:
+                removed[record_key] = True
+        order = step['order']
+        fields.update(step['fields'])
+    if order is None:
+        return None
+    return {
+        'added': [record for record_key, record in records.items() if record_key in added],
+        'changed': [record for record_key, record in records.items() if record_key not in added],
+        'removed': list(removed),
+        'order': order,
+        'fields': fields
+    }
+
+
+def change_chain(since, current, read, max_versions):
+    """
+    changes.json of every version after `since` up to `current`, oldest
+    first, by following each version's "previous" link back from current;
+    None if `since` is not reached within max_versions (unknown, pruned or
+    too old: the client needs full data)
+    """
+    chain = []
+    version = current
+    while len(chain) < max_versions:
+        changes = read(version)
+        if changes is None:
+            return None
+        chain.append(changes)
+        if changes['previous'] == since:
+            return chain[::-1]
+        version = changes['previous']
+        if version is None:
+            return None
+    return None
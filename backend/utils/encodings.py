@@ -0,0 +1,96 @@
+# utils/encodings.py
+# Response representations chosen by the Accept header: JSON (encoded with
+# orjson when available), MessagePack, and columnar JSON where every list of
+# records becomes {"columns": [...], "rows": [[...], ...]} so keys are sent
+# once per list instead of once per record
+from flask import current_app, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, the stdlib encoder is the fallback
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # MessagePack responses are only offered when msgpack is installed
+    msgpack = None
+
+JSON_MIMETYPE = 'application/json'
+MSGPACK_MIMETYPE = 'application/msgpack'
+COLUMNAR_MIMETYPE = 'application/vnd.fpl.columnar+json'
+
+# Also accepted for MessagePack
+MSGPACK_ALIASES = ('application/x-msgpack',)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson: same output structure as the
+    default provider (sorted keys, dates as HTTP dates through `default`),
+    compact and UTF-8 instead of ASCII-escaped
+    """
+
+    def _options(self):
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME
+        return options | orjson.OPT_SORT_KEYS if self.sort_keys else options
+
+    def dumps_bytes(self, obj):
+        return orjson.dumps(obj, default=self.default, option=self._options())
+
+    def dumps(self, obj, **kwargs):
+        if kwargs.keys() - {'default'}:
+            # Pretty-printing (debug responses) and other stdlib options
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+
+def to_columnar(data):
+    """
+    Columnar form of parsed JSON data: every non-empty list of objects becomes
+    {"columns": [keys in first-seen order], "rows": [[values], ...]} (a key
+    missing from a record is null in its row), recursively
+    """
+    if isinstance(data, dict):
+        return {key: to_columnar(value) for key, value in data.items()}
+    if isinstance(data, list):
+        if data and all(isinstance(item, dict) for item in data):
+            columns = list(dict.fromkeys(key for item in data for key in item))
+            return {
+                'columns': columns,
+                'rows': [[to_columnar(item.get(column)) for column in columns] for item in data]
+            }
+        return [to_columnar(item) for item in data]
+    return data
+
+
+def offered_mimetypes():
+    """Representations this server can produce, JSON first (the default for */*)"""
+    offered = [JSON_MIMETYPE, COLUMNAR_MIMETYPE]
+    if msgpack is not None:
+        offered.append(MSGPACK_MIMETYPE)
+        offered.extend(MSGPACK_ALIASES)
+    return offered
+
+
+def negotiate_mimetype():
+    """The representation the current request asks for (JSON unless it prefers another)"""
+    mimetype = request.accept_mimetypes.best_match(offered_mimetypes(), default=JSON_MIMETYPE)
+    return MSGPACK_MIMETYPE if mimetype in MSGPACK_ALIASES else mimetype
+
+
+def encode(data, mimetype=JSON_MIMETYPE):
+    """Serialize data as `mimetype` (JSON bytes match jsonify's, with its trailing newline)"""
+    if mimetype == MSGPACK_MIMETYPE:
+        return msgpack.packb(data, use_bin_type=True)
+    if mimetype == COLUMNAR_MIMETYPE:
+        data = to_columnar(data)
+    dumps_bytes = getattr(current_app.json, 'dumps_bytes', None)
+    if dumps_bytes is not None:
+        return dumps_bytes(data) + b"\n"
+    return (current_app.json.dumps(data) + "\n").encode('utf-8')
@@ -0,0 +1,192 @@
+# utils/fixture_matrix.py
+# Teams × gameweeks fixture difficulty arrays for horizon queries (best runs
+# of N fixtures, rolling gameweek windows), answered for all teams at once
+import threading
+import numpy as np
+from utils.fixture_store import fixture_gameweek, get_fixture_store
+
+METRICS = ('attack', 'defense', 'overall')
+
+
+class FixtureMatrix:
+    """
+    FDR of every team's fixtures, laid out two ways:
+    - totals/counts: (teams, gameweeks) sums of FDR per metric and fixture
+      counts, so blank and double gameweeks are explicit (rolling windows)
+    - sequences: (teams, fixture slots) side indices in gameweek order,
+      -1 past a team's last fixture (runs of N consecutive fixtures)
+    FDR comes from the exported fixtures, so home/away advantages are
+    already applied (1-10, lower = easier).
+    """
+
+    def __init__(self, teams, short_names, team, gameweek, opponent, is_home, fdr):
+        self.teams = teams
+        self.short_names = short_names
+        # One entry per team per fixture ("side")
+        self.team = team
+        self.gameweek = gameweek
+        self.opponent = opponent
+        self.is_home = is_home
+        self.fdr = fdr
+        self._lookup = {}
+        for index, (name, short_name) in enumerate(zip(teams, short_names)):
+            self._lookup[name.lower()] = index
+            self._lookup.setdefault(short_name.lower(), index)
+
+        if len(gameweek):
+            self.gameweeks = np.arange(gameweek.min(), gameweek.max() + 1)
+        else:
+            self.gameweeks = np.arange(0)
+        column = gameweek - (self.gameweeks[0] if len(self.gameweeks) else 0)
+        self.counts = np.zeros((len(teams), len(self.gameweeks)), dtype=int)
+        np.add.at(self.counts, (team, column), 1)
+        self.totals = np.zeros((len(teams), len(self.gameweeks), len(METRICS)))
+        np.add.at(self.totals, (team, column), fdr)
+
+        order = np.lexsort((gameweek, team))
+        first = np.searchsorted(team[order], np.arange(len(teams)))
+        slot = np.arange(len(order)) - first[team[order]]
+        self.sequences = np.full((len(teams), slot.max() + 1 if len(order) else 0), -1)
+        self.sequences[team[order], slot] = order
+
+    @classmethod
+    def from_fixtures(cls, fixtures):
+        """Matrix of fixture records as exported to fixtures.json (both sides of each fixture)"""
+        names = {}
+        sides = []
+        for fixture in fixtures:
+            gameweek = fixture_gameweek(fixture)
+            home, away = fixture.get('home_team'), fixture.get('away_team')
+            if gameweek is None or not isinstance(home, dict) or not isinstance(away, dict):
+                continue
+            for side, opponent, is_home in ((home, away, True), (away, home, False)):
+                names.setdefault(side['name'], side.get('short_name') or side['name'])
+                names.setdefault(opponent['name'], opponent.get('short_name') or opponent['name'])
+                fdr = side.get('fdr', {})
+                sides.append((side['name'], gameweek, opponent['name'], is_home, [fdr.get(metric) for metric in METRICS]))
+
+        teams = sorted(names)
+        index = {name: i for i, name in enumerate(teams)}
+        return cls(
+            teams,
+            [names[name] for name in teams],
+            np.array([index[name] for name, _, _, _, _ in sides], dtype=int),
+            np.array([gameweek for _, gameweek, _, _, _ in sides], dtype=int),
+            np.array([index[opponent] for _, _, opponent, _, _ in sides], dtype=int),
+            np.array([is_home for _, _, _, is_home, _ in sides], dtype=bool),
+            np.array([fdr for _, _, _, _, fdr in sides], dtype=float).reshape(len(sides), len(METRICS))
+        )
+
+    def team_index(self, team):
+        """Index of a team by name or short name (case-insensitive), or None"""
+        return self._lookup.get(team.lower())
+
+    def between(self, start=None, end=None):
+        """Matrix of the fixtures with start <= gameweek <= end"""
+        keep = np.ones(len(self.gameweek), dtype=bool)
+        if start is not None:
+            keep &= self.gameweek >= start
+        if end is not None:
+            keep &= self.gameweek <= end
+        return FixtureMatrix(self.teams, self.short_names, self.team[keep], self.gameweek[keep],
+                             self.opponent[keep], self.is_home[keep], self.fdr[keep])
+
+    def _fixture(self, side, metric_index):
+        opponent = self.opponent[side]
+        return {
+            'gameweek': int(self.gameweek[side]),
+            'opponent': self.teams[opponent],
+            'opponent_short': self.short_names[opponent],
+            'venue': 'H' if self.is_home[side] else 'A',
+            'fdr': float(self.fdr[side, metric_index])
+        }
+
+    def best_runs(self, length, metric='overall', teams=None):
+        """
+        Each team's easiest run of `length` consecutive fixtures (lowest mean
+        FDR; the earliest run on ties), easiest teams first. Teams with fewer
+        than `length` fixtures are left out. `teams` limits the result to
+        those team indexes.
+        """
+        metric_index = METRICS.index(metric)
+        slots = self.sequences.shape[1]
+        if length > slots:
+            return []
+        present = self.sequences >= 0
+        values = np.where(present, self.fdr[np.maximum(self.sequences, 0), metric_index], 0.0)
+        cumulative = np.concatenate([np.zeros((len(self.teams), 1)), np.cumsum(values, axis=1)], axis=1)
+        # Rounded so cumulative-sum noise cannot break ties between equal runs
+        means = np.round((cumulative[:, length:] - cumulative[:, :-length]) / length, 9)
+        # Sequences are padded at the end: a run is complete if its last slot is a fixture
+        means = np.where(present[:, length - 1:], means, np.inf)
+        best = means.argmin(axis=1)
+        best_mean = means[np.arange(len(self.teams)), best]
+
+        candidates = np.flatnonzero(np.isfinite(best_mean))
+        if teams is not None:
+            candidates = np.intersect1d(candidates, teams)
+        runs = []
+        for team in candidates[np.lexsort((candidates, best_mean[candidates]))]:
+            sides = self.sequences[team, best[team]:best[team] + length]
+            runs.append({
+                'team': self.teams[team],
+                'short_name': self.short_names[team],
+                'start_gameweek': int(self.gameweek[sides[0]]),
+                'end_gameweek': int(self.gameweek[sides[-1]]),
+                'average_fdr': round(float(best_mean[team]), 2),
+                'fixtures': [self._fixture(side, metric_index) for side in sides]
+            })
+        return runs
+
+    def rolling(self, window, metric='overall', teams=None):
+        """
+        Mean FDR of every team's fixtures in each window of `window`
+        consecutive gameweeks (None where a team has no fixture in the window),
+        with the number of fixtures per window.
+        """
+        metric_index = METRICS.index(metric)
+        windows = len(self.gameweeks) - window + 1
+        if windows < 1:
+            return {'window': window, 'start_gameweeks': [], 'teams': []}
+
+        def window_sums(values):
+            cumulative = np.concatenate([np.zeros((values.shape[0], 1)), np.cumsum(values, axis=1)], axis=1)
+            return cumulative[:, window:] - cumulative[:, :-window]
+
+        counts = window_sums(self.counts).astype(int)
+        sums = window_sums(self.totals[:, :, metric_index])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # (first to 9 places, so cumulative-sum noise cannot tip the rounding)
+            means = np.round(np.round(sums / counts, 9), 2)
+
+        selected = range(len(self.teams)) if teams is None else teams
+        return {
+            'window': window,
+            'start_gameweeks': self.gameweeks[:windows].tolist(),
+            'teams': [
+                {
+                    'team': self.teams[team],
+                    'short_name': self.short_names[team],
+                    'average_fdr': [None if count == 0 else float(mean) for mean, count in zip(means[team], counts[team])],
+                    'fixtures': counts[team].tolist()
+                }
+                for team in selected
+            ]
+        }
+
+
+_matrix = None
+_matrix_lock = threading.Lock()
+
+
+def get_fixture_matrix():
+    """FixtureMatrix of the fixture store being served (rebuilt when the store changes)"""
+    global _matrix
+    store = get_fixture_store()
+    cached = _matrix
+    if cached is not None and cached[0] == store.signature:
+        return cached[1], store
+    with _matrix_lock:
+        if _matrix is None or _matrix[0] != store.signature:
+            _matrix = (store.signature, FixtureMatrix.from_fixtures(store.all()))
+        return _matrix[1], store
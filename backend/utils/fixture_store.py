@@ -0,0 +1,312 @@
+# utils/fixture_store.py
+# Fixtures partitioned by gameweek on disk (one small JSON file per gameweek)
+# and indexed by gameweek and team in memory
+import bisect
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from config.config import Config
+from utils.data_loader import bump_data_version, current_snapshot, get_data_version
+from utils.log import get_logger
+from utils.metrics import FILE_LOAD_SECONDS
+from utils.snapshots import data_lock, resolve_root, stage_snapshot, publish_snapshot, discard_staging
+
+# Full export written by the pipeline (also read when no partitions exist yet)
+FIXTURES_FILE = 'fixture_analysis/fixtures.json'
+
+# One file per gameweek: gw29.json, gw30.json, ...
+PARTITION_DIR = 'fixture_analysis/gameweeks'
+
+logger = get_logger(__name__)
+
+
+def fixture_gameweek(fixture):
+    """Gameweek number of a fixture record, or None"""
+    gameweek = fixture.get('gameweek', fixture.get('GW', fixture.get('gw')))
+    try:
+        return int(gameweek)
+    except (TypeError, ValueError):
+        return None
+
+
+def _partition_name(gameweek):
+    return f'gw{gameweek}.json'
+
+
+def _partition_gameweek(name):
+    if name.startswith('gw') and name.endswith('.json'):
+        try:
+            return int(name[2:-5])
+        except ValueError:
+            return None
+    return None
+
+
+def _write_json_atomic(filepath, data):
+    """Write to a temporary file next to `filepath` and rename it into place"""
+    directory = os.path.dirname(filepath)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.json')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def group_by_gameweek(fixtures):
+    """{gameweek: [fixtures]} keeping the input order within each gameweek"""
+    groups = {}
+    for fixture in fixtures:
+        gameweek = fixture_gameweek(fixture)
+        if gameweek is not None:
+            groups.setdefault(gameweek, []).append(fixture)
+    return groups
+
+
+def write_partitions(data_dir, fixtures):
+    """
+    Replace the gameweek partitions with `fixtures` (used by the pipeline).
+    Each partition is swapped in atomically; partitions for gameweeks that no
+    longer have fixtures are removed. Returns the files written, relative to
+    data_dir.
+    """
+    partition_dir = os.path.join(data_dir, PARTITION_DIR)
+    groups = group_by_gameweek(fixtures)
+    written = []
+    for gameweek, gameweek_fixtures in sorted(groups.items()):
+        _write_json_atomic(os.path.join(partition_dir, _partition_name(gameweek)), gameweek_fixtures)
+        written.append(f'{PARTITION_DIR}/{_partition_name(gameweek)}')
+    for name in os.listdir(partition_dir) if os.path.isdir(partition_dir) else []:
+        gameweek = _partition_gameweek(name)
+        if gameweek is not None and gameweek not in groups:
+            os.remove(os.path.join(partition_dir, name))
+    return written
+
+
+class FixtureStore:
+    """
+    Immutable in-memory view of the fixtures: lists per gameweek plus, per
+    team (name or short name, lowercased), the team's fixtures in gameweek
+    order with a parallel list of gameweeks for bisect range lookups.
+    Readers keep using the store they fetched while a newer one is swapped in.
+    """
+
+    def __init__(self, partitions, signature, last_modified=None):
+        # partitions: {gameweek: (file signature, [fixtures])}
+        # signature: (data version, snapshot version, files signature or None without fixture data)
+        self.partitions = partitions
+        self.signature = signature
+        self.available = signature[2] is not None
+        self.last_modified = last_modified
+        self.by_gameweek = {gameweek: fixtures for gameweek, (_, fixtures) in partitions.items()}
+        self.gameweeks = sorted(self.by_gameweek)
+
+        teams = {}
+        for gameweek in self.gameweeks:
+            for fixture in self.by_gameweek[gameweek]:
+                names = set()
+                for side in ('home_team', 'away_team'):
+                    team = fixture.get(side)
+                    if isinstance(team, dict):
+                        names.update(name.lower() for name in (team.get('name'), team.get('short_name')) if name)
+                    elif team:
+                        names.add(str(team).lower())
+                for name in names:
+                    entry = teams.setdefault(name, ([], []))
+                    entry[0].append(gameweek)
+                    entry[1].append(fixture)
+        self.by_team = teams
+
+    def all(self):
+        """Every fixture in gameweek order"""
+        return [fixture for gameweek in self.gameweeks for fixture in self.by_gameweek[gameweek]]
+
+    def for_gameweek(self, gameweek):
+        return self.by_gameweek.get(gameweek, [])
+
+    def between(self, start=None, end=None):
+        """Fixtures with start <= gameweek <= end (either bound may be None)"""
+        low = 0 if start is None else bisect.bisect_left(self.gameweeks, start)
+        high = len(self.gameweeks) if end is None else bisect.bisect_right(self.gameweeks, end)
+        return [fixture for gameweek in self.gameweeks[low:high] for fixture in self.by_gameweek[gameweek]]
+
+    def for_team(self, team, start=None, end=None):
+        """A team's fixtures with start <= gameweek <= end, or None for an unknown team"""
+        entry = self.by_team.get(team.lower())
+        if entry is None:
+            return None
+        gameweeks, fixtures = entry
+        low = 0 if start is None else bisect.bisect_left(gameweeks, start)
+        high = len(gameweeks) if end is None else bisect.bisect_right(gameweeks, end)
+        return fixtures[low:high]
+
+    def next_gameweeks(self, team, count, start=None):
+        """A team's fixtures in the `count` gameweeks from `start` (default: the first stored gameweek)"""
+        if start is None:
+            start = self.gameweeks[0] if self.gameweeks else 0
+        return self.for_team(team, start, start + count - 1)
+
+    def counts(self):
+        """{gameweek: number of fixtures}"""
+        return {gameweek: len(fixtures) for gameweek, fixtures in self.by_gameweek.items()}
+
+
+_store = None
+_store_checked_at = 0.0
+_store_lock = threading.Lock()
+# Serializes admin mutations; readers never take it
+_write_lock = threading.Lock()
+
+
+def _scan_partitions(root):
+    """{gameweek: (mtime_ns, size)} for the partition files below root, or None without a partition directory"""
+    try:
+        entries = list(os.scandir(os.path.join(root, PARTITION_DIR)))
+    except OSError:
+        return None
+    files = {}
+    for entry in entries:
+        gameweek = _partition_gameweek(entry.name)
+        if gameweek is not None:
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            files[gameweek] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+
+def _load_store(previous, snapshot_version, root):
+    """Build a store from disk, re-reading only the partitions that changed since `previous`"""
+    files = _scan_partitions(root)
+    if files is None:
+        return _load_export(snapshot_version, root)
+
+    partitions = {}
+    for gameweek, file_signature in files.items():
+        cached = previous.partitions.get(gameweek) if previous is not None else None
+        if cached is not None and cached[0] == file_signature:
+            partitions[gameweek] = cached
+            continue
+        filename = f'{PARTITION_DIR}/{_partition_name(gameweek)}'
+        start = time.perf_counter()
+        try:
+            with open(os.path.join(root, filename), 'r', encoding='utf-8') as f:
+                partitions[gameweek] = (file_signature, json.load(f))
+        except FileNotFoundError:
+            # Snapshot pruned or partition removed while scanning
+            continue
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error("❌ Could not load fixtures", extra={'gameweek': gameweek, 'error': str(e)})
+            continue
+        FILE_LOAD_SECONDS.observe(time.perf_counter() - start, filename)
+
+    signature = (get_data_version(), snapshot_version, tuple(sorted(files.items())))
+    newest = max((mtime_ns for mtime_ns, _ in files.values()), default=None)
+    last_modified = datetime.fromtimestamp(newest // 1_000_000_000, tz=timezone.utc) if newest else None
+    return FixtureStore(partitions, signature, last_modified)
+
+
+def _load_export(snapshot_version, root):
+    """Store built from the full fixtures.json (data written before partitions existed)"""
+    filepath = os.path.join(root, FIXTURES_FILE)
+    start = time.perf_counter()
+    try:
+        stat = os.stat(filepath)
+        with open(filepath, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return FixtureStore({}, (get_data_version(), snapshot_version, None))
+    except (OSError, json.JSONDecodeError) as e:
+        logger.error("❌ Could not load fixtures", extra={'file': FIXTURES_FILE, 'error': str(e)})
+        return FixtureStore({}, (get_data_version(), snapshot_version, None))
+    FILE_LOAD_SECONDS.observe(time.perf_counter() - start, FIXTURES_FILE)
+
+    # Older files may wrap the list as {"fixtures": [...]}
+    fixtures = data.get('fixtures', []) if isinstance(data, dict) else data
+    partitions = {gameweek: (None, gameweek_fixtures) for gameweek, gameweek_fixtures in group_by_gameweek(fixtures).items()}
+    signature = (get_data_version(), snapshot_version, ('export', stat.st_mtime_ns, stat.st_size))
+    return FixtureStore(partitions, signature, datetime.fromtimestamp(int(stat.st_mtime), tz=timezone.utc))
+
+
+def get_fixture_store():
+    """
+    The FixtureStore for the snapshot being served. Partitions are re-scanned
+    at most once per DATA_CACHE_CHECK_INTERVAL (and after a data version bump
+    or snapshot switch); only changed partitions are re-read.
+    """
+    global _store, _store_checked_at
+    snapshot_version, root = current_snapshot()
+    store = _store
+    now = time.monotonic()
+    if (store is not None and store.signature[:2] == (get_data_version(), snapshot_version)
+            and now - _store_checked_at < Config.DATA_CACHE_CHECK_INTERVAL):
+        return store
+
+    with _store_lock:
+        if (_store is not store and _store is not None
+                and _store.signature[:2] == (get_data_version(), snapshot_version)):
+            return _store
+        new_store = _load_store(store, snapshot_version, root)
+        if store is None or new_store.signature != store.signature:
+            _store = new_store
+        _store_checked_at = now
+        return _store
+
+
+def _remove_from_export(root, gameweek):
+    """Rewrite the full fixtures.json below root without a gameweek's fixtures"""
+    filepath = os.path.join(root, FIXTURES_FILE)
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return
+    if isinstance(data, dict):
+        # Older files may wrap the list as {"fixtures": [...]}
+        data = {**data, 'fixtures': [fixture for fixture in data.get('fixtures', [])
+                                     if fixture_gameweek(fixture) != gameweek]}
+    else:
+        data = [fixture for fixture in data if fixture_gameweek(fixture) != gameweek]
+    # Replaced, not rewritten in place: the file is shared with the previous snapshot
+    _write_json_atomic(filepath, data)
+
+
+def clear_gameweek(gameweek):
+    """
+    Remove every fixture of a gameweek. A new data snapshot is published
+    without that gameweek's partition (the other partitions are shared with
+    the current snapshot, not rewritten) and with fixtures.json rewritten
+    without it, so readers switch over atomically and the edit can be rolled
+    back. Analytics derived from the fixtures (team_fixture_summary.json)
+    are refreshed by the next pipeline run. Returns the number of fixtures
+    removed (0 if the gameweek had none).
+    """
+    with _write_lock, data_lock(Config.DATA_DIR):
+        snapshot_version, root = resolve_root(Config.DATA_DIR)
+        store = _load_store(_store, snapshot_version, root)
+        deleted = len(store.for_gameweek(gameweek))
+        if not deleted:
+            return 0
+
+        staging = stage_snapshot(Config.DATA_DIR)
+        try:
+            partition_dir = os.path.join(staging, PARTITION_DIR)
+            if not os.path.isdir(partition_dir):
+                # Data from before partitions existed: split fixtures.json first
+                write_partitions(staging, store.all())
+            os.remove(os.path.join(partition_dir, _partition_name(gameweek)))
+            _remove_from_export(staging, gameweek)
+        except BaseException:
+            discard_staging(staging)
+            raise
+        publish_snapshot(Config.DATA_DIR, staging)
+
+    bump_data_version()
+    return deleted
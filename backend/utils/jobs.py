@@ -0,0 +1,247 @@
+# utils/jobs.py
+# Background jobs for long-running admin work (pipeline rebuilds). Jobs run
+# in a process pool so API workers keep serving reads; progress events are
+# streamed back to this process and persisted so any worker can report them.
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from config.config import Config
+from utils.data_loader import bump_data_version
+from utils.log import get_logger
+from utils.metrics import observe_stages
+from utils.snapshots import data_lock
+
+FINISHED_STATES = ('succeeded', 'failed')
+
+logger = get_logger(__name__)
+
+
+def _job_file(data_dir, job_id):
+    return os.path.join(data_dir, 'pipeline_state', 'jobs', f'{job_id}.json')
+
+
+def _run_pipeline_job(job_id, paths, targets, events):
+    """Worker-process entry point: run the pipeline, sending progress to `events`"""
+    from pipeline import run_pipeline
+
+    def log(line):
+        events.put((job_id, 'log', line))
+
+    def on_stage(timing):
+        events.put((job_id, 'stage', timing))
+
+    with data_lock(paths['output_dir']):
+        events.put((job_id, 'running', None))
+        return run_pipeline(targets=targets, log=log, on_stage=on_stage, **paths)
+
+
+class JobRunner:
+    """
+    Submits pipeline runs to a process pool. Submitting the same work while
+    an identical job is queued or running returns that job (single-flight),
+    so repeated clicks coalesce into one rebuild.
+    """
+
+    def __init__(self, max_workers=1):
+        self.max_workers = max_workers
+        self._executor = None
+        self._manager = None
+        self._events = None
+        self._jobs = {}
+        self._active = {}
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+
+    def _start(self):
+        # Spawned (not forked) workers: the server process has threads running
+        context = multiprocessing.get_context('spawn')
+        self._manager = context.Manager()
+        self._events = self._manager.Queue()
+        self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+        threading.Thread(target=self._drain_events, name='job-events', daemon=True).start()
+
+    def submit_pipeline(self, targets=None):
+        """Returns (job, coalesced) for a pipeline run over `targets` (None = all)"""
+        key = ('pipeline', tuple(targets) if targets else None)
+        paths = {
+            'csv_path': Config.FPL_DATA_CSV,
+            'fixtures_path': Config.FIXTURE_TEMPLATE_CSV,
+            'output_dir': Config.DATA_DIR
+        }
+        with self._lock:
+            job_id = self._active.get(key)
+            if job_id is not None:
+                return self._public(self._jobs[job_id]), True
+            if self._executor is None:
+                self._start()
+
+            job_id = uuid.uuid4().hex[:12]
+            job = {
+                'id': job_id,
+                'kind': 'pipeline',
+                'targets': targets,
+                'status': 'queued',
+                'submitted_at': datetime.now().isoformat(),
+                'started_at': None,
+                'finished_at': None,
+                'stages': [],
+                'output': [],
+                'result': None,
+                'error': None,
+                'events': [],
+                'data_dir': paths['output_dir']
+            }
+            self._jobs[job_id] = job
+            self._active[key] = job_id
+            self._add_event(job, 'status', {'status': 'queued'})
+            public = self._public(job)
+            self._persist(public)
+            future = self._executor.submit(_run_pipeline_job, job_id, paths, targets, self._events)
+
+        future.add_done_callback(lambda done: self._events.put((job_id, 'finished', self._outcome(done))))
+        return public, False
+
+    @staticmethod
+    def _outcome(future):
+        try:
+            return {'report': future.result()}
+        except Exception as e:
+            return {'error': f'{type(e).__name__}: {e}'}
+
+    def _add_event(self, job, event, data):
+        job['events'].append({'id': len(job['events']) + 1, 'event': event, 'data': data})
+        self._changed.notify_all()
+
+    def _drain_events(self):
+        """Apply progress events from the worker processes (in the order they were sent)"""
+        while True:
+            try:
+                job_id, kind, data = self._events.get()
+            except (EOFError, OSError):
+                return
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is None:
+                    continue
+                if kind == 'running':
+                    job['status'] = 'running'
+                    job['started_at'] = datetime.now().isoformat()
+                    self._add_event(job, 'status', {'status': 'running'})
+                elif kind == 'log':
+                    job['output'].append(data)
+                    self._add_event(job, 'log', {'line': data})
+                elif kind == 'stage':
+                    job['stages'].append(data)
+                    observe_stages([data])
+                    self._add_event(job, 'stage', data)
+                elif kind == 'finished':
+                    self._finish(job, data)
+                public = self._public(job)
+            self._persist(public)
+
+    def _finish(self, job, outcome):
+        report = outcome.get('report')
+        if report is not None:
+            # The worker rewrote the data files; drop this process's cached copies
+            bump_data_version()
+            job['status'] = 'succeeded'
+            job['result'] = {
+                'message': f"Successfully processed data and updated all analytics files in {report['total_seconds']:.1f}s",
+                'timings': report['stages'],
+                'files_written': len(report['outputs'])
+            }
+        else:
+            job['status'] = 'failed'
+            job['error'] = outcome['error']
+        job['finished_at'] = datetime.now().isoformat()
+        self._active = {key: job_id for key, job_id in self._active.items() if job_id != job['id']}
+        self._add_event(job, 'done', self.summarize(job))
+        self._prune()
+
+    def _prune(self):
+        finished = [job for job in self._jobs.values() if job['status'] in FINISHED_STATES]
+        for job in finished[:max(0, len(finished) - Config.JOB_HISTORY)]:
+            del self._jobs[job['id']]
+            try:
+                os.remove(_job_file(job['data_dir'], job['id']))
+            except OSError:
+                pass
+
+    @staticmethod
+    def summarize(job):
+        """Job record without its event log, output lines and data directory"""
+        return {key: value for key, value in job.items() if key not in ('events', 'output', 'data_dir')}
+
+    @staticmethod
+    def _public(job):
+        """Snapshot of a job record that is safe to use outside the lock"""
+        return {**job, 'stages': list(job['stages']), 'output': list(job['output']), 'events': list(job['events'])}
+
+    def _persist(self, job):
+        """Write the job record so status requests served by other processes can read it"""
+        filepath = _job_file(job['data_dir'], job['id'])
+        try:
+            os.makedirs(os.path.dirname(filepath), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(filepath), prefix='.tmp-')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(job, f, ensure_ascii=False)
+            os.replace(tmp_path, filepath)
+        except OSError as e:
+            logger.warning("⚠️ Could not save job", extra={'job_id': job['id'], 'error': str(e)})
+
+    def get(self, job_id):
+        """Job record (from this process, or as persisted by another), or None"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return self._public(job)
+        if not all(char in '0123456789abcdef' for char in job_id):
+            return None
+        try:
+            with open(_job_file(Config.DATA_DIR, job_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def wait_for_events(self, job_id, after, timeout):
+        """Events with id > after, waiting up to `timeout` seconds for new ones; (events, finished)"""
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                while len(job['events']) <= after and job['status'] not in FINISHED_STATES:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._changed.wait(remaining)
+                return job['events'][after:], job['status'] in FINISHED_STATES
+
+        # Job owned by another process: poll its persisted record
+        while True:
+            job = self.get(job_id)
+            if job is None:
+                return [], True
+            finished = job['status'] in FINISHED_STATES
+            if len(job['events']) > after or finished or time.monotonic() >= deadline:
+                return job['events'][after:], finished
+            time.sleep(0.5)
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def get_job_runner():
+    """Process-wide JobRunner (its worker pool starts on the first submission)"""
+    global _runner
+    if _runner is None:
+        with _runner_lock:
+            if _runner is None:
+                _runner = JobRunner(max_workers=Config.PIPELINE_WORKERS)
+    return _runner
@@ -0,0 +1,70 @@
+# utils/log.py
+# Leveled, structured logging for the API and pipeline. Modules log through
+# get_logger(__name__) with context as keyword fields:
+#   logger.info("🔄 Reloaded data file", extra={'file': filename})
+# and configure_logging() renders each record as one text or JSON line.
+# Hot paths guard their debug lines with logger.isEnabledFor(logging.DEBUG),
+# so LOG_LEVEL=INFO (the default) costs them nothing.
+import json
+import logging
+import sys
+from datetime import datetime, timezone
+from config.config import Config
+
+ROOT_LOGGER = 'fpl'
+
+# Attributes every LogRecord has; anything else was passed as a field via `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+
+
+def _fields(record):
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES}
+
+
+class TextFormatter(logging.Formatter):
+    """`time LEVEL logger message key=value ...`"""
+
+    def format(self, record):
+        line = (f"{datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec='milliseconds')} "
+                f"{record.levelname:<7} {record.name} {record.getMessage()}")
+        fields = _fields(record)
+        if fields:
+            line += ' ' + ' '.join(f'{key}={value}' for key, value in fields.items())
+        if record.exc_info:
+            line += '\n' + self.formatException(record.exc_info)
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record (for log collectors)"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            **_fields(record)
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def get_logger(name):
+    """Logger below the app's root logger ('routes.admin' -> 'fpl.routes.admin')"""
+    return logging.getLogger(f'{ROOT_LOGGER}.{name}')
+
+
+def configure_logging(level=None, fmt=None, stream=None):
+    """
+    Send the app's log records to `stream` (stderr) at `level` (Config.LOG_LEVEL)
+    in `fmt` ('text' or 'json', Config.LOG_FORMAT). Safe to call more than once.
+    """
+    logger = logging.getLogger(ROOT_LOGGER)
+    logger.setLevel((level or Config.LOG_LEVEL).upper())
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(JsonFormatter() if (fmt or Config.LOG_FORMAT) == 'json' else TextFormatter())
+    logger.handlers = [handler]
+    logger.propagate = False
+    return logger
@@ -0,0 +1,201 @@
+# utils/manifest.py
+# Data manifest: publishing a snapshot writes manifest.json next to its
+# outputs, listing every data file with its size, row count and checksum,
+# plus the data version and the timings of the run that built it. The app
+# reads it once per served version, so health and readiness checks are
+# answered from memory instead of stat-ing the data files on every probe.
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+MANIFEST_FILE = 'manifest.json'
+MANIFEST_FORMAT = 1
+
+# Top-level entries that are not data files (snapshots, pipeline state,
+# and the per-snapshot metadata files)
+SKIPPED_ENTRIES = {'snapshots', 'pipeline_state', MANIFEST_FILE, 'changes.json'}
+
+# Files a deployment needs to serve the app (reported by /api/health;
+# readiness requires all of them)
+REQUIRED_FILES = {
+    "fixtures": 'fixture_analysis/fixtures.json',
+    "team_fixtures": 'fixture_analysis/team_fixture_summary.json',
+    "attacking_qp": 'quick_picks/attackingpicks.json',
+    "defensive_qp": 'quick_picks/defensivepicks.json',
+    "attack_rankings": 'rankings/attack_rankings.json',
+    "defense_rankings": 'rankings/defense_rankings.json',
+    "overall_rankings": 'rankings/overall_rankings.json',
+    "assist_providers": 'top_performers/assist_providers.json',
+    "defensive_leaders": 'top_performers/defensive_leaders.json',
+    "goal_scorer_picks": 'top_performers/goal_scorers.json',
+    "hidden_gems": 'top_performers/hidden_gems.json',
+    "overperformers": 'performance_analysis/overperformers.json',
+    "season_performers": 'top_performers/season_performers.json',
+    "sustainable_scorers": 'performance_analysis/sustainable_scorers.json',
+    "value_players": 'top_performers/value_players.json'
+}
+
+_READ_SIZE = 1 << 20
+
+
+def data_files(root):
+    """Data files below a data root, relative to it ('/'-separated, sorted)"""
+    files = []
+    for directory, subdirs, names in os.walk(root):
+        top_level = directory == root
+        if top_level:
+            subdirs[:] = [name for name in subdirs if name not in SKIPPED_ENTRIES]
+        subdirs[:] = sorted(name for name in subdirs if not name.startswith('.'))
+        for name in sorted(names):
+            if name.startswith('.') or (top_level and name in SKIPPED_ENTRIES):
+                continue
+            files.append(os.path.relpath(os.path.join(directory, name), root).replace(os.sep, '/'))
+    return files
+
+
+def _row_count(data):
+    """Records in a data file: a list's length, or the length of its 'players' list"""
+    if isinstance(data, list):
+        return len(data)
+    if isinstance(data, dict) and isinstance(data.get('players'), list):
+        return len(data['players'])
+    return None
+
+
+def describe_file(path):
+    """{'bytes', 'rows', 'sha256'} of one data file (rows is None for non-record files)"""
+    digest = hashlib.sha256()
+    lines = 0
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_READ_SIZE), b''):
+            digest.update(block)
+            lines += block.count(b'\n')
+    rows = None
+    if path.endswith('.jsonl'):
+        rows = lines
+    elif path.endswith('.json'):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                rows = _row_count(json.load(f))
+        except (OSError, ValueError):
+            rows = None
+    return {'bytes': os.path.getsize(path), 'rows': rows, 'sha256': digest.hexdigest()}
+
+
+def build_manifest(root, version, timings=None, previous_root=None, previous=None):
+    """
+    Manifest of the data files below root. Files hard-linked from the
+    previous snapshot (previous_root, described by the `previous` manifest)
+    are not re-read: their entries are carried over.
+    """
+    start = time.perf_counter()
+    previous_files = (previous or {}).get('files', {})
+    files = {}
+    reused = 0
+    for filename in data_files(root):
+        path = os.path.join(root, filename)
+        old_path = os.path.join(previous_root, filename) if previous_root is not None else None
+        if (filename in previous_files and old_path is not None and os.path.exists(old_path)
+                and os.path.samefile(old_path, path)):
+            files[filename] = previous_files[filename]
+            reused += 1
+        else:
+            files[filename] = describe_file(path)
+    return {
+        'format': MANIFEST_FORMAT,
+        'version': version,
+        'built_at': datetime.now().isoformat(),
+        'file_count': len(files),
+        'total_bytes': sum(entry['bytes'] for entry in files.values()),
+        'files': files,
+        'timings': list(timings or []),
+        'manifest_seconds': round(time.perf_counter() - start, 4),
+        'reused': reused
+    }
+
+
+def read_manifest_file(root):
+    """The parsed manifest.json of a data root, or None"""
+    try:
+        with open(os.path.join(root, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if isinstance(manifest, dict) and isinstance(manifest.get('files'), dict) else None
+
+
+def write_manifest(root, version, timings=None, previous_root=None):
+    """
+    Write manifest.json into a data root (a staged snapshot, or a flat data
+    directory). A failure is logged and leaves no manifest: the app then
+    describes the files itself when it loads the data.
+    """
+    path = os.path.join(root, MANIFEST_FILE)
+    tmp_path = f'{path}.tmp'
+    try:
+        if os.path.exists(path):
+            # Seeded from the previous snapshot: shares its inode
+            os.remove(path)
+        previous = read_manifest_file(previous_root) if previous_root is not None else None
+        manifest = build_manifest(root, version, timings, previous_root, previous)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except Exception:
+        logger.exception("❌ Could not write data manifest", extra={'root': root})
+        for leftover in (tmp_path, path):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+        return None
+    return manifest
+
+
+# Manifest of the data being served: (root, version, data version) -> manifest
+_loaded = {}
+_loaded_lock = threading.Lock()
+
+
+def load_manifest(root, version, data_version=0):
+    """
+    Manifest of a data root, read once per (root, version, data_version).
+    Data published without a manifest (older snapshots, flat layout) is
+    described from the files themselves, without checksums.
+    """
+    key = (root, version, data_version)
+    manifest = _loaded.get(key)
+    if manifest is not None:
+        return manifest
+    manifest = read_manifest_file(root)
+    if manifest is not None:
+        manifest = {**manifest, 'source': MANIFEST_FILE}
+    else:
+        files = {}
+        if os.path.isdir(root):
+            for filename in data_files(root):
+                try:
+                    files[filename] = {'bytes': os.path.getsize(os.path.join(root, filename)),
+                                       'rows': None, 'sha256': None}
+                except OSError:
+                    continue
+        manifest = {'format': MANIFEST_FORMAT, 'version': version, 'built_at': None, 'file_count': len(files),
+                    'total_bytes': sum(entry['bytes'] for entry in files.values()), 'files': files,
+                    'timings': [], 'source': 'scan'}
+    with _loaded_lock:
+        # Only the served version is kept
+        _loaded.clear()
+        _loaded[key] = manifest
+    logger.info("🧾 Loaded data manifest", extra={'snapshot': version, 'files': manifest['file_count'],
+                                                  'source': manifest['source']})
+    return manifest
+
+
+def readiness(manifest):
+    """(ready, {name: present}) for the required files listed in a manifest"""
+    present = {name: filename in manifest['files'] for name, filename in REQUIRED_FILES.items()}
+    return all(present.values()), present
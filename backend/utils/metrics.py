@@ -0,0 +1,149 @@
+# utils/metrics.py
+# In-process request/data/pipeline metrics, rendered in the Prometheus text
+# exposition format by GET /api/metrics. Every server process keeps its own
+# counts (scrape each worker, or run a single worker, to see all traffic).
+import bisect
+import math
+import threading
+
+# Latency buckets (seconds) and size buckets (bytes)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+STAGE_BUCKETS = (0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Route label of requests that matched no URL rule (keeps 404 scans from adding series)
+UNMATCHED_ROUTE = '<unmatched>'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{value}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter per label combination"""
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield f'{self.name}{_labels(self.labelnames, labels)} {_number(value)}'
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label combination"""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (+Inf last), sum]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def samples(self):
+        with self._lock:
+            values = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._values.items())
+        for labels, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                yield f'{self.name}_bucket{_labels(self.labelnames, labels, [("le", _number(bound))])} {cumulative}'
+            yield f'{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}'
+            yield f'{self.name}_count{_labels(self.labelnames, labels)} {cumulative}'
+
+
+class Gauge:
+    """Value computed at scrape time by `collect()` -> [(label values, value)]"""
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), collect=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+
+    def samples(self):
+        for labels, value in self.collect():
+            yield f'{self.name}{_labels(self.labelnames, labels)} {_number(value)}'
+
+
+REQUEST_SECONDS = Histogram(
+    'fpl_http_request_duration_seconds', 'Request latency by route, method and status',
+    ('route', 'method', 'status'))
+RESPONSE_BYTES = Histogram(
+    'fpl_http_response_size_bytes', 'Response body size (as sent, after compression) by route',
+    ('route',), SIZE_BUCKETS)
+RESPONSE_CACHE = Counter(
+    'fpl_response_cache_total', 'Serialized response payloads served from cache (hit) or built (miss)',
+    ('result',))
+FILE_LOAD_SECONDS = Histogram(
+    'fpl_data_file_load_seconds', 'Time to read and parse a data file', ('file',))
+PIPELINE_STAGE_SECONDS = Histogram(
+    'fpl_pipeline_stage_seconds', 'Duration of pipeline stages run by this server', ('stage',), STAGE_BUCKETS)
+
+_registry = [REQUEST_SECONDS, RESPONSE_BYTES, RESPONSE_CACHE, FILE_LOAD_SECONDS, PIPELINE_STAGE_SECONDS]
+
+
+def register(metric):
+    """Add a metric (e.g. a Gauge reading another module's counters) to the exposition"""
+    _registry.append(metric)
+    return metric
+
+
+def observe_request(route, method, status, seconds, size):
+    """Record one request; `size` is None for streamed responses"""
+    route = route or UNMATCHED_ROUTE
+    REQUEST_SECONDS.observe(seconds, route, method, str(status))
+    if size is not None:
+        RESPONSE_BYTES.observe(size, route)
+
+
+def observe_stages(timings):
+    """Record pipeline stage timings ({'stage', 'seconds'} dicts)"""
+    for timing in timings:
+        PIPELINE_STAGE_SECONDS.observe(timing['seconds'], timing['stage'])
+
+
+def render():
+    """All metrics in the Prometheus text format (version 0.0.4)"""
+    lines = []
+    for metric in _registry:
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        lines.extend(metric.samples())
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,195 @@
+# utils/player_index.py
+# Per-player lookups into player_data without loading the whole file, and a
+# prefix/fuzzy search index over the player list
+import bisect
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from utils.data_loader import data_path, get_data_version
+from utils.log import get_logger
+from utils.metrics import FILE_LOAD_SECONDS
+
+PLAYER_INDEX_FILE = 'player_trends/player_index.json'
+PLAYER_RECORDS_FILE = 'player_trends/player_records.jsonl'
+
+# Letters that do not decompose into ASCII + accent under NFKD
+_EXTRA_FOLDING = str.maketrans({'ø': 'o', 'đ': 'd', 'ł': 'l', 'æ': 'ae', 'œ': 'oe', 'ß': 'ss', 'ı': 'i'})
+
+logger = get_logger(__name__)
+
+
+def normalize_name(name):
+    """Lowercase, accent-free, punctuation-free form of a player name ('Ødegaard' -> 'odegaard')"""
+    name = unicodedata.normalize('NFKD', str(name).lower().translate(_EXTRA_FOLDING))
+    name = ''.join(char for char in name if not unicodedata.combining(char))
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', name).split())
+
+
+class PlayerIndex:
+    """
+    Byte offsets of each player's record in player_records.jsonl, keyed by
+    web_name, normalized name and player id. Only the index is held in
+    memory; records are read from disk on demand.
+    """
+
+    def __init__(self, index_data, index_path, records_path, mtime, version):
+        self.index_path = index_path
+        self.records_path = records_path
+        self.mtime = mtime
+        self.version = version
+        self.by_name = {}
+        self.by_key = {}
+        self.by_id = {}
+        for entry in index_data['players']:
+            location = (entry['offset'], entry['length'])
+            self.by_name[entry['name']] = location
+            self.by_key.setdefault(entry['key'], entry['name'])
+            for player_id in entry['ids']:
+                self.by_id.setdefault(player_id, entry['name'])
+
+    def resolve(self, name):
+        """web_name for an exact or normalized name, or None"""
+        if name in self.by_name:
+            return name
+        return self.by_key.get(normalize_name(name))
+
+    def read(self, names):
+        """Parsed records for web_names (reads only those players' bytes)"""
+        records = {}
+        with open(self.records_path, 'rb') as f:
+            for name in names:
+                offset, length = self.by_name[name]
+                f.seek(offset)
+                records[name] = json.loads(f.read(length))
+        return records
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def _is_current(index, index_path, mtime):
+    return (index is not None and index.version == get_data_version()
+            and index.index_path == index_path and index.mtime == mtime)
+
+
+def get_player_index():
+    """
+    The current PlayerIndex, loaded lazily and reloaded when the data version
+    is bumped, the served snapshot changes or the index file changes.
+    Returns None if the pipeline has not written an index (older data).
+    """
+    global _index
+    index_path = data_path(PLAYER_INDEX_FILE)
+    try:
+        mtime = os.path.getmtime(index_path)
+    except OSError:
+        return None
+
+    index = _index
+    if _is_current(index, index_path, mtime):
+        return index
+
+    with _index_lock:
+        if _is_current(_index, index_path, mtime):
+            return _index
+        start = time.perf_counter()
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                index_data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error("❌ Could not load player index", extra={'error': str(e)})
+            return None
+        FILE_LOAD_SECONDS.observe(time.perf_counter() - start, PLAYER_INDEX_FILE)
+        _index = PlayerIndex(
+            index_data,
+            index_path,
+            data_path(PLAYER_RECORDS_FILE),
+            mtime,
+            get_data_version()
+        )
+        logger.info("📇 Loaded player index", extra={'players': len(_index.by_name)})
+        return _index
+
+
+def _trigrams(key):
+    padded = f'  {key} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class PlayerSearchIndex:
+    """
+    Search over the player list: prefix matches on the full normalized name
+    or any word of it (via a sorted list and bisect), topped up with fuzzy
+    trigram matches for misspellings.
+    """
+
+    # Minimum trigram similarity (Jaccard) for a fuzzy match
+    FUZZY_THRESHOLD = 0.3
+
+    def __init__(self, players):
+        self.players = players
+        keys = [normalize_name(player['name']) for player in players]
+
+        # (prefix key, rank, player position): rank 0 = full name, 1 = later word
+        self.prefixes = []
+        self.trigrams = {}
+        self.trigram_counts = []
+        for position, key in enumerate(keys):
+            self.prefixes.append((key, 0, position))
+            for word in key.split()[1:]:
+                self.prefixes.append((word, 1, position))
+            grams = _trigrams(key)
+            self.trigram_counts.append(len(grams))
+            for gram in grams:
+                self.trigrams.setdefault(gram, []).append(position)
+        self.prefixes.sort()
+        self.prefix_keys = [prefix for prefix, _, _ in self.prefixes]
+
+    def search(self, query, limit=10):
+        """Players matching query, best matches first"""
+        query = normalize_name(query)
+        if not query:
+            return []
+
+        ranked = {}
+        start = bisect.bisect_left(self.prefix_keys, query)
+        for prefix, rank, position in self.prefixes[start:]:
+            if not prefix.startswith(query):
+                break
+            if position not in ranked or rank < ranked[position]:
+                ranked[position] = rank
+        matches = sorted(ranked, key=lambda position: (ranked[position], self.players[position]['name']))
+
+        if len(matches) < limit:
+            query_grams = _trigrams(query)
+            overlaps = {}
+            for gram in query_grams:
+                for position in self.trigrams.get(gram, ()):
+                    overlaps[position] = overlaps.get(position, 0) + 1
+            fuzzy = []
+            for position, overlap in overlaps.items():
+                if position in ranked:
+                    continue
+                similarity = overlap / (len(query_grams) + self.trigram_counts[position] - overlap)
+                if similarity >= self.FUZZY_THRESHOLD:
+                    fuzzy.append((-similarity, self.players[position]['name'], position))
+            matches += [position for _, _, position in sorted(fuzzy)]
+
+        return [self.players[position] for position in matches[:limit]]
+
+
+_search_index = None
+
+
+def get_search_index(all_players):
+    """Search index for the parsed all_players.json (rebuilt when that data is reloaded)"""
+    global _search_index
+    index = _search_index
+    if index is None or index.players is not all_players['players']:
+        index = PlayerSearchIndex(all_players['players'])
+        _search_index = index
+    return index
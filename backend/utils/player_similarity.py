@@ -0,0 +1,106 @@
+# utils/player_similarity.py
+# Nearest-neighbour search over the precomputed player feature matrix
+# (player_trends/player_features.json, written by the pipeline): the
+# standardized vectors are held as one array, so a query is a masked
+# distance computation plus a partial sort
+import numpy as np
+from utils.player_index import normalize_name
+
+PLAYER_FEATURES_FILE = 'player_trends/player_features.json'
+
+# Position filter values -> element_type
+POSITION_ALIASES = {
+    'gk': 1, 'gkp': 1, 'goalkeeper': 1,
+    'def': 2, 'defender': 2,
+    'mid': 3, 'midfielder': 3,
+    'fwd': 4, 'forward': 4,
+}
+ANY_POSITION = 'any'
+
+MAX_RESULTS = 50
+
+
+class SimilarityError(ValueError):
+    """Invalid similar-players parameters (answered with 400)"""
+
+
+class PlayerNotFound(LookupError):
+    """The reference player is not in the feature matrix (answered with 404)"""
+
+
+def parse_position(text):
+    """'MID' / 'midfielder' -> 3, 'any' -> None"""
+    key = text.strip().lower()
+    if key == ANY_POSITION:
+        return None
+    if key not in POSITION_ALIASES:
+        raise SimilarityError(f"Invalid position: {text} (expected GK, DEF, MID, FWD or any)")
+    return POSITION_ALIASES[key]
+
+
+class SimilarityIndex:
+    """Player feature matrix as arrays (built once per loaded version of the file)"""
+
+    def __init__(self, data):
+        self.features = data.get('features', [])
+        self.players = data.get('players', [])
+        self.vectors = np.array([player['vector'] for player in self.players], dtype=float).reshape(
+            len(self.players), len(self.features))
+        self.cost = np.array([player['now_cost'] for player in self.players], dtype=float)
+        self.element_type = np.array([player['element_type'] for player in self.players], dtype=int)
+        self.by_id = {player['id']: i for i, player in enumerate(self.players)}
+        self.by_name = {}
+        for i, player in enumerate(self.players):
+            self.by_name.setdefault(normalize_name(player['web_name']), i)
+
+    def find(self, player_id=None, name=None):
+        """Row of the reference player, by id or by name (case and accents ignored)"""
+        row = self.by_id.get(player_id) if player_id is not None else self.by_name.get(normalize_name(name or ''))
+        if row is None:
+            raise PlayerNotFound(f"No feature data for player {player_id if player_id is not None else name}")
+        return row
+
+    def feature_columns(self, names):
+        """Column indexes of the named features (all features when names is empty)"""
+        if not names:
+            return list(range(len(self.features)))
+        unknown = [name for name in names if name not in self.features]
+        if unknown:
+            raise SimilarityError(f"Unknown feature(s): {', '.join(unknown)} (available: {', '.join(self.features)})")
+        return [self.features.index(name) for name in dict.fromkeys(names)]
+
+    def similar(self, row, k=10, element_type=None, min_price=None, max_price=None, features=None):
+        """
+        The k players closest to players[row] (Euclidean distance between
+        standardized feature vectors, restricted to `features`) among those
+        matching the position and price filters, closest first
+        """
+        columns = self.feature_columns(features)
+        candidates = np.ones(len(self.players), dtype=bool)
+        candidates[row] = False
+        if element_type is not None:
+            candidates &= self.element_type == element_type
+        if min_price is not None:
+            candidates &= self.cost >= min_price
+        if max_price is not None:
+            candidates &= self.cost <= max_price
+        candidate_rows = np.flatnonzero(candidates)
+
+        vectors = self.vectors[np.ix_(candidate_rows, columns)]
+        distances = np.sqrt(((vectors - self.vectors[row, columns]) ** 2).sum(axis=1))
+        k = min(k, len(candidate_rows))
+        nearest = np.argpartition(distances, k - 1)[:k] if k else np.array([], dtype=int)
+        nearest = nearest[np.argsort(distances[nearest], kind='stable')]
+
+        def describe(i):
+            return {key: value for key, value in self.players[i].items() if key != 'vector'}
+
+        return {
+            'player': describe(row),
+            'features': [self.features[column] for column in columns],
+            'similar': [
+                {**describe(candidate_rows[i]), 'distance': round(float(distances[i]), 3)}
+                for i in nearest
+            ],
+            'candidates': len(candidate_rows)
+        }
@@ -0,0 +1,71 @@
+# utils/preload.py
+# Production preload: parse every data file of the current snapshot (as
+# listed by its manifest) and build the in-memory indexes once, in the
+# server's master process, then freeze the result out of the garbage
+# collector's reach. Forked workers (gunicorn --preload) share those pages
+# copy-on-write instead of each loading its own copy on first request.
+import gc
+import time
+from pipeline.projections import PLAYER_PROJECTIONS_FILE
+from utils.data_loader import current_manifest, current_snapshot, load_json_data, warm_cache
+from utils.fixture_matrix import get_fixture_matrix
+from utils.log import get_logger
+from utils.player_index import get_player_index, get_search_index
+from utils.record_query import PlayersIndex, get_index
+from utils.player_similarity import PLAYER_FEATURES_FILE, SimilarityIndex
+from utils.squad_planner import PLAYER_SCORES_FILE, ScoreMatrix
+
+logger = get_logger(__name__)
+
+ALL_PLAYERS_FILE = 'player_trends/all_players.json'
+
+
+def snapshot_files(manifest):
+    """JSON files of a snapshot, as listed by its manifest"""
+    return sorted(filename for filename in manifest['files'] if filename.endswith('.json'))
+
+
+def preload_data(freeze=True):
+    """
+    Load the snapshot being served into the process caches (call inside an
+    app context, before forking). With `freeze`, everything allocated so far
+    is moved to the permanent GC generation (gc.freeze) so collections in
+    the workers never touch, and so never copy, the shared pages.
+    Returns a summary of what was loaded.
+    """
+    start = time.perf_counter()
+    version, _ = current_snapshot()
+    files = snapshot_files(current_manifest())
+    cached_bytes = warm_cache(files)
+
+    get_player_index()
+    get_fixture_matrix()
+    if ALL_PLAYERS_FILE in files:
+        all_players = load_json_data(ALL_PLAYERS_FILE)
+        if 'players' in all_players:
+            get_search_index(all_players)
+    if PLAYER_SCORES_FILE in files:
+        player_scores = load_json_data(PLAYER_SCORES_FILE)
+        if 'players' in player_scores:
+            get_index(PLAYER_SCORES_FILE, player_scores, ScoreMatrix)
+    if PLAYER_FEATURES_FILE in files:
+        player_features = load_json_data(PLAYER_FEATURES_FILE)
+        if 'players' in player_features:
+            get_index(PLAYER_FEATURES_FILE, player_features, SimilarityIndex)
+    if PLAYER_PROJECTIONS_FILE in files:
+        projections = load_json_data(PLAYER_PROJECTIONS_FILE)
+        if 'players' in projections:
+            get_index(PLAYER_PROJECTIONS_FILE, projections, PlayersIndex)
+
+    if freeze:
+        gc.collect()
+        gc.freeze()
+    summary = {
+        'snapshot': version,
+        'files': len(files),
+        'bytes': cached_bytes,
+        'seconds': round(time.perf_counter() - start, 3),
+        'frozen_objects': gc.get_freeze_count()
+    }
+    logger.info("📦 Preloaded data", extra=summary)
+    return summary
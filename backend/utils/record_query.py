@@ -0,0 +1,321 @@
+# utils/record_query.py
+# Server-side filtering, sorting, pagination and field projection for the
+# rankings and quick picks data, evaluated against indexes built once per
+# loaded data file
+import bisect
+import threading
+from flask import jsonify, request
+from utils.data_loader import json_response
+
+# Query parameters understood by the list routes
+QUERY_PARAMS = ('team', 'position', 'max_cost', 'min_form', 'sort', 'limit', 'offset', 'fields')
+
+# Upper bound for ?limit=
+MAX_LIMIT = 500
+
+POSITION_ALIASES = {
+    'gk': 'goalkeeper', 'gkp': 'goalkeeper',
+    'def': 'defender',
+    'mid': 'midfielder',
+    'fwd': 'forward', 'fw': 'forward'
+}
+
+
+class QueryError(ValueError):
+    """Invalid query parameter (answered with 400)"""
+
+
+def _split(value):
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def _number(args, name, cast=float, minimum=None):
+    value = args.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        number = cast(value)
+    except ValueError:
+        raise QueryError(f"Invalid {name}: {value}")
+    if minimum is not None and number < minimum:
+        raise QueryError(f"Invalid {name}: must be at least {minimum}")
+    return number
+
+
+def parse_query(args):
+    """
+    Normalize the list query parameters from request.args.
+    Returns None when none are given (the route serves the whole file).
+    """
+    if not any(name in args for name in QUERY_PARAMS):
+        return None
+
+    sort = args.get('sort', '').strip()
+    limit = _number(args, 'limit', int, minimum=0)
+    if limit is not None:
+        limit = min(limit, MAX_LIMIT)
+    positions = [POSITION_ALIASES.get(position.lower(), position.lower()) for position in _split(args.get('position', ''))]
+
+    return {
+        'team': tuple(sorted(team.lower() for team in _split(args.get('team', '')))),
+        'position': tuple(sorted(positions)),
+        'max_cost': _number(args, 'max_cost'),
+        'min_form': _number(args, 'min_form'),
+        'sort': sort.lstrip('-'),
+        'descending': sort.startswith('-'),
+        'limit': limit,
+        'offset': _number(args, 'offset', int, minimum=0) or 0,
+        'fields': tuple(_split(args.get('fields', '')))
+    }
+
+
+def query_key(query):
+    """Hashable cache key for a normalized query"""
+    return tuple(sorted(query.items()))
+
+
+class _SortOrders:
+    """Positions of items sorted by a field, computed once per field and direction"""
+
+    def __init__(self, items):
+        self.items = items
+        self.orders = {}
+
+    def get(self, field, descending):
+        order = self.orders.get((field, descending))
+        if order is None:
+            # Missing values sort last in both directions; sorted() is stable
+            present = [position for position, item in enumerate(self.items) if item.get(field) is not None]
+            missing = [position for position, item in enumerate(self.items) if item.get(field) is None]
+            order = sorted(present, key=lambda position: self.items[position][field], reverse=descending) + missing
+            self.orders[field, descending] = order
+        return order
+
+
+def _project(item, fields):
+    return {field: item[field] for field in fields if field in item} if fields else item
+
+
+def _paginate(items, query):
+    end = None if query['limit'] is None else query['offset'] + query['limit']
+    return items[query['offset']:end]
+
+
+class RankingsIndex:
+    """Indexes over a rankings file (a flat list of team records)"""
+
+    def __init__(self, records):
+        self.records = records
+        self.fields = set().union(*(record.keys() for record in records)) if records else set()
+        self.by_team = {}
+        for position, record in enumerate(records):
+            for name in (record.get('team'), record.get('team_short')):
+                if name:
+                    self.by_team.setdefault(name.lower(), []).append(position)
+        self.sort_orders = _SortOrders(records)
+
+    def query(self, query):
+        """Returns (records, total before pagination)"""
+        unsupported = [name for name in ('position', 'max_cost', 'min_form') if query[name]]
+        if unsupported:
+            raise QueryError(f"Not supported for rankings: {', '.join(unsupported)}")
+        _check_fields([query['sort']] if query['sort'] else [], self.fields, 'sort')
+        _check_fields(query['fields'], self.fields, 'fields')
+
+        if query['team']:
+            selected = set()
+            for team in query['team']:
+                selected.update(self.by_team.get(team, ()))
+        else:
+            selected = None
+
+        if query['sort']:
+            order = self.sort_orders.get(query['sort'], query['descending'])
+        else:
+            order = range(len(self.records))
+        matches = [self.records[position] for position in order if selected is None or position in selected]
+
+        page = _paginate(matches, query)
+        return [_project(record, query['fields']) for record in page], len(matches)
+
+
+class PicksIndex:
+    """
+    Indexes over a quick picks file (team groups, each with a players list).
+    Player filters keep the team groups that still have players.
+    """
+
+    def __init__(self, groups):
+        self.groups = groups
+        self.group_fields = set().union(*(group.keys() for group in groups)) - {'players'} if groups else set()
+        self.players = [
+            (group_position, player)
+            for group_position, group in enumerate(groups)
+            for player in group.get('players', [])
+        ]
+        self.player_fields = set().union(*(player.keys() for _, player in self.players)) if self.players else set()
+
+        self.by_team = {}
+        self.by_position = {}
+        for flat_position, (group_position, player) in enumerate(self.players):
+            for name in (groups[group_position].get('team'), player.get('team_name_short')):
+                if name:
+                    self.by_team.setdefault(name.lower(), set()).add(flat_position)
+            if player.get('position_name'):
+                self.by_position.setdefault(player['position_name'].lower(), set()).add(flat_position)
+
+        # Sorted (value, position) columns for range filters
+        self.by_cost = sorted((player['now_cost'], flat_position) for flat_position, (_, player) in enumerate(self.players) if player.get('now_cost') is not None)
+        self.by_form = sorted((player['form'], flat_position) for flat_position, (_, player) in enumerate(self.players) if player.get('form') is not None)
+        self.group_orders = _SortOrders(groups)
+
+    def _selected_players(self, query):
+        """Flat player positions passing every filter, or None when there are no player filters"""
+        selections = []
+        if query['team']:
+            selections.append(set().union(*(self.by_team.get(team, set()) for team in query['team'])))
+        if query['position']:
+            selections.append(set().union(*(self.by_position.get(position, set()) for position in query['position'])))
+        if query['max_cost'] is not None:
+            end = bisect.bisect_right(self.by_cost, (query['max_cost'], float('inf')))
+            selections.append({position for _, position in self.by_cost[:end]})
+        if query['min_form'] is not None:
+            start = bisect.bisect_left(self.by_form, (query['min_form'], -1))
+            selections.append({position for _, position in self.by_form[start:]})
+        if not selections:
+            return None
+        return set.intersection(*selections)
+
+    def query(self, query):
+        """Returns (team groups, total groups before pagination)"""
+        sort = query['sort']
+        if sort and sort not in self.group_fields and sort not in self.player_fields:
+            raise QueryError(f"Invalid sort: {sort}. Allowed: {', '.join(sorted(self.group_fields | self.player_fields))}")
+        _check_fields(query['fields'], self.player_fields, 'fields')
+
+        selected = self._selected_players(query)
+        players_by_group = {}
+        for flat_position, (group_position, player) in enumerate(self.players):
+            if selected is None or flat_position in selected:
+                players_by_group.setdefault(group_position, []).append(player)
+
+        if sort in self.group_fields:
+            group_order = self.group_orders.get(sort, query['descending'])
+        else:
+            group_order = range(len(self.groups))
+
+        results = []
+        for group_position in group_order:
+            players = players_by_group.get(group_position)
+            if players is None and selected is not None:
+                continue
+            players = players or []
+            if sort in self.player_fields and sort not in self.group_fields:
+                present = sorted((player for player in players if player.get(sort) is not None), key=lambda player: player[sort], reverse=query['descending'])
+                players = present + [player for player in players if player.get(sort) is None]
+            results.append((group_position, players))
+
+        page = _paginate(results, query)
+        return [
+            {**self.groups[group_position], 'players': [_project(player, query['fields']) for player in players]}
+            for group_position, players in page
+        ], len(results)
+
+
+class PlayersIndex:
+    """
+    Indexes over a file whose 'players' list holds one flat record per
+    player (projections). The file's other keys are returned unchanged
+    with the selected players.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.players = data.get('players', [])
+        self.fields = set().union(*(player.keys() for player in self.players)) if self.players else set()
+        self.by_id = {player['id']: player for player in self.players if 'id' in player}
+        self.by_team = {}
+        self.by_position = {}
+        for position, player in enumerate(self.players):
+            for name in (player.get('team'), player.get('team_short')):
+                if name:
+                    self.by_team.setdefault(name.lower(), set()).add(position)
+            if player.get('position'):
+                self.by_position.setdefault(player['position'].lower(), set()).add(position)
+        self.sort_orders = _SortOrders(self.players)
+
+    def query(self, query):
+        """Returns (file data with the selected players, total players before pagination)"""
+        if query['min_form'] is not None:
+            raise QueryError("Not supported for players: min_form")
+        _check_fields([query['sort']] if query['sort'] else [], self.fields, 'sort')
+        _check_fields(query['fields'], self.fields, 'fields')
+
+        selections = []
+        if query['team']:
+            selections.append(set().union(*(self.by_team.get(team, set()) for team in query['team'])))
+        if query['position']:
+            selections.append(set().union(*(self.by_position.get(position, set()) for position in query['position'])))
+        if query['max_cost'] is not None:
+            selections.append({position for position, player in enumerate(self.players)
+                               if player.get('now_cost') is not None and player['now_cost'] <= query['max_cost']})
+        selected = set.intersection(*selections) if selections else None
+
+        if query['sort']:
+            order = self.sort_orders.get(query['sort'], query['descending'])
+        else:
+            order = range(len(self.players))
+        matches = [self.players[position] for position in order if selected is None or position in selected]
+
+        page = _paginate(matches, query)
+        return {**self.data, 'players': [_project(player, query['fields']) for player in page]}, len(matches)
+
+
+def _check_fields(fields, allowed, name):
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise QueryError(f"Invalid {name}: {', '.join(unknown)}. Allowed: {', '.join(sorted(allowed))}")
+
+
+# Indexes keyed by file name, rebuilt when the cached data object changes
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(filename, data, index_class):
+    """The index for a parsed data file (built once per loaded version of the file)"""
+    cached = _indexes.get(filename)
+    if cached is not None and cached[0] is data:
+        return cached[1]
+    with _indexes_lock:
+        cached = _indexes.get(filename)
+        if cached is None or cached[0] is not data:
+            cached = (data, index_class(data))
+            _indexes[filename] = cached
+        return cached[1]
+
+
+def query_response(filename, index_class):
+    """
+    Response for a list route: the whole cached file when no query parameters
+    are given, otherwise the filtered/sorted/paginated result (cached per
+    distinct query until the file changes). The list shape is unchanged; the
+    number of matches before pagination is sent as X-Total-Count (exposed
+    to cross-origin clients, see app.py). Picks files are paginated by team
+    group, so their count is one of groups.
+    """
+    try:
+        query = parse_query(request.args)
+    except QueryError as e:
+        return jsonify({"error": str(e)}), 400
+    if query is None:
+        return json_response(filename)
+
+    def build(data):
+        items, total = get_index(filename, data, index_class).query(query)
+        return items, {'X-Total-Count': str(total)}
+
+    try:
+        return json_response(filename, variant=('query', query_key(query)), build=build)
+    except QueryError as e:
+        return jsonify({"error": str(e)}), 400
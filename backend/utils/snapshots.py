@@ -0,0 +1,204 @@
+# utils/snapshots.py
+# Versioned data snapshots: every publish writes a complete copy of the
+# outputs to data/snapshots/<version>/ and then atomically swaps the
+# data/snapshots/CURRENT pointer, so readers never see a mix of old and new
+# files and the previous version stays available for rollback
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from config.config import Config
+from utils.deltas import write_changes
+from utils.manifest import write_manifest
+
+try:
+    import fcntl
+except ImportError:  # no cross-process lock on Windows; writers are only serialized per process there
+    fcntl = None
+
+SNAPSHOT_DIR = 'snapshots'
+POINTER_FILE = 'CURRENT'
+STAGING_PREFIX = '.staging-'
+
+# Top-level entries of the data directory that are not published outputs
+NON_OUTPUT_ENTRIES = {SNAPSHOT_DIR, 'pipeline_state'}
+
+# Abandoned staging directories (crashed runs) older than this are removed
+STALE_STAGING_SECONDS = 24 * 3600
+
+
+@contextmanager
+def data_lock(data_dir):
+    """
+    Exclusive lock held by everything that writes a data directory (pipeline
+    runs, gameweek ingests, fixture edits), across processes
+    """
+    if fcntl is None:
+        yield
+        return
+    state_dir = os.path.join(data_dir, 'pipeline_state')
+    os.makedirs(state_dir, exist_ok=True)
+    with open(os.path.join(state_dir, 'pipeline.lock'), 'w') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def snapshots_dir(data_dir):
+    return os.path.join(data_dir, SNAPSHOT_DIR)
+
+
+def snapshot_path(data_dir, version):
+    return os.path.join(snapshots_dir(data_dir), version)
+
+
+def current_version(data_dir):
+    """Version named by the CURRENT pointer, or None (no snapshot published yet)"""
+    try:
+        with open(os.path.join(snapshots_dir(data_dir), POINTER_FILE), 'r', encoding='utf-8') as f:
+            version = f.read().strip()
+    except FileNotFoundError:
+        return None
+    return version or None
+
+
+def resolve_root(data_dir):
+    """
+    (version, directory) the outputs are read from: the current snapshot, or
+    (None, data_dir) for data written before snapshots existed (flat layout).
+    """
+    version = current_version(data_dir)
+    if version is None:
+        return None, data_dir
+    return version, snapshot_path(data_dir, version)
+
+
+def list_snapshots(data_dir):
+    """Published versions, oldest first"""
+    try:
+        names = os.listdir(snapshots_dir(data_dir))
+    except FileNotFoundError:
+        return []
+    return sorted(
+        name for name in names
+        if name != POINTER_FILE and not name.startswith('.') and os.path.isdir(snapshot_path(data_dir, name))
+    )
+
+
+def _link_or_copy(source, target):
+    # Unchanged files share storage with the previous snapshot. Writers must
+    # replace files (never rewrite them in place) so old snapshots stay intact.
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def _seed(root, staging, top_level):
+    """Populate staging with every output file below root"""
+    for directory, subdirs, files in os.walk(root):
+        relative = os.path.relpath(directory, root)
+        if top_level and relative == '.':
+            subdirs[:] = [name for name in subdirs if name not in NON_OUTPUT_ENTRIES]
+        target_dir = staging if relative == '.' else os.path.join(staging, relative)
+        os.makedirs(target_dir, exist_ok=True)
+        for name in files:
+            if top_level and relative == '.' and name.startswith('.'):
+                continue
+            _link_or_copy(os.path.join(directory, name), os.path.join(target_dir, name))
+
+
+def stage_snapshot(data_dir):
+    """
+    New private staging directory holding the current outputs (hard links
+    where possible). Returns its path; publish it with publish_snapshot.
+    """
+    os.makedirs(snapshots_dir(data_dir), exist_ok=True)
+    staging = os.path.join(snapshots_dir(data_dir), f'{STAGING_PREFIX}{uuid.uuid4().hex[:8]}')
+    os.makedirs(staging)
+    version, root = resolve_root(data_dir)
+    if os.path.isdir(root):
+        _seed(root, staging, top_level=version is None)
+    return staging
+
+
+def _write_pointer(data_dir, version):
+    fd, tmp_path = tempfile.mkstemp(dir=snapshots_dir(data_dir), prefix='.pointer-')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(version + '\n')
+        os.replace(tmp_path, os.path.join(snapshots_dir(data_dir), POINTER_FILE))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def _new_version(data_dir):
+    version = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+    # Versions must sort after the current one even if the clock went backwards
+    existing = list_snapshots(data_dir)
+    if existing and version <= existing[-1]:
+        version = f'{existing[-1]}-{uuid.uuid4().hex[:4]}'
+    return version
+
+
+def publish_snapshot(data_dir, staging, timings=None):
+    """
+    Move a staged directory into place and point CURRENT at it; returns the
+    new version. The changes since the current version (see utils.deltas)
+    and the manifest of its files, with the run's stage `timings` (see
+    utils.manifest), are recorded in the new snapshot first.
+    """
+    previous_version, previous_root = resolve_root(data_dir)
+    write_changes(staging, previous_root, previous_version)
+    version = _new_version(data_dir)
+    write_manifest(staging, version, timings, previous_root)
+    os.rename(staging, snapshot_path(data_dir, version))
+    _write_pointer(data_dir, version)
+    prune_snapshots(data_dir, Config.SNAPSHOT_HISTORY)
+    return version
+
+
+def discard_staging(staging):
+    shutil.rmtree(staging, ignore_errors=True)
+
+
+def rollback(data_dir, version=None):
+    """
+    Point CURRENT at `version` (default: the snapshot published before the
+    current one). Returns the version now current.
+    Raises:
+        ValueError: if there is no such snapshot
+    """
+    versions = list_snapshots(data_dir)
+    current = current_version(data_dir)
+    if version is None:
+        older = [name for name in versions if current is None or name < current]
+        if not older:
+            raise ValueError('No earlier snapshot to roll back to')
+        version = older[-1]
+    elif version not in versions:
+        raise ValueError(f'Snapshot {version} not found')
+    _write_pointer(data_dir, version)
+    return version
+
+
+def prune_snapshots(data_dir, keep):
+    """Remove all but the newest `keep` snapshots (never the current one) and stale staging directories"""
+    current = current_version(data_dir)
+    versions = list_snapshots(data_dir)
+    for version in versions[:max(0, len(versions) - keep)]:
+        if version != current:
+            shutil.rmtree(snapshot_path(data_dir, version), ignore_errors=True)
+
+    now = time.time()
+    for name in os.listdir(snapshots_dir(data_dir)):
+        path = os.path.join(snapshots_dir(data_dir), name)
+        if name.startswith(STAGING_PREFIX) and now - os.path.getmtime(path) > STALE_STAGING_SECONDS:
+            shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,146 @@
+# utils/squad_planner.py
+# Optimal 15-man squad for a budget, formation and gameweek horizon, solved
+# as a small integer program over the precomputed player score matrix
+# (planner/player_scores.json, written by the pipeline)
+import time
+import numpy as np
+
+PLAYER_SCORES_FILE = 'planner/player_scores.json'
+
+# Squad composition by element_type (GK, DEF, MID, FWD) and the club limit
+SQUAD_POSITIONS = {1: 2, 2: 5, 3: 5, 4: 3}
+MAX_PER_TEAM = 3
+
+# Starting formations: DEF-MID-FWD with one goalkeeper
+FORMATION_LIMITS = {2: (3, 5), 3: (2, 5), 4: (1, 3)}
+
+# Bench players count this much of their expected points (auto-substitutions)
+BENCH_WEIGHT = 0.1
+
+# Budget bounds (£m)
+MIN_BUDGET = 80.0
+MAX_BUDGET = 120.0
+
+
+class PlannerError(ValueError):
+    """Invalid planner parameters or no feasible squad (answered with 400)"""
+
+
+class SolverUnavailable(RuntimeError):
+    """scipy is not installed (the planner route answers 503)"""
+
+
+def load_solver():
+    """
+    scipy's MILP solver and the pieces to build its constraints, imported on
+    first use: scipy takes longer to import than the rest of the app
+    Raises:
+        SolverUnavailable: if scipy is not installed
+    """
+    try:
+        from scipy.optimize import Bounds, LinearConstraint, milp
+        from scipy.sparse import eye, hstack
+    except ImportError as e:
+        raise SolverUnavailable('The squad planner requires scipy') from e
+    return Bounds, LinearConstraint, milp, eye, hstack
+
+
+def parse_formation(text):
+    """'3-4-3' -> {1: 1, 2: 3, 3: 4, 4: 3} (starters per element_type)"""
+    try:
+        defenders, midfielders, forwards = (int(part) for part in text.split('-'))
+    except ValueError:
+        raise PlannerError(f"Invalid formation: {text} (expected e.g. 3-4-3)")
+    starters = {1: 1, 2: defenders, 3: midfielders, 4: forwards}
+    if defenders + midfielders + forwards != 10 or any(
+            not low <= starters[element_type] <= high for element_type, (low, high) in FORMATION_LIMITS.items()):
+        raise PlannerError(f"Invalid formation: {text} (3-5 defenders, 2-5 midfielders, 1-3 forwards, 10 outfield players)")
+    return starters
+
+
+class ScoreMatrix:
+    """Player score matrix as arrays (built once per loaded version of the file)"""
+
+    def __init__(self, data):
+        self.players = data.get('players', [])
+        self.gameweeks = data.get('gameweeks', [])
+        self.cost = np.array([player['now_cost'] for player in self.players], dtype=float)
+        self.element_type = np.array([player['element_type'] for player in self.players], dtype=int)
+        teams = sorted({player['team'] for player in self.players})
+        team_codes = {team: code for code, team in enumerate(teams)}
+        self.team_count = len(teams)
+        self.team = np.array([team_codes[player['team']] for player in self.players], dtype=int)
+        self.scores = np.array([player['scores'] for player in self.players], dtype=float).reshape(
+            len(self.players), len(self.gameweeks))
+
+    def horizon_scores(self, start, horizon):
+        """Expected points per player summed over `horizon` gameweeks from `start`; the gameweeks used"""
+        if start is None:
+            first = 0
+        elif start in self.gameweeks:
+            first = self.gameweeks.index(start)
+        else:
+            raise PlannerError(f"No projections for gameweek {start}")
+        columns = slice(first, first + horizon)
+        return self.scores[:, columns].sum(axis=1), self.gameweeks[columns]
+
+    def solve(self, budget, starters, horizon, start=None):
+        """
+        Squad maximizing the starters' expected points over the horizon (plus
+        BENCH_WEIGHT of the bench's) within budget, with the usual squad
+        composition and at most MAX_PER_TEAM players per club. The same XI
+        is assumed for the whole horizon.
+        """
+        Bounds, LinearConstraint, milp, eye, hstack = load_solver()
+        total, gameweeks = self.horizon_scores(start, horizon)
+        count = len(self.players)
+
+        # Variables: x (in squad) for every player, then s (starting)
+        objective = -np.concatenate([BENCH_WEIGHT * total, (1 - BENCH_WEIGHT) * total])
+        rows, lower, upper = [], [], []
+
+        def add(row, low, high):
+            rows.append(row)
+            lower.append(low)
+            upper.append(high)
+
+        zeros = np.zeros(count)
+        add(np.concatenate([self.cost, zeros]), -np.inf, budget)
+        for element_type, size in SQUAD_POSITIONS.items():
+            is_position = (self.element_type == element_type).astype(float)
+            add(np.concatenate([is_position, zeros]), size, size)
+            add(np.concatenate([zeros, is_position]), starters[element_type], starters[element_type])
+        for team in range(self.team_count):
+            add(np.concatenate([(self.team == team).astype(float), zeros]), -np.inf, MAX_PER_TEAM)
+        constraints = [LinearConstraint(np.array(rows), lower, upper)]
+        # A starter must be in the squad: s - x <= 0
+        constraints.append(LinearConstraint(hstack([-eye(count), eye(count)]), -np.inf, 0))
+
+        start_time = time.perf_counter()
+        result = milp(objective, constraints=constraints, integrality=np.ones(2 * count),
+                      bounds=Bounds(0, 1), options={'time_limit': 5})
+        solve_seconds = time.perf_counter() - start_time
+        if result.x is None:
+            raise PlannerError(f"No valid squad fits a budget of {budget}")
+
+        chosen = result.x > 0.5
+        squad, starting = np.flatnonzero(chosen[:count]), chosen[count:]
+        order = sorted(squad, key=lambda i: (not starting[i], self.element_type[i], -total[i]))
+        picks = [
+            {
+                **{key: value for key, value in self.players[i].items() if key != 'scores'},
+                'starting': bool(starting[i]),
+                'expected_points': round(float(total[i]), 2)
+            }
+            for i in order
+        ]
+        starting_points = float(total[starting].sum())
+        return {
+            'gameweeks': gameweeks,
+            'squad': picks,
+            'total_cost': round(float(self.cost[squad].sum()), 1),
+            'starting_expected_points': round(starting_points, 2),
+            'bench_expected_points': round(float(total[squad].sum()) - starting_points, 2),
+            'optimal': bool(result.status == 0),
+            'solve_ms': round(solve_seconds * 1000, 1)
+        }
@@ -262,7 +262,28 @@ export default function AdminPage() {
         throw new Error(errorData.message || "Failed to process data")
       }
 
-      const result = await response.json()
+      // Processing runs as a background job; follow its progress stream until it finishes
+      const { job_id } = await response.json()
+      const result = await new Promise<{ message?: string }>((resolve, reject) => {
+        const events = new EventSource(`${API_BASE_URL}/api/admin/jobs/${job_id}/events`)
+        events.addEventListener("stage", (event) => {
+          const { stage, seconds } = JSON.parse((event as MessageEvent).data)
+          setProcessMessage(`Processing data... ${stage} done in ${seconds.toFixed(2)}s`)
+        })
+        events.addEventListener("done", (event) => {
+          events.close()
+          const job = JSON.parse((event as MessageEvent).data)
+          if (job.status === "succeeded") {
+            resolve(job.result)
+          } else {
+            reject(new Error(job.error || "Failed to process data"))
+          }
+        })
+        events.onerror = () => {
+          events.close()
+          reject(new Error("Lost connection to the processing job. Check the admin panel again shortly."))
+        }
+      })
       setProcessStatus("success")
       setProcessMessage(result.message || "Successfully processed all data and updated analytics")
       
@@ -442,7 +463,7 @@ export default function AdminPage() {
                   <ol className="list-decimal list-inside space-y-1 ml-2">
                     <li>Upload your CSV file (fpl-data-stats.csv)</li>
                     <li>Click "Process Data" below</li>
-                    <li>System runs Jupyter notebook to analyze data</li>
+                    <li>System runs the analytics pipeline to analyze data</li>
                     <li>All JSON analytics files are automatically updated</li>
                     <li>Frontend displays refreshed data</li>
                   </ol>